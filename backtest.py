@@ -0,0 +1,364 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from betting_utils import CONFIDENCE_WEIGHTS, bet_metrics, calculate_confidence_scores, load_matched_history, value_bet_mask
+from history_store import HISTORY_DIR, SNAPSHOT_COLUMN, load_history
+from margins import DEFAULT_METHOD, MARGIN_METHODS
+
+# Outcome index (home, draw, away as in OUTCOMES) per result code
+RESULT_CODES = {'H': 0, 'D': 1, 'A': 2}
+
+# A season runs from July to June and is labelled like 2024/25
+SEASON_START_MONTH = 7
+
+# A fixture is identified by its season and Unibet team names
+FIXTURE_COLUMNS = ['season', 'home_team', 'away_team']
+
+# Opta probability bins (%) for the calibration table
+CALIBRATION_BINS = np.arange(0, 101, 10)
+
+def season_of(timestamps):
+    """Season label (e.g. '2024/25') for each timestamp"""
+    ts = pd.to_datetime(pd.Series(timestamps).reset_index(drop=True))
+    start = ts.dt.year - (ts.dt.month < SEASON_START_MONTH).astype(int)
+    return start.astype(str) + '/' + ((start + 1) % 100).astype(str).str.zfill(2)
+
+def load_results(path):
+    """Load a results table
+
+    The CSV needs home_team and away_team (Unibet names, as in
+    matched_predictions.csv), either a result column (H/D/A) or home_goals and
+    away_goals, and either a season column or the match date in a date column.
+
+    Returns:
+        DataFrame with season, home_team, away_team and outcome (0 home, 1 draw, 2 away)
+    """
+    results = pd.read_csv(path)
+    if 'result' in results.columns:
+        outcome = results['result'].str.upper().map(RESULT_CODES)
+    elif {'home_goals', 'away_goals'} <= set(results.columns):
+        diff = results['home_goals'] - results['away_goals']
+        outcome = pd.Series(np.select([diff > 0, diff == 0], [0, 1], 2), index=results.index)
+        outcome[diff.isna()] = np.nan
+    else:
+        raise ValueError(f"{path} needs a result column or home_goals and away_goals")
+
+    if 'season' in results.columns:
+        season = results['season'].astype(str)
+    elif 'date' in results.columns:
+        season = season_of(results['date']).set_axis(results.index)
+    else:
+        raise ValueError(f"{path} needs a season or date column")
+
+    table = pd.DataFrame({
+        'season': season,
+        'home_team': results['home_team'].astype(str),
+        'away_team': results['away_team'].astype(str),
+        'outcome': outcome,
+    }).dropna(subset=['outcome'])
+    table['outcome'] = table['outcome'].astype(int)
+    return table.drop_duplicates(FIXTURE_COLUMNS, keep='last')
+
+def _match_snapshot(snapshot_ts, opta_df, unibet_df):
+    """Run find_matching_games on one stored run, without its console output
+
+    Kickoffs are dated relative to the snapshot, so a run stored in late
+    December still puts January fixtures in the following year.
+    """
+    from match_data import find_matching_games
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        matched = find_matching_games(opta_df, unibet_df, state_file=None, output_file=None, aliases_file=None,
+                                      reference=snapshot_ts)
+    if not matched.empty:
+        matched[SNAPSHOT_COLUMN] = snapshot_ts
+    return matched
+
+def replay_snapshots(start=None, end=None, competitions=None, root=HISTORY_DIR, workers=1):
+    """Match every stored Opta snapshot against the Unibet snapshot of the same run
+
+    Args:
+        start: First snapshot date (default: no limit)
+        end: Last snapshot date (default: no limit)
+        competitions: Competition partitions to read (default: all)
+        root: History store directory
+        workers: Processes to match snapshots in
+
+    Returns:
+        Matched rows of all runs with a snapshot_ts column, oldest first
+    """
+    opta = load_history('opta', start, end, competitions, root=root)
+    unibet = load_history('unibet', start, end, competitions, root=root)
+    if opta.empty or unibet.empty:
+        return pd.DataFrame()
+    unibet_runs = {ts: df.drop(columns=[SNAPSHOT_COLUMN]) for ts, df in unibet.groupby(SNAPSHOT_COLUMN, sort=False)}
+    runs = [
+        (ts, df.drop(columns=[SNAPSHOT_COLUMN]).reset_index(drop=True), unibet_runs[ts].reset_index(drop=True))
+        for ts, df in opta.groupby(SNAPSHOT_COLUMN, sort=True) if ts in unibet_runs
+    ]
+
+    if workers > 1 and len(runs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(_match_snapshot, *zip(*runs)))
+    else:
+        frames = [_match_snapshot(*run) for run in runs]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def join_results(matched, results, bet_on='last'):
+    """Keep one snapshot per fixture and attach its result
+
+    Args:
+        matched: Matched rows with a snapshot_ts column
+        results: Table from load_results
+        bet_on: 'last' to bet at the latest snapshot before the results are
+            known (closest to the closing odds), 'first' for the earliest
+
+    Returns:
+        One row per fixture that has a result, with season and outcome columns
+    """
+    fixtures = matched.sort_values(SNAPSHOT_COLUMN, kind='stable').copy()
+    fixtures['season'] = season_of(fixtures[SNAPSHOT_COLUMN]).to_numpy()
+    fixtures['home_team'] = fixtures['home_team'].astype(str)
+    fixtures['away_team'] = fixtures['away_team'].astype(str)
+    fixtures = fixtures.drop_duplicates(FIXTURE_COLUMNS, keep=bet_on)
+    joined = fixtures.merge(results, on=FIXTURE_COLUMNS, how='inner')
+    missing = len(fixtures) - len(joined)
+    if missing:
+        print(f"{missing} of {len(fixtures)} fixtures have no result and are left out")
+    return joined.reset_index(drop=True)
+
+def prepare_arrays(fixtures, margin_method=DEFAULT_METHOD):
+    """Turn joined fixtures into the arrays evaluate() works on"""
+    arrays = bet_metrics(fixtures, margin_method)
+    seasons, season_index = np.unique(fixtures['season'].to_numpy(dtype=str), return_inverse=True)
+    outcome = fixtures['outcome'].to_numpy(dtype=int)
+    arrays['won'] = outcome[:, None] == np.arange(3)[None, :]
+    arrays['season_index'] = season_index
+    arrays['seasons'] = seasons
+    return arrays
+
+def bet_mask(arrays, threshold=2.0, weights=None, min_confidence=0):
+    """(fixtures, 3) mask of the outcomes analyze_match_data would recommend
+
+    Bets need an edge above threshold and a positive expected return, as in
+    analyze_match_data, and optionally a confidence score of at least
+    min_confidence.
+    """
+    mask = value_bet_mask(arrays['value'], arrays['expected_return'], threshold)
+    if min_confidence > 0:
+        scores = calculate_confidence_scores(arrays['opta_prob'], arrays['value'], arrays['expected_return'], weights)
+        mask &= np.round(scores, 1) >= min_confidence
+    return mask
+
+def evaluate(arrays, mask):
+    """Flat €1 stakes on every masked outcome, per season and in total
+
+    Returns:
+        DataFrame indexed by season (plus 'All') with bets, wins, hit_rate,
+        profit, roi (% of stakes), avg_odds and the mean Opta probability vs
+        the observed hit rate of the bets
+    """
+    rows, cols = np.nonzero(mask)
+    season = arrays['season_index'][rows]
+    won = arrays['won'][rows, cols]
+    odds = arrays['odds'][rows, cols]
+    profit = np.where(won, odds - 1, -1.0)
+    n_seasons = len(arrays['seasons'])
+
+    def totals(weights=None):
+        return np.bincount(season, weights, minlength=n_seasons)
+
+    table = pd.DataFrame({
+        'bets': totals(),
+        'wins': totals(won.astype(float)),
+        'profit': totals(profit),
+        'odds_sum': totals(odds),
+        'prob_sum': totals(arrays['opta_prob'][rows, cols]),
+    }, index=pd.Index(arrays['seasons'], name='season'))
+    table.loc['All'] = table.sum()
+    bets = table['bets'].replace(0, np.nan)
+    table['hit_rate'] = table['wins'] / bets * 100
+    table['roi'] = table['profit'] / bets * 100
+    table['avg_odds'] = table['odds_sum'] / bets
+    table['opta_prob'] = table['prob_sum'] / bets
+    table['bets'] = table['bets'].astype(int)
+    table['wins'] = table['wins'].astype(int)
+    return table[['bets', 'wins', 'hit_rate', 'profit', 'roi', 'avg_odds', 'opta_prob']]
+
+def calibration(arrays, mask=None):
+    """Predicted vs observed frequency per Opta probability bin
+
+    Args:
+        arrays: From prepare_arrays
+        mask: Only include these outcomes (default: all three outcomes of every fixture)
+
+    Returns:
+        DataFrame per bin with count, mean predicted probability and observed
+        frequency (both in %), plus the Brier score of the included outcomes
+    """
+    prob = arrays['opta_prob'] if mask is None else arrays['opta_prob'][mask]
+    won = arrays['won'] if mask is None else arrays['won'][mask]
+    prob, won = prob.ravel(), won.ravel().astype(float)
+    bins = np.clip(np.digitize(prob, CALIBRATION_BINS[1:-1]), 0, len(CALIBRATION_BINS) - 2)
+    n_bins = len(CALIBRATION_BINS) - 1
+    count = np.bincount(bins, minlength=n_bins)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        predicted = np.bincount(bins, prob, minlength=n_bins) / count
+        observed = np.bincount(bins, won, minlength=n_bins) / count * 100
+    labels = [f"{lo}-{hi}%" for lo, hi in zip(CALIBRATION_BINS[:-1], CALIBRATION_BINS[1:])]
+    table = pd.DataFrame({'count': count, 'predicted': predicted, 'observed': observed}, index=pd.Index(labels, name='opta_prob'))
+    brier = float(np.mean((prob / 100 - won) ** 2)) if len(prob) else float('nan')
+    return table[table['count'] > 0], brier
+
+def weight_grid(step=0.1):
+    """All (probability, edge, expected return) weights on a grid that sum to 1"""
+    n = int(round(1 / step))
+    return [(i / n, j / n, (n - i - j) / n) for i in range(n + 1) for j in range(n + 1 - i)]
+
+def _grid_for_weights(arrays, weights, thresholds, min_confidences):
+    """Evaluate every threshold and minimum confidence for one set of weights"""
+    scores = np.round(calculate_confidence_scores(arrays['opta_prob'], arrays['value'], arrays['expected_return'], weights), 1)
+    rows = []
+    for threshold in thresholds:
+        edge_mask = value_bet_mask(arrays['value'], arrays['expected_return'], threshold)
+        for min_confidence in min_confidences:
+            mask = edge_mask & (scores >= min_confidence) if min_confidence > 0 else edge_mask
+            won = arrays['won'][mask]
+            profit = np.where(won, arrays['odds'][mask] - 1, -1.0)
+            # Worst season ROI shows whether the result holds up across seasons
+            season_profit = np.bincount(arrays['season_index'][np.nonzero(mask)[0]], profit, minlength=len(arrays['seasons']))
+            season_bets = np.bincount(arrays['season_index'][np.nonzero(mask)[0]], minlength=len(arrays['seasons']))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                season_roi = np.where(season_bets > 0, season_profit / season_bets * 100, np.nan)
+            bets = int(mask.sum())
+            rows.append({
+                'prob_weight': weights[0],
+                'edge_weight': weights[1],
+                'return_weight': weights[2],
+                'threshold': threshold,
+                'min_confidence': min_confidence,
+                'bets': bets,
+                'hit_rate': won.mean() * 100 if bets else np.nan,
+                'profit': profit.sum(),
+                'roi': profit.sum() / bets * 100 if bets else np.nan,
+                'worst_season_roi': np.nanmin(season_roi) if bets else np.nan,
+            })
+    return rows
+
+def grid_search(arrays, thresholds, weights_list=None, min_confidences=(0,), workers=None):
+    """Evaluate every combination of threshold, confidence weights and minimum confidence
+
+    Each set of weights is one task: its confidence scores are computed once
+    for all fixtures and every threshold / minimum confidence is a mask over
+    them. Tasks are spread over processes.
+
+    Args:
+        arrays: From prepare_arrays
+        thresholds: Edge thresholds to try
+        weights_list: Confidence weights to try (default: CONFIDENCE_WEIGHTS only)
+        min_confidences: Minimum confidence scores to try (0: no filter)
+        workers: Processes to use (default: all cores)
+
+    Returns:
+        DataFrame with one row per combination, best ROI first
+    """
+    weights_list = weights_list or [CONFIDENCE_WEIGHTS]
+    workers = max(1, min(workers or os.cpu_count(), len(weights_list)))
+    n = len(weights_list)
+    if workers == 1:
+        results = [_grid_for_weights(arrays, weights, thresholds, min_confidences) for weights in weights_list]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_grid_for_weights, [arrays] * n, weights_list, [thresholds] * n, [min_confidences] * n))
+    grid = pd.DataFrame([row for rows in results for row in rows])
+    return grid.sort_values('roi', ascending=False, kind='stable').reset_index(drop=True)
+
+def load_fixtures(results_file, source='replay', start=None, end=None, competitions=None,
+                  root=HISTORY_DIR, bet_on='last', workers=1):
+    """Replay (or load) the matched snapshots and join them with the results
+
+    Args:
+        results_file: CSV for load_results
+        source: 'replay' to re-match the stored Opta and Unibet snapshots with
+            the current matching code, 'matched' to use the stored matched snapshots
+        start, end, competitions, root: History filters
+        bet_on: 'last' or 'first' snapshot per fixture
+        workers: Processes used for replaying
+
+    Returns:
+        One row per fixture with a result
+    """
+    if source == 'replay':
+        matched = replay_snapshots(start, end, competitions, root, workers)
+    else:
+        matched = load_matched_history(start, end, competitions, root)
+    if matched.empty:
+        return matched
+    return join_results(matched, load_results(results_file), bet_on)
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest the value-bet strategy on stored snapshots and results')
+    parser.add_argument('--results', type=str, required=True, help='CSV with home_team, away_team, season or date, and result (H/D/A) or home_goals/away_goals')
+    parser.add_argument('--source', choices=['replay', 'matched'], default='replay', help='Re-match the stored Opta/Unibet snapshots (default) or use the stored matched snapshots')
+    parser.add_argument('--history_dir', type=str, default=HISTORY_DIR, help='History store directory (default: history)')
+    parser.add_argument('--start', type=str, help='First snapshot date to include')
+    parser.add_argument('--end', type=str, help='Last snapshot date to include')
+    parser.add_argument('--competitions', type=str, nargs='+', help='Competition partitions to include')
+    parser.add_argument('--bet_on', choices=['last', 'first'], default='last', help='Snapshot to bet at for each fixture (default: last)')
+    parser.add_argument('--threshold', type=float, default=2.0, help='Edge threshold for the report (default: 2.0)')
+    parser.add_argument('--margin_method', choices=list(MARGIN_METHODS), default=DEFAULT_METHOD, help=f'How the bookmaker margin is removed (default: {DEFAULT_METHOD})')
+    parser.add_argument('--grid', action='store_true', help='Grid-search thresholds, confidence weights and minimum confidence')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0, 1, 2, 3, 4, 5, 7.5, 10], help='Grid: edge thresholds')
+    parser.add_argument('--weight_step', type=float, default=0.1, help='Grid: step of the confidence weight grid (default: 0.1)')
+    parser.add_argument('--min_confidence', type=float, nargs='+', default=[0, 20, 40, 60], help='Grid: minimum confidence scores')
+    parser.add_argument('--min_bets', type=int, default=30, help='Grid: ignore combinations with fewer bets (default: 30)')
+    parser.add_argument('--top', type=int, default=10, help='Grid: combinations to print (default: 10)')
+    parser.add_argument('--output', type=str, help='Grid: write all combinations to this CSV')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count()
+
+    start = time.perf_counter()
+    fixtures = load_fixtures(args.results, args.source, args.start, args.end, args.competitions,
+                             args.history_dir, args.bet_on, workers)
+    if fixtures.empty:
+        print("No stored snapshots matched any result")
+        return
+    arrays = prepare_arrays(fixtures, args.margin_method)
+    print(f"Loaded {len(fixtures)} fixtures with results over {len(arrays['seasons'])} season(s) in {time.perf_counter() - start:.1f}s")
+
+    mask = bet_mask(arrays, args.threshold)
+    pd.set_option('display.width', 120)
+    print(f"\nFlat €1 stakes at threshold {args.threshold}:")
+    print(evaluate(arrays, mask).round(2).to_string())
+
+    table, brier = calibration(arrays)
+    print(f"\nCalibration of the Opta probabilities (all outcomes, Brier score {brier:.4f}):")
+    print(table.round(1).to_string())
+    table, brier = calibration(arrays, mask)
+    print(f"\nCalibration of the recommended bets (Brier score {brier:.4f}):")
+    print(table.round(1).to_string())
+
+    if args.grid:
+        weights_list = weight_grid(args.weight_step)
+        grid_start = time.perf_counter()
+        grid = grid_search(arrays, args.thresholds, weights_list, args.min_confidence, workers)
+        print(f"\nEvaluated {len(grid)} combinations in {time.perf_counter() - grid_start:.1f}s")
+        if args.output:
+            grid.to_csv(args.output, index=False)
+            print(f"Saved grid to {args.output}")
+        print(f"\nBest combinations with at least {args.min_bets} bets:")
+        print(grid[grid['bets'] >= args.min_bets].head(args.top).round(2).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
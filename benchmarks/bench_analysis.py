@@ -0,0 +1,123 @@
+"""Benchmark the vectorized analyze_match_data against the previous row-wise version
+
+The row-wise reference follows the current rules: edges against the
+proportional margin-free probabilities, no bets on rows outside the overround
+band, and only bets with a positive expected return. Both run with
+margin_method='proportional' so their bets can be compared one to one.
+
+Usage:
+    python benchmarks/bench_analysis.py
+    python benchmarks/bench_analysis.py --sizes 1000 100000 --legacy_max_rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from betting_utils import (
+    analyze_match_data,
+    calculate_confidence_score,
+    calculate_expected_return,
+    calculate_implied_probability,
+    evaluate_bet_value,
+)
+from margins import OVERROUND_BAND
+
+def row_fair_probability(row, suffix):
+    """Proportional margin-free probability (%) of one outcome, NaN outside the overround band"""
+    inverse = {key: calculate_implied_probability(row[f'unibet_{key}_odds']) for key in ('home', 'draw', 'away')}
+    total = inverse['home'] + inverse['draw'] + inverse['away']
+    low, high = OVERROUND_BAND
+    if not low <= total - 1 <= high:
+        return np.nan
+    return inverse[suffix] / total * 100
+
+def legacy_analyze_match_data(df, threshold=2.0):
+    """The apply/iterrows implementation analyze_match_data replaced, on the current rules"""
+    df['implied_prob_home'] = df.apply(lambda row: row_fair_probability(row, 'home'), axis=1)
+    df['implied_prob_draw'] = df.apply(lambda row: row_fair_probability(row, 'draw'), axis=1)
+    df['implied_prob_away'] = df.apply(lambda row: row_fair_probability(row, 'away'), axis=1)
+
+    df['value_home'] = df.apply(lambda row: evaluate_bet_value(row['opta_home_win_%'], row['implied_prob_home']), axis=1)
+    df['value_draw'] = df.apply(lambda row: evaluate_bet_value(row['opta_draw_%'], row['implied_prob_draw']), axis=1)
+    df['value_away'] = df.apply(lambda row: evaluate_bet_value(row['opta_away_win_%'], row['implied_prob_away']), axis=1)
+
+    df['expected_return_home'] = df.apply(lambda row: calculate_expected_return(row['unibet_home_odds'], row['opta_home_win_%']), axis=1)
+    df['expected_return_draw'] = df.apply(lambda row: calculate_expected_return(row['unibet_draw_odds'], row['opta_draw_%']), axis=1)
+    df['expected_return_away'] = df.apply(lambda row: calculate_expected_return(row['unibet_away_odds'], row['opta_away_win_%']), axis=1)
+
+    all_bets = []
+    for _, row in df.iterrows():
+        for suffix, bet_type, prob_col in [
+            ('home', 'Home Win', 'opta_home_win_%'),
+            ('draw', 'Draw', 'opta_draw_%'),
+            ('away', 'Away Win', 'opta_away_win_%'),
+        ]:
+            if row[f'value_{suffix}'] > threshold and row[f'expected_return_{suffix}'] > 0:
+                all_bets.append({
+                    'match': f"{row['home_team']} vs {row['away_team']}",
+                    'bet_type': bet_type,
+                    'implied_prob': row[f'implied_prob_{suffix}'],
+                    'opta_prob': row[prob_col],
+                    'difference': row[f'value_{suffix}'],
+                    'expected_return': row[f'expected_return_{suffix}'],
+                    'odds': row[f'unibet_{suffix}_odds'],
+                    'confidence_score': calculate_confidence_score(
+                        row[prob_col], row[f'value_{suffix}'], row[f'expected_return_{suffix}']
+                    )
+                })
+    return sorted(all_bets, key=lambda x: x['confidence_score'], reverse=True)
+
+def make_matched_frame(rows, seed=0):
+    """Build a synthetic matched_predictions frame with realistic 1X2 numbers"""
+    rng = np.random.default_rng(seed)
+    opta = rng.dirichlet([4, 3, 3], size=rows) * 100
+    # Bookmaker view: Opta probabilities with noise plus a ~6% margin
+    book = np.clip(opta / 100 + rng.normal(0, 0.03, size=opta.shape), 0.02, 0.95) * 1.06
+    odds = np.round(1 / book, 2)
+    return pd.DataFrame({
+        'competition': rng.choice(['Eng', 'Spa', 'Ita', 'Dui', 'Fra', 'Ned'], size=rows),
+        'date_time': 'Mar 8 @ 15:00',
+        'home_team': [f'Home {i}' for i in range(rows)],
+        'away_team': [f'Away {i}' for i in range(rows)],
+        'opta_home_win_%': np.round(opta[:, 0], 1),
+        'opta_draw_%': np.round(opta[:, 1], 1),
+        'opta_away_win_%': np.round(opta[:, 2], 1),
+        'unibet_home_odds': odds[:, 0],
+        'unibet_draw_odds': odds[:, 1],
+        'unibet_away_odds': odds[:, 2],
+    })
+
+def time_call(func, df, threshold):
+    start = time.perf_counter()
+    bets = func(df.copy(), threshold)
+    return time.perf_counter() - start, bets
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analyze_match_data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--threshold', type=float, default=2.0)
+    parser.add_argument('--legacy_max_rows', type=int, default=1_000_000,
+                        help='Skip the slow row-wise version above this many rows')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9} {'bets':>8}  identical")
+    for size in args.sizes:
+        df = make_matched_frame(size)
+        new_time, new_bets = time_call(
+            lambda frame, threshold: analyze_match_data(frame, threshold, margin_method='proportional'), df, args.threshold
+        )
+        if size <= args.legacy_max_rows:
+            old_time, old_bets = time_call(legacy_analyze_match_data, df, args.threshold)
+            identical = old_bets == new_bets
+            print(f"{size:>10} {old_time:>12.3f} {new_time:>15.3f} {old_time / new_time:>8.1f}x {len(new_bets):>8}  {identical}")
+        else:
+            print(f"{size:>10} {'skipped':>12} {new_time:>15.3f} {'-':>9} {len(new_bets):>8}  -")
+
+if __name__ == "__main__":
+    main()
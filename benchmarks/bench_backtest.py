@@ -0,0 +1,86 @@
+"""Benchmark the vectorized backtest grid search against per-combination analysis
+
+Builds synthetic fixtures over several seasons with outcomes drawn from the
+Opta probabilities, then evaluates the threshold x confidence weights x
+minimum confidence grid with backtest.grid_search. A sample of the
+combinations is also evaluated the straightforward way (analyze_match_data
+per combination, settling every bet dict), which is checked to give the same
+ROI and extrapolated to the full grid.
+
+Usage:
+    python benchmarks/bench_backtest.py
+    python benchmarks/bench_backtest.py --fixtures 50000 --seasons 5 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_analysis import make_matched_frame
+from betting_utils import OUTCOMES, analyze_match_data
+import backtest
+
+def make_fixtures(count, seasons, seed=0):
+    """Synthetic joined fixtures with a season and a result per row"""
+    rng = np.random.default_rng(seed)
+    df = make_matched_frame(count, seed)
+    prob = df[['opta_home_win_%', 'opta_draw_%', 'opta_away_win_%']].to_numpy()
+    prob = prob / prob.sum(axis=1, keepdims=True)
+    df['outcome'] = (rng.random(count)[:, None] > np.cumsum(prob, axis=1)).sum(axis=1).clip(0, 2)
+    df['season'] = [f"{2020 + i}/{(21 + i) % 100:02d}" for i in rng.integers(0, seasons, count)]
+    return df
+
+def naive_roi(df, threshold, weights, min_confidence):
+    """ROI of one combination from analyze_match_data's bet dicts"""
+    results = dict(zip(df['home_team'] + ' vs ' + df['away_team'], df['outcome']))
+    labels = [bet_type for _, bet_type, _, _ in OUTCOMES]
+    bets = [bet for bet in analyze_match_data(df.copy(), threshold, weights) if bet['confidence_score'] >= min_confidence]
+    profit = sum(bet['odds'] - 1 if labels.index(bet['bet_type']) == results[bet['match']] else -1 for bet in bets)
+    return profit / len(bets) * 100 if bets else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the backtest grid search')
+    parser.add_argument('--fixtures', type=int, default=20_000, help='Number of fixtures (default: 20,000)')
+    parser.add_argument('--seasons', type=int, default=4, help='Number of seasons (default: 4)')
+    parser.add_argument('--weight_step', type=float, default=0.1, help='Step of the confidence weight grid')
+    parser.add_argument('--naive_sample', type=int, default=10, help='Combinations to evaluate per-combination')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    thresholds = [0, 1, 2, 3, 4, 5, 7.5, 10]
+    min_confidences = [0, 20, 40, 60]
+    weights_list = backtest.weight_grid(args.weight_step)
+    df = make_fixtures(args.fixtures, args.seasons)
+    arrays = backtest.prepare_arrays(df)
+    combinations = len(thresholds) * len(min_confidences) * len(weights_list)
+    print(f"{args.fixtures:,} fixtures, {args.seasons} seasons, {combinations:,} combinations")
+
+    start = time.perf_counter()
+    grid = backtest.grid_search(arrays, thresholds, weights_list, min_confidences, args.workers)
+    vectorized = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    sample = grid.iloc[rng.choice(len(grid), size=min(args.naive_sample, len(grid)), replace=False)]
+    start = time.perf_counter()
+    naive = [
+        naive_roi(df, row.threshold, (row.prob_weight, row.edge_weight, row.return_weight), row.min_confidence)
+        for row in sample.itertuples()
+    ]
+    per_combination = (time.perf_counter() - start) / len(sample)
+    max_diff = np.nanmax(np.abs(np.array(naive) - sample['roi'].to_numpy()))
+
+    print(f"vectorized grid:        {vectorized:8.2f}s ({vectorized / combinations * 1000:.3f}ms per combination)")
+    print(f"per-combination (est.): {per_combination * combinations:8.2f}s ({per_combination * 1000:.3f}ms per combination)")
+    print(f"speedup:                {per_combination * combinations / vectorized:8.1f}x")
+    print(f"max ROI difference on {len(sample)} sampled combinations: {max_diff:.2e}")
+    pd.set_option('display.width', 120)
+    print(grid.head(5).round(2).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
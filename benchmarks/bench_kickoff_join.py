@@ -0,0 +1,119 @@
+"""Benchmark the kickoff-aware join on a synthetic multi-week odds dump
+
+Each competition plays a double round robin, one round a week, and the dump
+runs longer than one round robin, so every pairing comes back for a second
+game. The Opta fixtures are the last weeks of the dump.
+
+The same fixtures are matched two ways:
+
+- kickoff join: match_fixture with the fixture's kickoff, so only the
+  (competition, kickoff bucket) groups around it are searched;
+- competition only: match_fixture without a kickoff, which searches every
+  game of the competition like the matcher did before kickoffs were parsed.
+
+The benchmark reports the average number of candidate games per fixture, the
+time to index the dump and match the fixtures, and how many fixtures were joined to the game at their own
+kickoff rather than an earlier game between the same teams.
+
+Usage:
+    python benchmarks/bench_kickoff_join.py
+    python benchmarks/bench_kickoff_join.py --competitions 10 40 --teams 20 --weeks 60
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from match_data import build_team_index, lookup_competition_rows, lookup_fixture_rows, match_fixture, parse_kickoffs
+
+START = pd.Timestamp('2025-08-02 15:00')
+
+def round_robin(teams):
+    """Pairings per round of a double round robin (circle method)"""
+    players = list(range(teams))
+    rounds = []
+    for _ in range(teams - 1):
+        rounds.append([(players[i], players[-1 - i]) for i in range(teams // 2)])
+        players = [players[0], players[-1]] + players[1:-1]
+    return rounds + [[(away, home) for home, away in pairs] for pairs in rounds]
+
+def make_dump(competitions, teams, weeks, opta_weeks, seed=0):
+    """Unibet odds for every game of the dump, and Opta predictions for its last weeks
+
+    Returns:
+        tuple: (Unibet DataFrame, Opta DataFrame, expected Unibet row per Opta row)
+    """
+    rng = np.random.default_rng(seed)
+    schedule = round_robin(teams)
+    unibet, opta, expected = [], [], []
+    for c in range(competitions):
+        competition = f'L{c:03d}'
+        for week in range(weeks):
+            for slot, (home, away) in enumerate(schedule[week % len(schedule)]):
+                kickoff = START + pd.Timedelta(days=7 * week, minutes=15 * (slot % 4))
+                row = {
+                    'competition': competition,
+                    'date_time': kickoff.strftime('%d %b %H:%M'),
+                    'home_team': f'{competition} Team {home}',
+                    'away_team': f'{competition} Team {away}',
+                    'home_odds': round(rng.uniform(1.3, 6), 2),
+                    'draw_odds': round(rng.uniform(2.8, 4.5), 2),
+                    'away_odds': round(rng.uniform(1.3, 8), 2),
+                }
+                if week >= weeks - opta_weeks:
+                    opta.append({
+                        'competition': competition,
+                        'date_time': f"{kickoff.strftime('%b')} {kickoff.day} @ {kickoff.strftime('%H:%M')}",
+                        'home_team': row['home_team'],
+                        'away_team': row['away_team'],
+                        'home_win_%': 40.0, 'draw_%': 30.0, 'away_win_%': 30.0,
+                    })
+                    expected.append(len(unibet))
+                unibet.append(row)
+    return pd.DataFrame(unibet), pd.DataFrame(opta), expected
+
+def run(opta_df, unibet_df, reference, kickoffs):
+    """Seconds to index the dump and match every fixture, and the matched Unibet rows"""
+    start = time.perf_counter()
+    team_index = build_team_index(unibet_df, reference=reference)
+    positions = []
+    for kickoff, (_, opta_row) in zip(kickoffs, opta_df.iterrows()):
+        result = match_fixture(opta_row, team_index, verbose=False, kickoff=kickoff)
+        positions.append(result[2] if result else None)
+    return time.perf_counter() - start, positions, team_index
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the kickoff-aware join')
+    parser.add_argument('--competitions', type=int, nargs='+', default=[5, 20], help='Numbers of competitions in the dump')
+    parser.add_argument('--teams', type=int, default=18, help='Teams per competition')
+    parser.add_argument('--weeks', type=int, default=40, help='Weeks of games in the dump')
+    parser.add_argument('--opta_weeks', type=int, default=2, help='Weeks at the end of the dump with Opta predictions')
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'fixtures':>9} {'parse':>8} {'candidates':>18} {'match time':>20} {'correct kickoff':>20}")
+    print(f"{'':>8} {'':>9} {'':>8} {'kickoff':>9}{'comp':>9} {'kickoff':>10}{'comp':>10} {'kickoff':>10}{'comp':>10}")
+    for competitions in args.competitions:
+        unibet_df, opta_df, expected = make_dump(competitions, args.teams, args.weeks, args.opta_weeks)
+        reference = START + pd.Timedelta(days=7 * args.weeks // 2)
+
+        start = time.perf_counter()
+        kickoffs = parse_kickoffs(opta_df['date_time'], reference)
+        parse = time.perf_counter() - start
+
+        flat_time, flat, _ = run(opta_df, unibet_df, reference, [pd.NaT] * len(opta_df))
+        joined_time, joined, team_index = run(opta_df, unibet_df, reference, kickoffs)
+        fixture_rows = np.mean([len(lookup_fixture_rows(team_index, competition, kickoff))
+                                for competition, kickoff in zip(opta_df['competition'], kickoffs)])
+        competition_rows = np.mean([len(lookup_competition_rows(team_index, competition)) for competition in opta_df['competition']])
+        print(f"{len(unibet_df):>8,} {len(opta_df):>9,} {parse * 1e3:>6.1f}ms "
+              f"{fixture_rows:>9.1f}{competition_rows:>9.1f} {joined_time:>9.2f}s{flat_time:>9.2f}s "
+              f"{np.mean(np.array(joined) == expected):>10.0%}{np.mean(np.array(flat) == expected):>10.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark vectorized margin removal against per-row Python loops
+
+Generates synthetic 1X2 odds, removes the margin with each method in
+margins.MARGIN_METHODS in one array pass, and compares time and results with
+a scalar implementation that solves every row on its own.
+
+Usage:
+    python benchmarks/bench_margins.py
+    python benchmarks/bench_margins.py --sizes 1000 100000 1000000 --loop_max_rows 100000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_analysis import make_matched_frame
+import margins
+
+def row_proportional(inverse):
+    total = sum(inverse)
+    return [q / total for q in inverse]
+
+def row_power(inverse):
+    k = 1.0
+    for _ in range(margins.MAX_ITERATIONS):
+        value = sum(q ** k for q in inverse) - 1
+        slope = sum(q ** k * math.log(q) for q in inverse)
+        step = value / slope
+        k -= step
+        if abs(step) <= margins.TOLERANCE:
+            break
+    return row_proportional([q ** k for q in inverse])
+
+def row_shin(inverse):
+    """Shin by plain bisection on z, independent of the vectorized Newton solver"""
+    booksum = sum(inverse)
+    scaled = [q * q / booksum for q in inverse]
+
+    def fair(z):
+        return [(math.sqrt(z * z + 4 * (1 - z) * c) - z) / (2 * (1 - z)) for c in scaled]
+
+    low, high = 0.0, 1.0
+    if booksum > 1:
+        for _ in range(60):
+            middle = (low + high) / 2
+            if sum(fair(middle)) > 1:
+                low = middle
+            else:
+                high = middle
+    return row_proportional(fair(low))
+
+ROW_METHODS = {'proportional': row_proportional, 'shin': row_shin, 'power': row_power}
+
+def make_odds(rows):
+    df = make_matched_frame(rows)
+    return df[['unibet_home_odds', 'unibet_draw_odds', 'unibet_away_odds']].to_numpy()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark margin removal methods')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000], help='Numbers of 1X2 rows')
+    parser.add_argument('--loop_max_rows', type=int, default=100_000, help='Skip the per-row loops above this many rows')
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'method':<13} {'vectorized':>11} {'loop':>10} {'speedup':>8} {'max diff':>10}")
+    for size in args.sizes:
+        odds = make_odds(size)
+        for method in margins.MARGIN_METHODS:
+            start = time.perf_counter()
+            fair, _ = margins.fair_probabilities(odds, method)
+            vectorized = time.perf_counter() - start
+
+            if size > args.loop_max_rows:
+                print(f"{size:>9} {method:<13} {vectorized * 1000:>9.1f}ms {'-':>10} {'-':>8} {'-':>10}")
+                continue
+            start = time.perf_counter()
+            looped = np.array([ROW_METHODS[method]([1 / o for o in row]) for row in odds.tolist()])
+            loop = time.perf_counter() - start
+            max_diff = float(np.abs(looped - fair).max())
+            print(f"{size:>9} {method:<13} {vectorized * 1000:>9.1f}ms {loop * 1000:>8.1f}ms {loop / vectorized:>7.1f}x {max_diff:>10.1e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark the cost of the run metrics
+
+Times each kind of metrics call in a tight loop, against the same loop
+without instrumentation: the timer context manager, a timed decorator, a
+counter and a gauge. Calls come from several threads at once, and the check
+at the end makes sure no update was lost.
+
+It then runs `main.py --skip_scrapers --no_csv` on the sample CSVs in a
+subprocess and reads its metrics report. The number of timer, counter and
+gauge calls behind that report, times their per-call cost, estimates how much
+of the run went to instrumentation.
+
+Usage:
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --calls 1000000 --threads 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import Metrics
+
+def per_call(func, calls):
+    """Seconds per call of func, looped in this thread"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+def overhead_report(calls):
+    metrics = Metrics()
+
+    def bare():
+        pass
+
+    def timed_block():
+        with metrics.timer('bench.block'):
+            pass
+
+    decorated = metrics.timed('bench.decorated')(bare)
+    baseline = per_call(bare, calls)
+    print(f"{'call':<28} {'per call':>10} {'overhead':>10}")
+    print(f"{'bare function':<28} {baseline * 1e9:>8.0f}ns {'':>10}")
+    for label, func in [
+        ('with metrics.timer(...)', timed_block),
+        ('@metrics.timed(...)', decorated),
+        ('metrics.count(...)', lambda: metrics.count('bench.count')),
+        ('metrics.gauge(...)', lambda: metrics.gauge('bench.gauge', 1)),
+    ]:
+        cost = per_call(func, calls)
+        print(f"{label:<28} {cost * 1e9:>8.0f}ns {(cost - baseline) * 1e9:>8.0f}ns")
+    return per_call(timed_block, calls) - baseline, per_call(lambda: metrics.count('bench.count'), calls) - baseline
+
+def thread_check(calls, threads):
+    """Count and time from several threads at once and check the totals"""
+    metrics = Metrics()
+
+    def work():
+        for _ in range(calls):
+            with metrics.timer('bench.threads'):
+                metrics.count('bench.threads')
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    expected = calls * threads
+    report = metrics.report()
+    ok = report['counters']['bench.threads'] == expected and report['timers']['bench.threads']['count'] == expected
+    print(f"\n{threads} threads x {calls:,} timed counts: {elapsed / expected * 1e9:.0f}ns per update, totals correct: {ok}")
+
+def run_report(timer_cost, count_cost):
+    """Instrumentation share of a sample run of main.py"""
+    with tempfile.TemporaryDirectory() as directory:
+        metrics_file = os.path.join(directory, 'run_metrics.json')
+        subprocess.run([sys.executable, 'main.py', '--skip_scrapers', '--no_csv', '--metrics_file', metrics_file],
+                       cwd=ROOT, capture_output=True, text=True, check=True)
+        with open(metrics_file, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    timer_calls = sum(timer['count'] for timer in report['timers'].values())
+    other_calls = len(report['counters']) + len(report['gauges'])
+    total = report['timers']['run.total']['seconds']
+    spent = timer_calls * timer_cost + other_calls * count_cost
+    print(f"\nSample run: {total * 1e3:.1f}ms, {timer_calls} timed blocks, {other_calls} counters and gauges, "
+          f"~{spent * 1e6:.1f}us instrumentation ({spent / total:.4%} of the run)")
+    print("\nSlowest timers of the run:")
+    for name, timer in sorted(report['timers'].items(), key=lambda item: -item[1]['seconds'])[:8]:
+        print(f"   {name:<20} {timer['seconds'] * 1e3:>8.2f}ms  x{timer['count']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cost of the run metrics')
+    parser.add_argument('--calls', type=int, default=200_000, help='Calls per timing')
+    parser.add_argument('--threads', type=int, default=4, help='Threads for the concurrent update check')
+    args = parser.parse_args()
+
+    timer_cost, count_cost = overhead_report(args.calls)
+    thread_check(args.calls // args.threads, args.threads)
+    run_report(timer_cost, count_cost)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Micro-benchmark the compiled normalize_team_name against the previous replace loop
+
+Runs both implementations over every name in TEAM_MAP (keys and values) and the
+team columns of the sample CSVs, reports any names on which they disagree, and
+times repeated passes over the corpus.
+
+Usage:
+    python benchmarks/bench_normalize.py
+    python benchmarks/bench_normalize.py --repeat 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from match_data import normalize_team_name
+from team_mappings import TEAM_MAP
+
+def legacy_normalize_team_name(name):
+    """The str.replace loop normalize_team_name replaced"""
+    normalized = name.lower()
+    replacements = {
+        'fc ': '', ' fc': '',
+        'asc ': '', ' asc': '',
+        'ac ': '', ' ac': '',
+        'as ': '', ' as': '',
+        'ss ': '', ' ss': '',
+        'cf ': '', ' cf': '',
+        'united': 'utd',
+        'real ': '',
+        'racing ': '',
+        'olympic ': '',
+        'olympique ': '',
+        'athletic ': '',
+        'atletico ': '',
+        'rc ': '',
+        'afc ': '',
+        'rcd ': '',
+        'sd ': '',
+        'ud ': '',
+        'cd ': '',
+        'stade ': '',
+        'saint': 'st',
+        'sporting ': '',
+        'deportivo ': '',
+        'rovers': '',
+        'albion': '',
+        'city': '',
+        'town': '',
+        ' & ': '',
+        ' and ': '',
+    }
+    replacements.update({
+        'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
+        'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+        'í': 'i', 'ì': 'i', 'î': 'i', 'ï': 'i',
+        'ó': 'o', 'ò': 'o', 'õ': 'o', 'ô': 'o',
+        'ú': 'u', 'ù': 'u', 'û': 'u', 'ü': 'u',
+        'ý': 'y', 'ÿ': 'y',
+        'ñ': 'n',
+        'ß': 'ss',
+        'ø': 'o',
+        'æ': 'ae',
+        '-': ' ',
+        '.': '',
+    })
+    for old, new in replacements.items():
+        normalized = normalized.replace(old, new)
+    normalized = ' '.join(normalized.split())
+    return normalized.strip()
+
+def load_corpus():
+    """Collect the team names the matcher actually sees"""
+    names = set(TEAM_MAP) | set(TEAM_MAP.values())
+    for filename in ['opta_predictions.csv', 'unibet_predictions.csv', 'matched_predictions.csv']:
+        path = os.path.join(ROOT, filename)
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path)
+        for col in ['home_team', 'away_team']:
+            values = df[col].dropna().astype(str)
+            names.update(values)
+            # Unibet sometimes lists a game as a single "Home - Away" name
+            names.update(part for value in values for part in value.split(' - '))
+    return sorted(names)
+
+def time_passes(func, names, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name in names:
+            func(name)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark normalize_team_name')
+    parser.add_argument('--repeat', type=int, default=500, help='Passes over the name corpus')
+    args = parser.parse_args()
+
+    names = load_corpus()
+    mismatches = [
+        (name, legacy_normalize_team_name(name), normalize_team_name(name))
+        for name in names
+        if legacy_normalize_team_name(name) != normalize_team_name(name)
+    ]
+    print(f"Corpus: {len(names)} distinct names, {len(mismatches)} differ from the legacy function")
+    for name, old, new in mismatches:
+        print(f"  {name!r}: legacy={old!r} new={new!r}")
+
+    calls = len(names) * args.repeat
+    legacy_time = time_passes(legacy_normalize_team_name, names, args.repeat)
+
+    normalize_team_name.cache_clear()
+    uncached_time = time_passes(normalize_team_name.__wrapped__, names, args.repeat)
+    cached_time = time_passes(normalize_team_name, names, args.repeat)
+
+    print(f"\n{'implementation':<22} {'total (s)':>10} {'per call (us)':>14} {'speedup':>9}")
+    for label, elapsed in [
+        ('legacy replace loop', legacy_time),
+        ('compiled, no cache', uncached_time),
+        ('compiled + LRU cache', cached_time),
+    ]:
+        print(f"{label:<22} {elapsed:>10.3f} {elapsed / calls * 1e6:>14.2f} {legacy_time / elapsed:>8.1f}x")
+    print(f"\nCache: {normalize_team_name.cache_info()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Check and time alert delivery against a local aiosmtpd server
+
+Runs the NotificationDispatcher with an SmtpSink against a stand-in SMTP
+server (aiosmtpd.controller.Controller) on localhost and asserts that:
+
+- bet alerts for the same recipients that arrive within the window are
+  delivered as one message holding every bet, over one SMTP session;
+- when the server drops the session between batches, the sink reconnects
+  and the next batch is still delivered;
+- `main.py --email --smtp_host ... --smtp_security none` sends the run's
+  recommendations to the server.
+
+It then times delivering separate messages over the dispatcher's shared
+session against opening a new connection per message, as email_utils.send_email
+does.
+
+Needs aiosmtpd (pip install aiosmtpd).
+
+Usage:
+    python benchmarks/bench_notifications.py
+    python benchmarks/bench_notifications.py --messages 200
+"""
+import argparse
+import os
+import smtplib
+import socket
+import subprocess
+import sys
+import time
+from email import message_from_bytes, policy
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit("This check needs aiosmtpd: pip install aiosmtpd")
+
+from betting_utils import analyze_match_data
+from notifications import Alert, NotificationDispatcher, SmtpSink
+
+SENDER = 'bot@example.com'
+RECIPIENTS = ['punter@example.com']
+
+class Collector:
+    """aiosmtpd handler keeping every message it receives"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return '250 Message accepted for delivery'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(port):
+    collector = Collector()
+    controller = Controller(collector, hostname='127.0.0.1', port=port)
+    controller.start()
+    return controller, collector
+
+def sample_bets():
+    matched = pd.read_csv(os.path.join(ROOT, 'matched_predictions.csv'))
+    return analyze_match_data(matched, threshold=2.0)
+
+def check_batching_and_reconnect(port, bets):
+    controller, collector = start_server(port)
+    sink = SmtpSink(SENDER, host='127.0.0.1', port=port, use_ssl=False)
+    dispatcher = NotificationDispatcher([sink], window=1.0)
+    try:
+        for bet in bets:
+            dispatcher.submit(Alert(f"Bet: {bet['match']}", '<p>single bet</p>', RECIPIENTS, [bet]))
+        deadline = time.monotonic() + 10
+        while not collector.messages and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(collector.messages) == 1, f"expected 1 batched message, got {len(collector.messages)}"
+        message = message_from_bytes(collector.messages[0].content, policy=policy.default)
+        body = message.get_body(('html',)).get_content()
+        missing = [bet['match'] for bet in bets if bet['match'] not in body]
+        assert not missing, f"batched message is missing {missing}"
+        assert sink.connections == 1, f"expected 1 SMTP session, got {sink.connections}"
+        print(f"batching:     {len(bets)} alerts -> {len(collector.messages)} message, {sink.connections} session   OK")
+
+        # Restarting the server drops the sink's open session
+        controller.stop()
+        controller, collector = start_server(port)
+        dispatcher.submit(Alert('After restart', '<p>still delivered</p>', RECIPIENTS))
+    finally:
+        dispatcher.close()
+        controller.stop()
+    assert len(collector.messages) == 1, f"expected 1 message after the restart, got {len(collector.messages)}"
+    assert sink.connections == 2, f"expected a reconnect (2 sessions), got {sink.connections}"
+    assert dispatcher.failures == 0, f"{dispatcher.failures} deliveries failed"
+    print(f"reconnect:    server restarted, message delivered, {sink.connections} sessions in total   OK")
+
+def check_main(port):
+    controller, collector = start_server(port)
+    env = {key: value for key, value in os.environ.items() if key not in ('GMAIL_USER', 'GMAIL_APP_PASSWORD')}
+    try:
+        result = subprocess.run(
+            [sys.executable, 'main.py', '--skip_scrapers', '--no_csv', '--metrics_file', '', '--email',
+             '--to_email', RECIPIENTS[0], '--smtp_host', '127.0.0.1', '--smtp_port', str(port),
+             '--smtp_security', 'none', '--notify_window', '0'],
+            cwd=ROOT, capture_output=True, text=True, env=env,
+        )
+    finally:
+        controller.stop()
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+    assert len(collector.messages) == 1, f"expected 1 message from main.py, got {len(collector.messages)}"
+    assert collector.messages[0].rcpt_tos == RECIPIENTS
+    print("main.py:      --email with --smtp_host/--smtp_port/--smtp_security delivered 1 message   OK")
+
+def time_delivery(port, messages):
+    controller, collector = start_server(port)
+    try:
+        start = time.perf_counter()
+        sink = SmtpSink(SENDER, host='127.0.0.1', port=port, use_ssl=False)
+        dispatcher = NotificationDispatcher([sink], window=0)
+        for i in range(messages):
+            # Alerts without bets are never merged, so each is its own message
+            dispatcher.submit(Alert(f'Alert {i}', '<p>alert</p>', RECIPIENTS))
+        dispatcher.close()
+        shared = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(messages):
+            msg = MIMEMultipart()
+            msg['Subject'] = f'Alert {i}'
+            msg['From'] = SENDER
+            msg['To'] = RECIPIENTS[0]
+            msg.attach(MIMEText('<p>alert</p>', 'html'))
+            with smtplib.SMTP('127.0.0.1', port) as server:
+                server.sendmail(SENDER, RECIPIENTS, msg.as_string())
+        per_message = time.perf_counter() - start
+    finally:
+        controller.stop()
+    assert len(collector.messages) == 2 * messages
+    print(f"\n{messages} messages: shared session {shared:.2f}s ({sink.connections} session), "
+          f"new connection per message {per_message:.2f}s ({per_message / shared:.1f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and time alert delivery against a local aiosmtpd server')
+    parser.add_argument('--messages', type=int, default=50, help='Messages for the delivery timing')
+    args = parser.parse_args()
+
+    bets = sample_bets()
+    check_batching_and_reconnect(free_port(), bets)
+    check_main(free_port())
+    time_delivery(free_port(), args.messages)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark multi-bookmaker odds fetching and best-price aggregation
+
+Stub bookmakers parse the saved valuebase pages (unibet_html.txt and
+unibet_html_2.html) after a fixed delay that stands in for network latency.
+They are fetched one after another and then concurrently with
+odds_sources.fetch_all.
+
+The benchmark also times best-price aggregation. Synthetic odds with the same
+games at several books are aggregated by odds_sources.best_prices (one
+groupby) and by a per-fixture Python loop, and the results are compared.
+
+Usage:
+    python benchmarks/bench_odds_sources.py
+    python benchmarks/bench_odds_sources.py --books 2 4 8 --delay 0.5 --sizes 1000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from team_names import normalize_team_name
+import odds_sources
+
+PAGES = ['unibet_html.txt', 'unibet_html_2.html']
+
+def stub_sources(books, delay):
+    return [
+        odds_sources.HtmlFileSource(f'book_{i}', os.path.join(ROOT, PAGES[i % len(PAGES)]), delay=delay)
+        for i in range(books)
+    ]
+
+def make_odds(games, books, seed=0):
+    """Every game quoted by every book, with missing odds now and then
+
+    Each pairing is played on two dates (e.g. a league game and a cup tie),
+    which must stay separate fixtures.
+    """
+    rng = np.random.default_rng(seed)
+    rows = games * books
+    game = np.tile(np.arange(games), books)
+    odds = pd.DataFrame({
+        'competition': np.array(['Eng', 'Spa', 'Ita', 'Dui', 'Fra', 'Ned', 'Bel'])[game % 7],
+        'date_time': np.where(game % 2 == 0, '08 Mar 15:00', '15 Mar 20:00'),
+        'home_team': [f'Team {i // 2} Home' for i in game],
+        'away_team': [f'Team {i // 2} Away' for i in game],
+        'home_odds': np.round(rng.uniform(1.2, 8, rows), 2),
+        'draw_odds': np.round(rng.uniform(2.8, 5, rows), 2),
+        'away_odds': np.round(rng.uniform(1.2, 12, rows), 2),
+        'bookmaker': np.repeat([f'book_{i}' for i in range(books)], games),
+    })
+    odds.loc[rng.random(rows) < 0.02, 'draw_odds'] = np.nan
+    return odds
+
+def loop_best_prices(odds):
+    """Best price per fixture and outcome with plain Python loops"""
+    best = {}
+    for record in odds.to_dict('records'):
+        kickoff_date = record['date_time'].rsplit(' ', 1)[0]
+        key = (record['competition'], kickoff_date, normalize_team_name(record['home_team']), normalize_team_name(record['away_team']))
+        row = best.setdefault(key, {'n_books': set()})
+        row['n_books'].add(record['bookmaker'])
+        for column in odds_sources.OUTCOME_ODDS:
+            price = record[column]
+            if price == price and (column not in row or price > row[column]):
+                row[column] = price
+                row[column.replace('_odds', '_book')] = record['bookmaker']
+    return best
+
+def time_fetch(sources, concurrent):
+    start = time.perf_counter()
+    if concurrent:
+        records = odds_sources.fetch_all(sources)
+    else:
+        records = pd.concat([source.records() for source in sources], ignore_index=True)
+    return time.perf_counter() - start, len(records)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark odds fetching and best-price aggregation')
+    parser.add_argument('--books', type=int, nargs='+', default=[2, 4, 8], help='Numbers of stub bookmakers to fetch')
+    parser.add_argument('--delay', type=float, default=0.3, help='Simulated latency per fetch in seconds')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000], help='Games per aggregation run')
+    parser.add_argument('--agg_books', type=int, default=4, help='Bookmakers quoting each game in the aggregation runs')
+    args = parser.parse_args()
+
+    print(f"{'books':>6} {'sequential':>11} {'concurrent':>11} {'speedup':>8} {'rows':>6}")
+    for books in args.books:
+        sources = stub_sources(books, args.delay)
+        sequential, rows = time_fetch(sources, concurrent=False)
+        concurrent, _ = time_fetch(sources, concurrent=True)
+        print(f"{books:>6} {sequential:>10.2f}s {concurrent:>10.2f}s {sequential / concurrent:>7.1f}x {rows:>6}")
+
+    # best_prices imports the kickoff parser on first use; keep that out of the timings
+    odds_sources.best_prices(make_odds(10, 2))
+    print(f"\n{'games':>8} {'books':>6} {'groupby':>10} {'loop':>10} {'speedup':>8}  same")
+    for size in args.sizes:
+        odds = make_odds(size, args.agg_books)
+        start = time.perf_counter()
+        best = odds_sources.best_prices(odds)
+        vectorized = time.perf_counter() - start
+        start = time.perf_counter()
+        looped = loop_best_prices(odds)
+        loop = time.perf_counter() - start
+        expected = pd.DataFrame([
+            {'home_odds': row['home_odds'], 'draw_odds': row.get('draw_odds', np.nan), 'away_odds': row['away_odds'],
+             'home_book': row['home_book'], 'away_book': row['away_book'], 'n_books': len(row['n_books'])}
+            for row in looped.values()
+        ])
+        columns = ['home_odds', 'draw_odds', 'away_odds', 'home_book', 'away_book', 'n_books']
+        same = best[columns].reset_index(drop=True).equals(expected[columns].astype(best[columns].dtypes.to_dict()))
+        print(f"{size:>8,} {args.agg_books:>6} {vectorized * 1000:>8.1f}ms {loop * 1000:>8.1f}ms {loop / vectorized:>7.1f}x  {same}")
+
+if __name__ == "__main__":
+    main()
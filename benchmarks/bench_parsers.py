@@ -0,0 +1,55 @@
+"""Benchmark the Unibet match-card parser backends on the checked-in HTML fixtures
+
+Parses each fixture N times with every installed backend and checks that all
+backends produce exactly the rows BeautifulSoup produces.
+
+Usage:
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --repeat 100 --fixtures unibet_html_2.html
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from unibet_parsers import PARSER_BACKENDS, available_backends
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Unibet parser backends')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--fixtures', nargs='+', default=['unibet_html.txt', 'unibet_html_2.html'])
+    args = parser.parse_args()
+
+    backends = available_backends()
+    missing = [name for name in PARSER_BACKENDS if name not in backends]
+    if missing:
+        print(f"Not installed (skipped): {', '.join(missing)}")
+
+    all_identical = True
+    for fixture in args.fixtures:
+        with open(os.path.join(ROOT, fixture), encoding='utf-8') as f:
+            page_source = f.read()
+        reference = PARSER_BACKENDS['bs4'](page_source)
+
+        print(f"\n{fixture} ({len(page_source) / 1024:.0f} KB, {len(reference or [])} cards, {args.repeat} parses)")
+        print(f"{'backend':<12} {'per parse (ms)':>15} {'speedup':>9}  identical")
+        timings = {}
+        for name in reversed(backends):  # bs4 first so the speedup baseline exists
+            extract = PARSER_BACKENDS[name]
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                rows = extract(page_source)
+            timings[name] = (time.perf_counter() - start) / args.repeat
+            identical = rows == reference
+            all_identical = all_identical and identical
+            print(f"{name:<12} {timings[name] * 1000:>15.2f} {timings['bs4'] / timings[name]:>8.1f}x  {identical}")
+
+    print(f"\nAll backends produce identical rows: {all_identical}")
+    if not all_identical:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark rendering.render_bets_html against the previous += builder
+
+Renders 10, 1k and 10k synthetic bets with the legacy format_bets_as_html and
+with rendering.render_bets_html (plus the text and JSON outputs), checks that
+both HTML outputs are identical, and reports the time per render. The two
+HTML renderers run at the same speed (0.9-1.0x): formatting the floats
+dominates, so the shared renderer is kept for its streaming and reuse, not
+for speed.
+
+Usage:
+    python benchmarks/bench_rendering.py
+    python benchmarks/bench_rendering.py --sizes 10 1000 10000 100000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_analysis import make_matched_frame
+from betting_utils import analyze_match_data
+import rendering
+
+def legacy_format_bets_as_html(bets):
+    """The string-concatenation implementation format_bets_as_html replaced"""
+    html = """
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; }
+            .header { background-color: #4CAF50; color: white; padding: 10px; text-align: center; }
+            .bet { margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; border-radius: 5px; }
+            .excellent { background-color: #CCFFCC; }
+            .very-good { background-color: #E6FFE6; }
+            .good { background-color: #F0FFF0; }
+            .speculative { background-color: #FFFAF0; }
+            .low-confidence { background-color: #FFF0F0; }
+            .bet-header { font-weight: bold; font-size: 18px; }
+            .details { margin-left: 15px; }
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>Opta Betting Recommendations</h1>
+            <p>Generated on: """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
+        </div>
+    """
+
+    for i, bet in enumerate(bets, 1):
+        if bet['confidence_score'] >= 80:
+            rating = "⭐⭐⭐⭐⭐ EXCELLENT"
+            css_class = "excellent"
+        elif bet['confidence_score'] >= 60:
+            rating = "⭐⭐⭐⭐ VERY GOOD"
+            css_class = "very-good"
+        elif bet['confidence_score'] >= 40:
+            rating = "⭐⭐⭐ GOOD"
+            css_class = "good"
+        elif bet['confidence_score'] >= 20:
+            rating = "⭐⭐ SPECULATIVE"
+            css_class = "speculative"
+        else:
+            rating = "⭐ LOW CONFIDENCE"
+            css_class = "low-confidence"
+
+        html += f"""
+        <div class="bet {css_class}">
+            <div class="bet-header">{i}. Bet on {bet['bet_type']} in {bet['match']}</div>
+            <div class="details">
+                <p>Odds: {bet['odds']:.2f}</p>
+                <p>Implied probability: {bet['implied_prob']:.2f}%</p>
+                <p>Opta probability: {bet['opta_prob']:.2f}%</p>
+                <p>Edge: +{bet['difference']:.2f}%</p>
+                <p>Expected profit per €1 bet: €{bet['expected_return']:.2f}</p>
+                <p>Confidence Score: {bet['confidence_score']}/100 - {rating}</p>
+            </div>
+        </div>
+        """
+
+    html += """
+    </body>
+    </html>
+    """
+    return html
+
+def make_bets(count):
+    """Analyse synthetic matches until there are at least `count` bets"""
+    rows = max(count, 10)
+    while True:
+        bets = analyze_match_data(make_matched_frame(rows), threshold=0.0)
+        if len(bets) >= count:
+            return bets[:count]
+        rows *= 2
+
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML/text/JSON bet rendering')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000], help='Numbers of bets to render')
+    parser.add_argument('--repeat', type=int, default=9, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    generated = datetime(2025, 3, 8, 12, 0, 0)
+    print(f"{'bets':>8} {'legacy html':>12} {'rendering html':>14} {'speedup':>8} {'text':>10} {'json':>10}  identical")
+    for size in args.sizes:
+        bets = make_bets(size)
+
+        # Pin the legacy timestamp so both HTML outputs can be compared
+        with mock.patch(f'{__name__}.datetime') as fake_datetime:
+            fake_datetime.now.return_value = generated
+            legacy_html = legacy_format_bets_as_html(bets)
+        identical = legacy_html == rendering.render_bets_html(bets, generated)
+
+        legacy = best_time(lambda: legacy_format_bets_as_html(bets), args.repeat)
+        html = best_time(lambda: rendering.render_bets_html(bets), args.repeat)
+        text = best_time(lambda: rendering.render_bets_text(bets), args.repeat)
+        json_time = best_time(lambda: rendering.render_bets_json(bets), args.repeat)
+        print(f"{size:>8} {legacy * 1000:>10.2f}ms {html * 1000:>12.2f}ms {legacy / html:>7.1f}x "
+              f"{text * 1000:>8.2f}ms {json_time * 1000:>8.2f}ms  {identical}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark the vectorized slate Kelly solver against the per-match loop
+
+Builds synthetic slates of 10 to 5000 bets, computes the stakes with both
+paths of staking.kelly_stakes (the per-match Python loop and the NumPy
+solver), checks that they agree, and reports the time per slate. The loop
+wins on small slates (about 5x at 10 bets) because the NumPy setup is a
+fixed cost; the crossover near 100 bets sets staking.VECTORIZE_MIN_BETS,
+and the "auto" column is kelly_stakes with that cutoff.
+
+Usage:
+    python benchmarks/bench_staking.py
+    python benchmarks/bench_staking.py --sizes 10 100 1000 5000 20000 --repeat 3
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_rendering import best_time, make_bets
+import staking
+
+def stakes_with_cutoff(bets, cutoff, kelly_fraction, max_exposure):
+    """staking.kelly_stakes with VECTORIZE_MIN_BETS set to cutoff"""
+    saved = staking.VECTORIZE_MIN_BETS
+    staking.VECTORIZE_MIN_BETS = cutoff
+    try:
+        return staking.kelly_stakes(bets, kelly_fraction, max_exposure)
+    finally:
+        staking.VECTORIZE_MIN_BETS = saved
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark slate Kelly staking')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 30, 100, 300, 1000, 5000], help='Numbers of bets per slate')
+    parser.add_argument('--repeat', type=int, default=9, help='Runs per measurement (best is reported)')
+    parser.add_argument('--kelly_fraction', type=float, default=staking.DEFAULT_KELLY_FRACTION, help='Kelly multiplier')
+    parser.add_argument('--max_exposure', type=float, default=staking.DEFAULT_MAX_EXPOSURE, help='Bankroll cap for the slate')
+    args = parser.parse_args()
+
+    print(f"{'bets':>8} {'matches':>8} {'loop':>10} {'vectorized':>11} {'speedup':>8} {'auto':>10} {'max diff':>10} {'exposure':>9}")
+    for size in args.sizes:
+        bets = make_bets(size)
+        matches = len({bet['match'] for bet in bets})
+        options = (args.kelly_fraction, args.max_exposure)
+        _, reference = stakes_with_cutoff(bets, float('inf'), *options)
+        _, stakes = stakes_with_cutoff(bets, 0, *options)
+        max_diff = float(np.abs(reference - stakes).max())
+
+        loop = best_time(lambda: stakes_with_cutoff(bets, float('inf'), *options), args.repeat)
+        vectorized = best_time(lambda: stakes_with_cutoff(bets, 0, *options), args.repeat)
+        auto = best_time(lambda: staking.kelly_stakes(bets, *options), args.repeat)
+        print(f"{size:>8} {matches:>8} {loop * 1000:>8.2f}ms {vectorized * 1000:>9.2f}ms {loop / vectorized:>7.1f}x "
+              f"{auto * 1000:>8.2f}ms {max_diff:>10.1e} {stakes.sum():>8.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure cold-start latency of `python main.py --skip_scrapers` with -X importtime
+
+Runs main.py in a fresh interpreter several times against copies of the sample
+CSVs in a temporary directory (so the repository files are not touched),
+reports the wall-clock time of each run, the total import time, the slowest
+top-level imports, and whether modules that analysis-only runs should not load
+(selenium, undetected_chromedriver, smtplib, email.mime) were imported.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --top 15
+    python benchmarks/bench_startup.py --args "--skip_scrapers --incremental"
+"""
+import argparse
+import os
+import re
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Modules an analysis-only run has no use for
+UNWANTED_MODULES = ['selenium', 'undetected_chromedriver', 'smtplib', 'email.mime']
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def parse_importtime(stderr):
+    """Return (module, self_us, cumulative_us, depth) for every -X importtime line"""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+def run_once(workdir, main_args):
+    """Run main.py once with -X importtime and return (wall seconds, import entries)"""
+    command = [sys.executable, '-X', 'importtime', os.path.join(ROOT, 'main.py')] + main_args
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=workdir, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stdout[-2000:])
+        raise RuntimeError(f"main.py exited with {result.returncode}")
+    return elapsed, parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark main.py cold start')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreter runs')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest top-level imports to list')
+    parser.add_argument('--args', type=str, default='--skip_scrapers --no_csv', help='Arguments passed to main.py')
+    args = parser.parse_args()
+    main_args = shlex.split(args.args)
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        for filename in ('opta_predictions.csv', 'unibet_predictions.csv'):
+            shutil.copy(os.path.join(ROOT, filename), workdir)
+
+        walls, import_totals, last_entries = [], [], []
+        for _ in range(args.repeat):
+            elapsed, entries = run_once(workdir, main_args)
+            walls.append(elapsed)
+            import_totals.append(sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1e6)
+            last_entries = entries
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"python main.py {args.args}  ({args.repeat} runs)")
+    print(f"   wall-clock:  median {statistics.median(walls):.3f}s  min {min(walls):.3f}s  max {max(walls):.3f}s")
+    print(f"   import time: median {statistics.median(import_totals):.3f}s")
+
+    top_level = sorted((e for e in last_entries if e[3] == 0), key=lambda e: e[2], reverse=True)
+    print("\nSlowest top-level imports (last run):")
+    for module, _, cumulative, _ in top_level[:args.top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {module}")
+
+    loaded = {module for module, _, _, _ in last_entries}
+    print("\nModules that analysis-only runs should not load:")
+    for module in UNWANTED_MODULES:
+        hit = any(name == module or name.startswith(module + '.') for name in loaded)
+        print(f"   {module:<26} {'LOADED' if hit else 'not loaded'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark peak memory of streaming vs whole-file matching on large odds dumps
+
+Writes synthetic Unibet exports (the saved games plus filler games from a
+pool of team names) to a temporary directory. Each export is then matched
+and analysed twice, each time in a fresh subprocess:
+
+- loaded whole, the way find_matching_games is used;
+- chunk by chunk with streaming.run_stream.
+
+The benchmark reports each child's peak RSS and wall time. It also checks
+that both produce the same matched games.
+
+Usage:
+    python benchmarks/bench_streaming.py
+    python benchmarks/bench_streaming.py --sizes 100000 1000000 4000000 --chunk_rows 20000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Distinct filler team names; a long history repeats the same teams
+FILLER_TEAMS = 5000
+
+def write_dump(path, rows, seed=0, block=100_000):
+    """Write a synthetic Unibet export of `rows` rows, block by block"""
+    rng = np.random.default_rng(seed)
+    games = pd.read_csv(os.path.join(ROOT, 'unibet_predictions.csv'))
+    written = 0
+    while written < rows:
+        size = min(block, rows - written)
+        teams = rng.integers(0, FILLER_TEAMS, size=(size, 2))
+        frame = pd.DataFrame({
+            'competition': rng.choice(['Eng', 'Spa', 'Ita', 'Dui', 'Fra', 'Ned', 'Bel'], size=size),
+            'date_time': '08 Mar 15:00',
+            'home_team': [f'Filler {i} Home' for i in teams[:, 0]],
+            'away_team': [f'Filler {i} Away' for i in teams[:, 1]],
+            'home_odds': np.round(rng.uniform(1.2, 8, size), 2),
+            'draw_odds': np.round(rng.uniform(2.8, 5, size), 2),
+            'away_odds': np.round(rng.uniform(1.2, 12, size), 2),
+        })
+        if written == 0:
+            # The real games come last in the first block, so they fall inside the dump
+            frame = pd.concat([frame.iloc[:size - len(games)], games], ignore_index=True)
+        frame.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += size
+
+def run_child(mode, path, chunk_rows):
+    """Match and analyse the dump in this process; print peak RSS and results as JSON"""
+    from betting_utils import analyze_match_data
+
+    opta_df = pd.read_csv(os.path.join(ROOT, 'opta_predictions.csv'))
+    start = time.perf_counter()
+    if mode == 'full':
+        from match_data import find_matching_games
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            matched = find_matching_games(opta_df, pd.read_csv(path), state_file=None, output_file=None, aliases_file=None)
+        bets = analyze_match_data(matched)
+        games = sorted(zip(matched['home_team'], matched['away_team']))
+    else:
+        import streaming
+
+        games, bets = [], []
+        for matched, chunk_bets in streaming.stream_bets(path, opta_df, chunk_rows=chunk_rows, aliases_file=None):
+            games.extend(zip(matched['home_team'], matched['away_team']))
+            bets.extend(chunk_bets)
+        games.sort()
+    seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'peak_mb': peak_kb / 1024, 'seconds': seconds, 'games': games, 'bets': len(bets)}))
+
+def measure(mode, path, chunk_rows):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, '--path', path, '--chunk_rows', str(chunk_rows)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming vs whole-file matching memory')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 500_000, 2_000_000], help='Rows per synthetic export')
+    parser.add_argument('--chunk_rows', type=int, default=50_000, help='Rows per streamed chunk')
+    parser.add_argument('--child', choices=['full', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.path, args.chunk_rows)
+        return
+
+    print(f"{'rows':>10} {'file':>8} {'full peak':>10} {'stream peak':>12} {'full time':>10} {'stream time':>12}  same")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f'unibet_{size}.csv')
+            write_dump(path, size)
+            file_mb = os.path.getsize(path) / 1024 ** 2
+            full = measure('full', path, args.chunk_rows)
+            stream = measure('stream', path, args.chunk_rows)
+            same = full['games'] == stream['games'] and full['bets'] == stream['bets']
+            print(f"{size:>10,} {file_mb:>6.0f}MB {full['peak_mb']:>8.0f}MB {stream['peak_mb']:>10.0f}MB "
+                  f"{full['seconds']:>9.1f}s {stream['seconds']:>11.1f}s  {same}")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark loading the team alias table
+
+Compares getting the aliases into a fresh interpreter by importing the old
+TEAM_MAP dict literal (taken from git) with importing team_aliases and
+loading team_aliases.csv, either compiling it or reading the marshal cache.
+The modules are copied to a temp dir and timed with and without compiled
+.pyc files, each in new subprocesses so no run helps the next. The last row
+times only load_aliases, with team_aliases already imported.
+
+Lookup speed of the flat dict and the competition-scoped team_alias is timed
+in-process.
+
+Usage:
+    python benchmarks/bench_team_aliases.py
+    python benchmarks/bench_team_aliases.py --repeats 20 --lookups 1000000
+"""
+import argparse
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import team_aliases
+from team_aliases import ALIASES_FILE, read_alias_rows
+import team_mappings
+
+# The untimed warm-up import fills the path finder's directory cache, which
+# would otherwise dominate the first import from a directory
+TIMER = "{warm}; import time; start = time.perf_counter(); {setup}; print(time.perf_counter() - start)"
+
+def literal_revision():
+    """Last revision whose team_mappings.py held the TEAM_MAP literal"""
+    removed = subprocess.run(['git', 'log', '-1', '--format=%H', '-S', 'TEAM_MAP = {', '--', 'team_mappings.py'],
+                             cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    if not removed:
+        return 'HEAD'
+    source = subprocess.run(['git', 'show', f'{removed}:team_mappings.py'], cwd=ROOT, capture_output=True, text=True).stdout
+    return removed if 'TEAM_MAP = {' in source else f'{removed}~1'
+
+def prepare(directory, revision):
+    """Copy the old literal module (if found), team_aliases and the CSV into directory
+
+    Returns:
+        bool: Whether the TEAM_MAP literal was found at revision
+    """
+    source = subprocess.run(['git', 'show', f'{revision}:team_mappings.py'], cwd=ROOT, capture_output=True, text=True)
+    found = source.returncode == 0 and 'TEAM_MAP = {' in source.stdout
+    if found:
+        with open(os.path.join(directory, 'literal_team_map.py'), 'w', encoding='utf-8') as f:
+            f.write(source.stdout)
+    with open(os.path.join(directory, 'warm_up.py'), 'w', encoding='utf-8') as f:
+        f.write('')
+    shutil.copy(os.path.join(ROOT, 'team_aliases.py'), directory)
+    shutil.copy(ALIASES_FILE, directory)
+    return found
+
+def compile_modules(directory, compiled):
+    """Write (or remove) the .pyc files of the modules in directory"""
+    shutil.rmtree(os.path.join(directory, '__pycache__'), ignore_errors=True)
+    if compiled:
+        for name in os.listdir(directory):
+            if name.endswith('.py'):
+                py_compile.compile(os.path.join(directory, name))
+
+def time_in_subprocess(setup, directory, repeats, before=None, warm="import warm_up"):
+    """Median seconds of setup in fresh interpreters with directory first on sys.path"""
+    times = []
+    code = f"import sys; sys.path.insert(0, {directory!r}); " + TIMER.format(warm=warm, setup=setup)
+    for _ in range(repeats):
+        if before:
+            before()
+        result = subprocess.run([sys.executable, '-c', code], cwd=directory, capture_output=True, text=True, check=True)
+        times.append(float(result.stdout.split()[-1]))
+    return sorted(times)[len(times) // 2]
+
+def time_lookups(lookup, keys, count):
+    start = time.perf_counter()
+    for i in range(count):
+        lookup(keys[i % len(keys)])
+    return (time.perf_counter() - start) / count
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark loading the team alias table')
+    parser.add_argument('--repeats', type=int, default=10, help='Fresh interpreters per method')
+    parser.add_argument('--lookups', type=int, default=200_000, help='Lookups per lookup timing')
+    parser.add_argument('--revision', type=str, default=None, help='Git revision with the TEAM_MAP literal (default: the last one)')
+    args = parser.parse_args()
+    args.revision = args.revision or literal_revision()
+
+    rows = read_alias_rows()
+    print(f"{len(rows)} alias rows in {os.path.basename(ALIASES_FILE)}\n")
+    print(f"{'method':<36} {'.pyc':>9} {'source':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        # The subprocesses keep their alias cache in the temp dir
+        os.environ[team_aliases.CACHE_DIR_ENV] = directory
+        cache_file = team_aliases.default_cache_file(os.path.join(directory, os.path.basename(ALIASES_FILE)))
+        remove_cache = lambda: os.path.exists(cache_file) and os.remove(cache_file)
+        methods = [
+            ('import team_aliases, compile CSV', "import team_aliases; team_aliases.load_aliases()", remove_cache),
+            ('import team_aliases, marshal cache', "import team_aliases; team_aliases.load_aliases()", None),
+            ('marshal cache, module already loaded', "team_aliases.load_aliases()", None),
+        ]
+        if prepare(directory, args.revision):
+            methods.insert(0, ('import TEAM_MAP literal', "import literal_team_map", None))
+        else:
+            print(f"No TEAM_MAP literal at {args.revision}; skipping its import")
+        for label, setup, before in methods:
+            warm = "import warm_up" if setup.startswith('import') else "import team_aliases"
+            timings = []
+            for compiled in (True, False):
+                compile_modules(directory, compiled)
+                if before is None:
+                    time_in_subprocess(setup, directory, 1, warm=warm)
+                timings.append(time_in_subprocess(setup, directory, args.repeats, before, warm))
+            print(f"{label:<36} {timings[0] * 1e3:>7.2f}ms {timings[1] * 1e3:>7.2f}ms")
+
+    keys = [(competition, code) for _, competition, code, _ in rows]
+    flat = team_mappings.TEAM_MAP
+    print(f"\n{'lookup':<36} {'per call':>9}")
+    print(f"{'TEAM_MAP.get(code)':<36} {time_lookups(lambda key: flat.get(key[1]), keys, args.lookups) * 1e9:>7.0f}ns")
+    print(f"{'team_alias(competition, code)':<36} {time_lookups(lambda key: team_mappings.team_alias(*key), keys, args.lookups) * 1e9:>7.0f}ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Benchmark and accuracy report for the fuzzy team resolver
+
+Accuracy is measured on labels taken from the sample data:
+
+- Opta codes: every fixture in opta_predictions.csv that the matcher
+  matches gives two (code, Unibet name) pairs. Each code is resolved without
+  its TEAM_MAP name, against the Unibet names of its competition and against
+  all Unibet names.
+- Name variants: every Unibet name in the sample CSV and the saved HTML pages
+  is rewritten (lower case, no accents, a typo, a dropped word, a truncated
+  word) and resolved against all names.
+
+Each lookup counts as correct, wrong or abstained. The old
+"either name contains the other" rule is scored on the same variants.
+
+Speed is measured on synthetic pools of team names. Indexed lookups are
+timed against a linear scan that scores every name. The benchmark reports
+the share of names the index actually scored, and how often both find the
+same best score.
+
+Usage:
+    python benchmarks/bench_team_resolver.py
+    python benchmarks/bench_team_resolver.py --pools 1000 10000 100000 --queries 500
+"""
+import argparse
+import os
+import sys
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from match_data import build_team_index, match_fixture, normalize_team_name
+from team_resolver import TeamResolver
+from unibet_parsers import UNIBET_COLUMNS, get_parser_backend
+
+SYLLABLES = ['ar', 'ber', 'cas', 'do', 'el', 'for', 'gan', 'hel', 'in', 'jo', 'ka', 'lin', 'mar', 'no',
+             'or', 'pol', 'ros', 'san', 'tor', 'ul', 'ven', 'wes', 'zan', 'bri', 'ston', 'ham', 'wick', 'burg']
+SUFFIXES = ['', ' City', ' United', ' Town', ' Rovers', ' FC', ' Athletic', ' Wanderers']
+
+def sample_unibet_names():
+    """Unibet (competition, name) pairs from the sample CSV and the saved pages"""
+    frames = [pd.read_csv(os.path.join(ROOT, 'unibet_predictions.csv'))]
+    _, extract_cards = get_parser_backend('auto')
+    for page in ('unibet_html.txt', 'unibet_html_2.html'):
+        with open(os.path.join(ROOT, page), 'r', encoding='utf-8') as f:
+            frames.append(pd.DataFrame(extract_cards(f.read()), columns=UNIBET_COLUMNS))
+    unibet = pd.concat(frames, ignore_index=True)
+    pairs = pd.concat([unibet[['competition', 'home_team']].set_axis(['competition', 'name'], axis=1),
+                       unibet[['competition', 'away_team']].set_axis(['competition', 'name'], axis=1)])
+    return pairs.drop_duplicates().reset_index(drop=True)
+
+def code_labels():
+    """(competition, Opta code, Unibet name) for both teams of every matched sample fixture"""
+    opta = pd.read_csv(os.path.join(ROOT, 'opta_predictions.csv'))
+    unibet = pd.read_csv(os.path.join(ROOT, 'unibet_predictions.csv')).astype({'competition': str, 'home_team': str, 'away_team': str})
+    team_index = build_team_index(unibet)
+    labels = []
+    for _, opta_row in opta.iterrows():
+        result = match_fixture(opta_row, team_index, verbose=False)
+        if result:
+            game = unibet.iloc[result[2]]
+            labels.append((game['competition'], opta_row['home_team'], game['home_team']))
+            labels.append((game['competition'], opta_row['away_team'], game['away_team']))
+    return labels
+
+def strip_accents(name):
+    return ''.join(char for char in unicodedata.normalize('NFKD', name) if not unicodedata.combining(char))
+
+def variants(name, rng):
+    """Plausible other spellings of a team name"""
+    words = name.split()
+    out = {name.lower(), strip_accents(name)}
+    longest = max(range(len(words)), key=lambda i: len(words[i]))
+    if len(words) > 1:
+        shortest = min(range(len(words)), key=lambda i: len(words[i]))
+        out.add(' '.join(words[:shortest] + words[shortest + 1:]))
+    if len(words[longest]) > 5:
+        out.add(' '.join(words[:longest] + [words[longest][:-2]] + words[longest + 1:]))
+        position = int(rng.integers(1, len(words[longest]) - 1))
+        typo = words[longest][:position] + words[longest][position + 1] + words[longest][position] + words[longest][position + 2:]
+        out.add(' '.join(words[:longest] + [typo] + words[longest + 1:]))
+    out.discard(name)
+    return sorted(out)
+
+def substring_resolve(query, names):
+    """The old rule: a unique name that contains the query or is contained in it"""
+    normalized = normalize_team_name(query)
+    hits = [name for name in names if normalized and (normalized in normalize_team_name(name) or normalize_team_name(name) in normalized)]
+    return hits[0] if len(hits) == 1 else None
+
+def tally(results):
+    correct = sum(1 for expected, got in results if got == expected)
+    abstained = sum(1 for _, got in results if got is None)
+    return correct, len(results) - correct - abstained, abstained
+
+def print_tally(label, results):
+    correct, wrong, abstained = tally(results)
+    print(f"{label:<44} {len(results):>6} {correct:>8} {wrong:>6} {abstained:>10}   {correct / max(len(results), 1):>6.1%}")
+
+def accuracy_report(seed=0):
+    rng = np.random.default_rng(seed)
+    names = sample_unibet_names()
+    all_names = names['name'].unique().tolist()
+    everything = TeamResolver(all_names)
+    by_competition = {competition: TeamResolver(group['name']) for competition, group in names.groupby('competition')}
+
+    print(f"{'labels':<44} {'lookups':>6} {'correct':>8} {'wrong':>6} {'abstained':>10} {'accuracy':>8}")
+    labels = code_labels()
+    print_tally('Opta codes, competition names',
+                [(name, by_competition[competition].resolve(code)[0]) for competition, code, name in labels])
+    print_tally('Opta codes, all names',
+                [(name, everything.resolve(code)[0]) for _, code, name in labels])
+
+    variant_pairs = [(name, variant) for name in all_names for variant in variants(name, rng)]
+    print_tally('Name variants, resolver',
+                [(name, everything.resolve(variant)[0]) for name, variant in variant_pairs])
+    print_tally('Name variants, old substring rule',
+                [(name, substring_resolve(variant, all_names)) for name, variant in variant_pairs])
+
+def make_pool(size, rng):
+    stems = {''.join(rng.choice(SYLLABLES, size=int(rng.integers(2, 5)))).capitalize() for _ in range(size * 2)}
+    stems = sorted(stems)[:size]
+    return [stem + SUFFIXES[int(rng.integers(len(SUFFIXES)))] for stem in stems]
+
+def linear_best(resolver, query):
+    """Best score over every known name, without the candidate index"""
+    return max(resolver.score(query, position) for position in range(len(resolver.names)))
+
+def speed_report(pools, queries, seed=0):
+    rng = np.random.default_rng(seed)
+    print(f"\n{'names':>8} {'build':>8} {'indexed':>10} {'linear':>10} {'speedup':>8} {'scored':>8} {'agree':>6}")
+    for size in pools:
+        pool = make_pool(size, rng)
+        start = time.perf_counter()
+        resolver = TeamResolver(pool)
+        build = time.perf_counter() - start
+        picks = rng.choice(len(pool), size=min(queries, len(pool)), replace=False)
+        lookups = [(variants(pool[i], rng) or [pool[i]])[0] for i in picks]
+
+        start = time.perf_counter()
+        indexed = [(resolver.rank([query]) or [(0.0, None)])[0][0] for query in lookups]
+        indexed_time = (time.perf_counter() - start) / len(lookups)
+        scored = np.mean([len(resolver.candidates(query)) for query in lookups])
+
+        start = time.perf_counter()
+        linear = [linear_best(resolver, query) for query in lookups]
+        linear_time = (time.perf_counter() - start) / len(lookups)
+        agree = np.mean([a == b for a, b in zip(indexed, linear)])
+        print(f"{len(pool):>8,} {build:>7.2f}s {indexed_time * 1e3:>8.2f}ms {linear_time * 1e3:>8.2f}ms "
+              f"{linear_time / indexed_time:>7.1f}x {scored / len(pool):>7.1%} {agree:>6.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fuzzy team resolver')
+    parser.add_argument('--pools', type=int, nargs='+', default=[1_000, 10_000, 50_000], help='Synthetic team-name pool sizes')
+    parser.add_argument('--queries', type=int, default=100, help='Lookups per pool')
+    args = parser.parse_args()
+
+    accuracy_report()
+    speed_report(args.pools, args.queries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare the browserless HTTP fetch of the Unibet top picks with the Chrome path, offline
+
+Serves a saved copy of the page (unibet_html_2.html by default) from a local
+stub server, fetches it repeatedly over the pooled keep-alive session and
+checks that the parsed rows match parsing the file directly. With --chrome the
+same page is also loaded through a BrowserPool so the latency of both paths
+can be compared.
+
+Usage:
+    python benchmarks/bench_unibet_fetch.py
+    python benchmarks/bench_unibet_fetch.py --repeat 50 --chrome
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from unibet_scraper import fetch_unibet_html, parse_unibet_html
+
+def start_stub_server(html_path):
+    """Serve html_path for every GET on a local port; returns (server, base_url)"""
+    with open(html_path, 'rb') as f:
+        body = f.read()
+    compressed = gzip.compress(body)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep connections alive between requests
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+            payload = compressed if use_gzip else body
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            if use_gzip:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/bestbacked/toppicks?market=www.unibet.nl"
+
+def time_runs(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        # The scraper logs every card; keep that out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+    return timings, result
+
+def report(label, timings):
+    print(f"{label:<34} first {timings[0] * 1000:>8.1f} ms   "
+          f"median {statistics.median(timings) * 1000:>8.1f} ms   n={len(timings)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Unibet HTTP fetch path against a local stub server')
+    parser.add_argument('--html', default=os.path.join(ROOT, 'unibet_html_2.html'), help='Saved page to serve')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--chrome', action='store_true', help='Also time the Chrome path (needs Chrome installed)')
+    args = parser.parse_args()
+
+    with open(args.html, encoding='utf-8') as f, contextlib.redirect_stdout(io.StringIO()):
+        expected = parse_unibet_html(f.read())
+
+    server, url = start_stub_server(args.html)
+    try:
+        pooled, df = time_runs(lambda: parse_unibet_html(fetch_unibet_html(url)), args.repeat)
+        fresh, _ = time_runs(lambda: parse_unibet_html(requests.get(url, timeout=15).text), args.repeat)
+        fetch_only, _ = time_runs(lambda: fetch_unibet_html(url), args.repeat)
+
+        print()
+        report('HTTP fetch only (pooled)', fetch_only)
+        report('HTTP fetch + parse (pooled)', pooled)
+        report('HTTP fetch + parse (new connection)', fresh)
+        print(f"Rows identical to parsing the file directly: {df.equals(expected)} ({len(df)} matches)")
+
+        if args.chrome:
+            from browser_pool import BrowserPool
+            from unibet_scraper import scrape_unibet_odds
+
+            pool = BrowserPool()
+            try:
+                def chrome_run():
+                    with pool.lease() as driver:
+                        return scrape_unibet_odds(driver, url)
+                chrome, chrome_df = time_runs(chrome_run, min(args.repeat, 5))
+            finally:
+                pool.close()
+            report('Chrome (first run includes launch)', chrome)
+            print(f"Chrome rows identical: {chrome_df.equals(expected)}")
+            print(f"Median latency saved per fetch: {(statistics.median(chrome) - statistics.median(pooled)) * 1000:.1f} ms")
+            print(f"Pool stats: {pool.stats()}")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 import math
+import numpy as np
+
+from margins import DEFAULT_METHOD, OVERROUND_BAND, fair_probabilities, overround_ok
 
 def calculate_implied_probability(odds):
-    """Calculate the implied probability from betting odds"""
+    """Calculate the implied probability from betting odds (margin included; see margins.py)"""
     return 1 / odds
 
 def evaluate_bet_value(predicted_prob, implied_prob):
@@ -60,83 +63,192 @@ def calculate_confidence_score(prob, edge, expected_return):
     
     return round(score, 1)
 
-def analyze_match_data(df, threshold=2.0):
+# Default (probability, edge, expected return) weights of the confidence score
+CONFIDENCE_WEIGHTS = (0.3, 0.3, 0.4)
+
+def calculate_confidence_scores(prob, edge, expected_return, weights=None):
+    """Vectorized form of calculate_confidence_score for NumPy arrays
+
+    Applies the same weights and normalization as calculate_confidence_score
+    element-wise. Scores are returned unrounded so callers can round only the
+    rows they keep.
+
+    Args:
+        prob, edge, expected_return: Arrays in percent, percentage points and € per €1
+        weights: (probability, edge, expected return) weights (default: CONFIDENCE_WEIGHTS)
+    """
+    prob_decimal = prob / 100
+
+    prob_weight, edge_weight, return_weight = weights or CONFIDENCE_WEIGHTS
+
+    normalized_edge = np.minimum(edge / 5, 1)
+    normalized_return = np.clip((expected_return + 0.5) / 2, 0, 1)
+    prob_bonus = np.where(prob_decimal > 0.4, 0.1, 0)
+
+    return (
+        (prob_decimal * prob_weight) +
+        (normalized_edge * edge_weight) +
+        (normalized_return * return_weight) +
+        prob_bonus
+    ) * 100
+
+# (outcome suffix, bet type label, Opta probability column, Unibet odds column)
+OUTCOMES = [
+    ('home', 'Home Win', 'opta_home_win_%', 'unibet_home_odds'),
+    ('draw', 'Draw', 'opta_draw_%', 'unibet_draw_odds'),
+    ('away', 'Away Win', 'opta_away_win_%', 'unibet_away_odds'),
+]
+
+# Columns of matched_predictions that analyze_match_data reads
+ANALYSIS_COLUMNS = [
+    'competition', 'date_time', 'home_team', 'away_team',
+    'opta_home_win_%', 'opta_draw_%', 'opta_away_win_%',
+    'unibet_home_odds', 'unibet_draw_odds', 'unibet_away_odds',
+]
+
+def load_matched_history(start=None, end=None, competitions=None, root=None):
+    """Load stored matched snapshots with only the columns the analysis needs
+    
+    Args:
+        start: First snapshot date to include (default: no limit)
+        end: Last snapshot date to include (default: no limit)
+        competitions: Competition codes to include (default: all)
+        root: History store directory (default: history)
+        
+    Returns:
+        DataFrame ready for analyze_match_data, with a snapshot_ts column
+    """
+    # Imported here so the analysis does not pull in pandas and pyarrow
+    from history_store import HISTORY_DIR, load_history
+    
+    return load_history('matched', start, end, competitions, ANALYSIS_COLUMNS, root or HISTORY_DIR)
+
+def bet_metrics(df, margin_method=DEFAULT_METHOD, band=OVERROUND_BAND):
+    """Per-outcome bet metrics of a matched predictions frame
+    
+    The implied probabilities are the bookmaker's fair probabilities with the
+    margin removed. Rows whose overround falls outside band get a NaN edge, so
+    inconsistent odds never produce a bet.
+    
+    Args:
+        df: DataFrame with matched predictions
+        margin_method: Margin removal method (see margins.MARGIN_METHODS)
+        band: (low, high) overround accepted as one consistent 1X2 market
+    
+    Returns:
+        dict of (rows, 3) arrays with one column per outcome (home, draw,
+        away): odds, opta_prob, implied_prob, value (edge in percentage
+        points) and expected_return (per €1), plus the per-row overround and
+        overround_ok flag
+    """
+    odds = np.column_stack([df[odds_col].to_numpy(dtype=float) for _, _, _, odds_col in OUTCOMES])
+    opta_prob = np.column_stack([df[prob_col].to_numpy(dtype=float) for _, _, prob_col, _ in OUTCOMES])
+    
+    fair_prob, overround = fair_probabilities(odds, margin_method)
+    in_band = overround_ok(overround, band)
+    implied_prob = fair_prob * 100
+    return {
+        'odds': odds,
+        'opta_prob': opta_prob,
+        'implied_prob': implied_prob,
+        'value': np.where(in_band[:, None], opta_prob - implied_prob, np.nan),
+        'expected_return': (opta_prob / 100 * (odds - 1)) - ((1 - opta_prob / 100) * 1),
+        'overround': overround,
+        'overround_ok': in_band,
+    }
+
+def value_bet_mask(value, expected_return, threshold=2.0):
+    """Mask of the outcomes worth betting on
+    
+    The edge is measured against the margin-free probability, which can be
+    above threshold while the offered odds still lose money; a bet also needs
+    a positive expected return at those odds.
+    
+    Args:
+        value: Edges in percentage points (NaN for rows outside the overround band)
+        expected_return: Expected return per €1 at the offered odds
+        threshold: Minimum edge
+    """
+    return (value > threshold) & (expected_return > 0)
+
+def analyze_match_data(df, threshold=2.0, weights=None, margin_method=DEFAULT_METHOD, band=OVERROUND_BAND):
     """Analyze matched prediction data and return recommended bets
     
+    All metrics are computed as column-wise NumPy operations over the whole
+    frame; only the bets passing the threshold are turned into dicts. Edges
+    are measured against the margin-free probabilities of the odds, bets must
+    have a positive expected return at the offered odds, and matches with an
+    implausible overround are skipped (overround_ok column).
+    
     Args:
         df: DataFrame with matched predictions
         threshold: Minimum edge threshold for bet recommendations (default: 2.0)
+        weights: Confidence score weights (default: CONFIDENCE_WEIGHTS)
+        margin_method: Margin removal method (default: margins.DEFAULT_METHOD)
+        band: (low, high) overround accepted as one consistent market; pass
+            margins.BEST_PRICE_OVERROUND_BAND for best prices across books
         
     Returns:
         List of recommended bets sorted by confidence score
     """
-    # Calculate implied probabilities
-    df['implied_prob_home'] = df['unibet_home_odds'].apply(calculate_implied_probability) * 100
-    df['implied_prob_draw'] = df['unibet_draw_odds'].apply(calculate_implied_probability) * 100
-    df['implied_prob_away'] = df['unibet_away_odds'].apply(calculate_implied_probability) * 100
-    
-    # Calculate value (edge)
-    df['value_home'] = df.apply(lambda row: evaluate_bet_value(row['opta_home_win_%'], row['implied_prob_home']), axis=1)
-    df['value_draw'] = df.apply(lambda row: evaluate_bet_value(row['opta_draw_%'], row['implied_prob_draw']), axis=1)
-    df['value_away'] = df.apply(lambda row: evaluate_bet_value(row['opta_away_win_%'], row['implied_prob_away']), axis=1)
-    
-    # Calculate expected returns
-    df['expected_return_home'] = df.apply(lambda row: calculate_expected_return(row['unibet_home_odds'], row['opta_home_win_%']), axis=1)
-    df['expected_return_draw'] = df.apply(lambda row: calculate_expected_return(row['unibet_draw_odds'], row['opta_draw_%']), axis=1)
-    df['expected_return_away'] = df.apply(lambda row: calculate_expected_return(row['unibet_away_odds'], row['opta_away_win_%']), axis=1)
-    
-    # Create a list of all bet opportunities
-    all_bets = []
-    
-    for index, row in df.iterrows():
-        if row['value_home'] > threshold:
-            confidence_score = calculate_confidence_score(
-                row['opta_home_win_%'], 
-                row['value_home'], 
-                row['expected_return_home']
-            )
-            all_bets.append({
-                'match': f"{row['home_team']} vs {row['away_team']}",
-                'bet_type': 'Home Win',
-                'implied_prob': row['implied_prob_home'],
-                'opta_prob': row['opta_home_win_%'],
-                'difference': row['value_home'],
-                'expected_return': row['expected_return_home'],
-                'odds': row['unibet_home_odds'],
-                'confidence_score': confidence_score
-            })
-        if row['value_draw'] > threshold:
-            confidence_score = calculate_confidence_score(
-                row['opta_draw_%'], 
-                row['value_draw'], 
-                row['expected_return_draw']
-            )
-            all_bets.append({
-                'match': f"{row['home_team']} vs {row['away_team']}",
-                'bet_type': 'Draw',
-                'implied_prob': row['implied_prob_draw'],
-                'opta_prob': row['opta_draw_%'],
-                'difference': row['value_draw'],
-                'expected_return': row['expected_return_draw'],
-                'odds': row['unibet_draw_odds'],
-                'confidence_score': confidence_score
-            })
-        if row['value_away'] > threshold:
-            confidence_score = calculate_confidence_score(
-                row['opta_away_win_%'], 
-                row['value_away'], 
-                row['expected_return_away']
-            )
-            all_bets.append({
-                'match': f"{row['home_team']} vs {row['away_team']}",
-                'bet_type': 'Away Win',
-                'implied_prob': row['implied_prob_away'],
-                'opta_prob': row['opta_away_win_%'],
-                'difference': row['value_away'],
-                'expected_return': row['expected_return_away'],
-                'odds': row['unibet_away_odds'],
-                'confidence_score': confidence_score
-            })
+    # Arrays of shape (rows, 3) with one column per outcome (home, draw, away)
+    metrics = bet_metrics(df, margin_method, band)
+    odds = metrics['odds']
+    opta_prob = metrics['opta_prob']
+    implied_prob = metrics['implied_prob']
+    value = metrics['value']
+    expected_return = metrics['expected_return']
+    
+    # Keep the per-outcome columns on the frame for callers that inspect them
+    for i, (suffix, _, _, _) in enumerate(OUTCOMES):
+        df[f'implied_prob_{suffix}'] = implied_prob[:, i]
+    for i, (suffix, _, _, _) in enumerate(OUTCOMES):
+        df[f'value_{suffix}'] = value[:, i]
+    for i, (suffix, _, _, _) in enumerate(OUTCOMES):
+        df[f'expected_return_{suffix}'] = expected_return[:, i]
+    df['overround_ok'] = metrics['overround_ok']
+    
+    # Row-major order keeps bets of the same match together, home/draw/away
+    rows, cols = np.nonzero(value_bet_mask(value, expected_return, threshold))
+    if len(rows) == 0:
+        return []
+    
+    scores = calculate_confidence_scores(
+        opta_prob[rows, cols], value[rows, cols], expected_return[rows, cols], weights
+    )
+    home_teams = df['home_team'].to_numpy()[rows]
+    away_teams = df['away_team'].to_numpy()[rows]
+    bet_types = np.array([bet_type for _, bet_type, _, _ in OUTCOMES])[cols]
+    
+    all_bets = [
+        {
+            'match': f"{home} vs {away}",
+            'bet_type': bet_type,
+            'implied_prob': implied,
+            'opta_prob': prob,
+            'difference': diff,
+            'expected_return': exp_return,
+            'odds': bet_odds,
+            'confidence_score': round(score, 1)
+        }
+        for home, away, bet_type, implied, prob, diff, exp_return, bet_odds, score in zip(
+            home_teams.tolist(),
+            away_teams.tolist(),
+            bet_types.tolist(),
+            implied_prob[rows, cols].tolist(),
+            opta_prob[rows, cols].tolist(),
+            value[rows, cols].tolist(),
+            expected_return[rows, cols].tolist(),
+            odds[rows, cols].tolist(),
+            scores.tolist(),
+        )
+    ]
+    
+    # Best prices across bookmakers name the book offering each odd
+    if 'home_book' in df.columns:
+        books = np.column_stack([df[f'{suffix}_book'].to_numpy(dtype=object) for suffix, _, _, _ in OUTCOMES])
+        for bet, book in zip(all_bets, books[rows, cols].tolist()):
+            bet['bookmaker'] = book
     
     # Sort bets by confidence score
-    return sorted(all_bets, key=lambda x: x['confidence_score'], reverse=True)
\ No newline at end of file
+    return sorted(all_bets, key=lambda x: x['confidence_score'], reverse=True)
@@ -0,0 +1,157 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+# Chrome options shared by every scraper
+CHROME_ARGUMENTS = [
+    '--window-size=1920,1080',
+    '--no-first-run',
+    '--no-service-autorun',
+    '--password-store=basic',
+]
+
+def create_driver():
+    """Launch a new undetected Chrome with the scraper options"""
+    # Imported here so modules that only reference the pool load without Chrome support
+    import undetected_chromedriver as uc
+    
+    options = uc.ChromeOptions()
+    for argument in CHROME_ARGUMENTS:
+        options.add_argument(argument)
+    return uc.Chrome(options=options)
+
+class BrowserPool:
+    """Keeps Chrome instances alive and hands out a fresh tab per scraper run
+
+    A browser is launched lazily on the first lease and reused by every later
+    lease, so a long-running process (daemon mode) pays the cold start once.
+    Each browser serves one lease at a time because a WebDriver session can
+    only drive one tab at a time; use size=2 to let two scrapers run at once.
+
+    Args:
+        size: Maximum number of Chrome instances kept alive
+        driver_factory: Callable returning a new WebDriver (default: create_driver)
+        max_uses: Relaunch a browser after this many leases (default: never)
+    """
+
+    def __init__(self, size=1, driver_factory=create_driver, max_uses=None):
+        self.size = size
+        self.driver_factory = driver_factory
+        self.max_uses = max_uses
+        self._condition = threading.Condition()
+        self._idle = []
+        self._uses = {}
+        self._browser_count = 0
+        self._closed = False
+        self.launches = 0
+        self.leases = 0
+        self.launch_seconds = 0.0
+
+    def _launch(self):
+        start = time.perf_counter()
+        driver = self.driver_factory()
+        elapsed = time.perf_counter() - start
+        METRICS.observe('browser.launch', elapsed)
+        with self._condition:
+            self.launches += 1
+            self.launch_seconds += elapsed
+        print(f"Launched Chrome in {elapsed:.1f}s (launch #{self.launches})")
+        return driver
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._browser_count < self.size:
+                    self._browser_count += 1
+                    break
+                self._condition.wait()
+        try:
+            driver = self._launch()
+        except Exception:
+            with self._condition:
+                self._browser_count -= 1
+                self._condition.notify()
+            raise
+        self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print('Error closing browser:', e)
+        with self._condition:
+            self._uses.pop(id(driver), None)
+            self._browser_count -= 1
+            self._condition.notify()
+
+    def _release(self, driver):
+        with self._condition:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            worn_out = self.max_uses is not None and self._uses[id(driver)] >= self.max_uses
+            if not worn_out and not self._closed:
+                self._idle.append(driver)
+                self._condition.notify()
+                return
+        self._discard(driver)
+
+    @contextmanager
+    def lease(self):
+        """Borrow a browser positioned on a new tab; the tab is closed afterwards"""
+        driver = self._acquire()
+        METRICS.count('browser.leases')
+        with self._condition:
+            self.leases += 1
+        healthy = True
+        base_handle = None
+        try:
+            base_handle = driver.current_window_handle
+            driver.switch_to.new_window('tab')
+        except Exception as e:
+            print(f"Browser unusable, relaunching: {e}")
+            self._discard(driver)
+            driver = self._acquire()
+            base_handle = driver.current_window_handle
+            driver.switch_to.new_window('tab')
+        try:
+            yield driver
+        finally:
+            try:
+                if driver.current_window_handle != base_handle:
+                    driver.close()
+                driver.switch_to.window(base_handle)
+            except Exception as e:
+                print(f"Browser tab could not be recycled: {e}")
+                healthy = False
+            if healthy:
+                self._release(driver)
+            else:
+                self._discard(driver)
+
+    def stats(self):
+        """Return launch counts and the estimated cold-start time saved by reuse"""
+        with self._condition:
+            average_launch = self.launch_seconds / self.launches if self.launches else 0.0
+            reused = max(self.leases - self.launches, 0)
+            return {
+                'launches': self.launches,
+                'leases': self.leases,
+                'reused_leases': reused,
+                'average_launch_seconds': round(average_launch, 2),
+                'time_saved_seconds': round(reused * average_launch, 2),
+            }
+
+    def close(self):
+        """Quit every idle browser; browsers still leased are quit on release"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for driver in idle:
+            self._discard(driver)
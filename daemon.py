@@ -0,0 +1,268 @@
+import json
+import os
+import random
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime
+
+import pandas as pd
+
+from browser_pool import BrowserPool
+from margin_methods import DEFAULT_METHOD
+from metrics import METRICS
+from pipeline import AnalyzeStage, CsvSink, HistorySink, MatchStage, NotifyStage, Pipeline, PipelineError, RunState
+
+DEFAULT_STATUS_FILE = 'daemon_status.json'
+
+def frame_fingerprint(df):
+    """Return a fingerprint of a DataFrame's contents (None for no data)"""
+    if df is None or df.empty:
+        return None
+    return f"{int(pd.util.hash_pandas_object(df, index=False).sum()):016x}"
+
+def bets_fingerprint(bets):
+    """Identify a set of recommendations by match, bet type and odds"""
+    return frozenset((bet['match'], bet['bet_type'], bet['odds']) for bet in bets or [])
+
+class SourcePoller:
+    """Polls one data source on its own interval, with jitter and backoff
+
+    Args:
+        name: Source name ('opta' or 'unibet')
+        fetch: Callable returning the source's DataFrame
+        interval: Seconds between successful polls
+        jitter: Fraction of the interval added or removed at random, so the
+            sources do not hit their sites in lockstep
+        max_backoff: Upper bound in seconds for the delay after failures, which
+            doubles with every consecutive failure
+    """
+
+    def __init__(self, name, fetch, interval, jitter=0.1, max_backoff=3600):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.next_poll = 0.0
+        self.df = None
+        self.fingerprint = None
+        self.polls = 0
+        self.changes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_elapsed = None
+        self.last_success = None
+        self.last_error = None
+
+    def _schedule(self, now):
+        delay = self.interval
+        if self.consecutive_failures:
+            delay = min(self.interval * 2 ** self.consecutive_failures, self.max_backoff)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.next_poll = now + delay
+
+    def poll(self):
+        """Fetch the source once; return True when the data changed"""
+        start = time.perf_counter()
+        self.polls += 1
+        changed = False
+        try:
+            df = self.fetch()
+            if df is None or df.empty:
+                raise ValueError(f"{self.name} returned no data")
+            fingerprint = frame_fingerprint(df)
+            changed = fingerprint != self.fingerprint
+            if changed:
+                self.df, self.fingerprint = df, fingerprint
+                self.changes += 1
+            self.consecutive_failures = 0
+            self.last_success = datetime.now().isoformat(timespec='seconds')
+        except Exception as e:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"[{self.name}] Poll failed ({self.consecutive_failures} in a row): {e}")
+        self.last_elapsed = time.perf_counter() - start
+        METRICS.observe(f'poll.{self.name}', self.last_elapsed)
+        self._schedule(time.monotonic())
+        return changed
+
+    def status(self, now):
+        return {
+            'interval_seconds': self.interval,
+            'polls': self.polls,
+            'changes': self.changes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'rows': 0 if self.df is None else len(self.df),
+            'last_poll_seconds': None if self.last_elapsed is None else round(self.last_elapsed, 2),
+            'last_success': self.last_success,
+            'last_error': self.last_error,
+            'next_poll_in_seconds': round(max(self.next_poll - now, 0), 1),
+        }
+
+class Daemon:
+    """Keep scraping state warm and re-run the analysis only when inputs change
+
+    The browser pool, the imported team mappings and normalization caches, the
+    incremental match table and the last snapshot of each source live for the
+    whole process. Sources are polled in-process on their own intervals; when
+    either snapshot changes, matching, analysis and notification run on the
+    DataFrames in memory.
+
+    Args:
+        opta_interval: Seconds between Opta polls
+        unibet_interval: Seconds between Unibet polls
+        jitter: Random fraction added to or removed from each interval
+        max_backoff: Longest delay in seconds after repeated failures
+        threshold: Minimum edge (percentage points) for a recommended bet
+        analysis_options: Optional dict of extra AnalyzeStage settings
+            (bankroll, kelly_fraction, max_exposure, margin_method)
+        notifier: Callable taking the bets; only called when they differ from
+            the previous analysis
+        status_file: JSON file rewritten with health and timing counters,
+            including the process metrics
+        prometheus_file: Also rewrite the process metrics in Prometheus text
+            format to this file after every poll (None: off)
+        write_csv: Also write the opta, unibet and matched CSV files
+        history_dir: Append every analysed snapshot to this history store (None: off)
+        history_format: 'parquet' or 'feather'
+        fetchers: Optional dict of source -> callable, replacing the scrapers
+    """
+
+    def __init__(self, opta_interval=1800, unibet_interval=300, jitter=0.1, max_backoff=3600,
+                 threshold=2.0, analysis_options=None, notifier=None, status_file=DEFAULT_STATUS_FILE, write_csv=True,
+                 history_dir=None, history_format='parquet', fetchers=None, prometheus_file=None):
+        self.pool = BrowserPool()
+        fetchers = fetchers or {'opta': self._fetch_opta, 'unibet': self._fetch_unibet}
+        self.pollers = [
+            SourcePoller('opta', fetchers['opta'], opta_interval, jitter, max_backoff),
+            SourcePoller('unibet', fetchers['unibet'], unibet_interval, jitter, max_backoff),
+        ]
+        self.threshold = threshold
+        self.analysis_options = analysis_options or {}
+        self.notifier = notifier
+        self.status_file = status_file
+        self.prometheus_file = prometheus_file
+        self.write_csv = write_csv
+        self.history_dir = history_dir
+        self.history_format = history_format
+        self.stop_event = threading.Event()
+        self.started = None
+        self.analyses = 0
+        self.analysis_errors = 0
+        self.notifications = 0
+        self.last_analysis = None
+        self.last_timings = {}
+        self.last_bets = None
+        self.state = 'starting'
+
+    def _fetch_opta(self):
+        from opta_scraper import scrape_opta_predictions
+
+        with self.pool.lease() as driver:
+            return scrape_opta_predictions(driver)
+
+    def _fetch_unibet(self):
+        from unibet_scraper import fetch_unibet_odds
+
+        return fetch_unibet_odds('auto', pool=self.pool)
+
+    def stop(self, *_):
+        """Ask the loop to finish after the current step"""
+        if not self.stop_event.is_set():
+            print("\nStopping daemon...")
+        self.stop_event.set()
+
+    def analyze(self):
+        """Match and analyse the latest snapshots of both sources"""
+        opta, unibet = self.pollers
+        sinks = [CsvSink(('opta', 'unibet', 'matched'), skip_unchanged=True)] if self.write_csv else []
+        if self.history_dir:
+            sinks.append(HistorySink(self.history_dir, self.history_format))
+        state = RunState(sinks)
+        state.opta_df, state.unibet_df = opta.df, unibet.df
+        state.emit('opta', opta.df)
+        state.emit('unibet', unibet.df)
+
+        def notify_changes(bets):
+            fingerprint = bets_fingerprint(bets)
+            if self.notifier and bets and fingerprint != self.last_bets:
+                self.notifier(bets)
+                self.notifications += 1
+            self.last_bets = fingerprint
+
+        self.analyses += 1
+        try:
+            Pipeline([
+                MatchStage(incremental=True, margin_method=self.analysis_options.get('margin_method', DEFAULT_METHOD)),
+                AnalyzeStage(self.threshold, **self.analysis_options),
+                NotifyStage(notify_changes),
+            ]).run(state)
+        except PipelineError as e:
+            self.analysis_errors += 1
+            print(e)
+        except Exception:
+            self.analysis_errors += 1
+            print(f"Analysis failed:\n{traceback.format_exc()}")
+        self.last_analysis = datetime.now().isoformat(timespec='seconds')
+        self.last_timings = {stage: round(elapsed, 3) for stage, elapsed in state.timings.items()}
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            'state': self.state,
+            'pid': os.getpid(),
+            'started': self.started,
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'sources': {poller.name: poller.status(now) for poller in self.pollers},
+            'analyses': self.analyses,
+            'analysis_errors': self.analysis_errors,
+            'notifications': self.notifications,
+            'last_analysis': self.last_analysis,
+            'last_stage_timings': self.last_timings,
+            'browser_pool': self.pool.stats(),
+            'metrics': METRICS.report(),
+        }
+
+    def write_status(self):
+        """Rewrite the status file atomically so readers never see half a file"""
+        if self.prometheus_file:
+            METRICS.write_prometheus(self.prometheus_file)
+        if not self.status_file:
+            return
+        tmp_file = f"{self.status_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.status(), f, indent=2)
+        os.replace(tmp_file, self.status_file)
+
+    def run(self, max_cycles=None):
+        """Poll until stopped by SIGINT/SIGTERM (or after max_cycles analyses)"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.state = 'running'
+        print(f"Daemon started: Opta every {self.pollers[0].interval:g}s, Unibet every {self.pollers[1].interval:g}s")
+        try:
+            while not self.stop_event.is_set():
+                changed = False
+                for poller in self.pollers:
+                    if self.stop_event.is_set():
+                        break
+                    if time.monotonic() >= poller.next_poll:
+                        changed = poller.poll() or changed
+                if changed and all(poller.df is not None for poller in self.pollers):
+                    self.analyze()
+                    if max_cycles is not None and self.analyses >= max_cycles:
+                        self.stop()
+                self.write_status()
+                next_poll = min(poller.next_poll for poller in self.pollers)
+                self.stop_event.wait(max(next_poll - time.monotonic(), 0))
+        finally:
+            self.state = 'stopped'
+            self.pool.close()
+            self.write_status()
+            print("Daemon stopped")
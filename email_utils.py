@@ -1,11 +1,15 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import traceback
 
+from rendering import rating_for, render_bets_html
+
 def send_email(subject, body, to_email, gmail_user, gmail_password):
     """Send email with Gmail"""
+    # Only runs with --email, so the SMTP and MIME modules are loaded here
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
     try:
         msg = MIMEMultipart()
         msg['Subject'] = subject
@@ -26,78 +30,11 @@ def send_email(subject, body, to_email, gmail_user, gmail_password):
 
 def format_bets_as_html(bets):
     """Format betting recommendations as HTML for email"""
-    html = """
-    <html>
-    <head>
-        <style>
-            body { font-family: Arial, sans-serif; line-height: 1.6; }
-            .header { background-color: #4CAF50; color: white; padding: 10px; text-align: center; }
-            .bet { margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; border-radius: 5px; }
-            .excellent { background-color: #CCFFCC; }
-            .very-good { background-color: #E6FFE6; }
-            .good { background-color: #F0FFF0; }
-            .speculative { background-color: #FFFAF0; }
-            .low-confidence { background-color: #FFF0F0; }
-            .bet-header { font-weight: bold; font-size: 18px; }
-            .details { margin-left: 15px; }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Opta Betting Recommendations</h1>
-            <p>Generated on: """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
-        </div>
-    """
-    
-    for i, bet in enumerate(bets, 1):
-        if bet['confidence_score'] >= 80:
-            rating = "⭐⭐⭐⭐⭐ EXCELLENT"
-            css_class = "excellent"
-        elif bet['confidence_score'] >= 60:
-            rating = "⭐⭐⭐⭐ VERY GOOD"
-            css_class = "very-good"
-        elif bet['confidence_score'] >= 40:
-            rating = "⭐⭐⭐ GOOD"
-            css_class = "good"
-        elif bet['confidence_score'] >= 20:
-            rating = "⭐⭐ SPECULATIVE" 
-            css_class = "speculative"
-        else:
-            rating = "⭐ LOW CONFIDENCE"
-            css_class = "low-confidence"
-            
-        html += f"""
-        <div class="bet {css_class}">
-            <div class="bet-header">{i}. Bet on {bet['bet_type']} in {bet['match']}</div>
-            <div class="details">
-                <p>Odds: {bet['odds']:.2f}</p>
-                <p>Implied probability: {bet['implied_prob']:.2f}%</p>
-                <p>Opta probability: {bet['opta_prob']:.2f}%</p>
-                <p>Edge: +{bet['difference']:.2f}%</p>
-                <p>Expected profit per €1 bet: €{bet['expected_return']:.2f}</p>
-                <p>Confidence Score: {bet['confidence_score']}/100 - {rating}</p>
-            </div>
-        </div>
-        """
-    
-    html += """
-    </body>
-    </html>
-    """
-    return html
+    return render_bets_html(bets)
 
 def get_rating_description(confidence_score):
     """Get the star rating and description based on confidence score"""
-    if confidence_score >= 80:
-        return "⭐⭐⭐⭐⭐ EXCELLENT"
-    elif confidence_score >= 60:
-        return "⭐⭐⭐⭐ VERY GOOD"
-    elif confidence_score >= 40:
-        return "⭐⭐⭐ GOOD"
-    elif confidence_score >= 20:
-        return "⭐⭐ SPECULATIVE" 
-    else:
-        return "⭐ LOW CONFIDENCE"
+    return rating_for(confidence_score)[0]
 
 def format_error_as_html(error_message, traceback_info=None):
     """Format error information as HTML for email"""
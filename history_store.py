@@ -0,0 +1,190 @@
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+# Default location of the snapshot history, next to the CSV files
+HISTORY_DIR = 'history'
+
+# Datasets written by a run and the CSV each one mirrors
+DATASETS = {
+    'opta': 'opta_predictions.csv',
+    'unibet': 'unibet_predictions.csv',
+    'matched': 'matched_predictions.csv',
+}
+
+FILE_FORMATS = {'parquet': '.parquet', 'feather': '.feather'}
+
+SNAPSHOT_COLUMN = 'snapshot_ts'
+# Position of each row in the original frame, so reads restore the CSV order
+ROW_COLUMN = 'snapshot_row'
+SNAPSHOT_FORMAT = '%Y%m%dT%H%M%S'
+
+def _partition_value(value):
+    """Make a competition name safe to use as a directory name"""
+    value = str(value) if pd.notna(value) else 'Unknown'
+    return re.sub(r'[^\w.-]', '_', value) or 'Unknown'
+
+def _dataset_dir(dataset, root):
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}', choose from {', '.join(DATASETS)}")
+    return os.path.join(root, dataset)
+
+def append_snapshot(df, dataset, run_ts=None, root=HISTORY_DIR, file_format='parquet'):
+    """Append one run's DataFrame to the history, partitioned by date and competition
+
+    Files are written as <root>/<dataset>/date=YYYY-MM-DD/competition=<comp>/<run>.parquet
+    and every row is tagged with the run timestamp in a snapshot_ts column.
+
+    Args:
+        df: Snapshot to store (must have a 'competition' column)
+        dataset: One of DATASETS ('opta', 'unibet', 'matched')
+        run_ts: Timestamp of the run (default: now); use the same value for
+            all datasets written by one run
+        root: History directory
+        file_format: 'parquet' or 'feather'
+
+    Returns:
+        list: Paths of the files written
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unknown file format '{file_format}', choose from {', '.join(FILE_FORMATS)}")
+    run_ts = run_ts or datetime.now()
+    if df.empty:
+        return []
+
+    snapshot = df.copy()
+    snapshot[SNAPSHOT_COLUMN] = pd.Timestamp(run_ts)
+    snapshot[ROW_COLUMN] = range(len(snapshot))
+    date_dir = os.path.join(_dataset_dir(dataset, root), f"date={run_ts:%Y-%m-%d}")
+    filename = f"{run_ts:{SNAPSHOT_FORMAT}}{FILE_FORMATS[file_format]}"
+
+    written = []
+    for competition, part in snapshot.groupby(snapshot['competition'].map(_partition_value), sort=True):
+        part_dir = os.path.join(date_dir, f"competition={competition}")
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, filename)
+        part = part.reset_index(drop=True)
+        if file_format == 'parquet':
+            part.to_parquet(path, index=False)
+        else:
+            part.to_feather(path)
+        written.append(path)
+    return written
+
+def _partition_files(dataset, root, start=None, end=None, competitions=None):
+    """Yield (date, competition, run, path) for files whose partition passes the filters
+
+    Only directory and file names are inspected; no data files are opened.
+    """
+    dataset_dir = _dataset_dir(dataset, root)
+    if not os.path.isdir(dataset_dir):
+        return
+    start = pd.Timestamp(start).date() if start is not None else None
+    end = pd.Timestamp(end).date() if end is not None else None
+    wanted = {_partition_value(c) for c in competitions} if competitions else None
+
+    for date_dir in sorted(os.listdir(dataset_dir)):
+        if not date_dir.startswith('date='):
+            continue
+        date = datetime.strptime(date_dir[5:], '%Y-%m-%d').date()
+        if (start and date < start) or (end and date > end):
+            continue
+        for comp_dir in sorted(os.listdir(os.path.join(dataset_dir, date_dir))):
+            competition = comp_dir[len('competition='):]
+            if not comp_dir.startswith('competition=') or (wanted and competition not in wanted):
+                continue
+            part_dir = os.path.join(dataset_dir, date_dir, comp_dir)
+            for filename in sorted(os.listdir(part_dir)):
+                run, ext = os.path.splitext(filename)
+                if ext in FILE_FORMATS.values():
+                    yield date, competition, run, os.path.join(part_dir, filename)
+
+def _read_files(paths, columns=None):
+    """Read and concatenate files in snapshot and original row order"""
+    requested = columns
+    if columns is not None:
+        columns = list(columns) + [c for c in (SNAPSHOT_COLUMN, ROW_COLUMN) if c not in columns]
+    frames = []
+    for path in paths:
+        if path.endswith('.parquet'):
+            frames.append(pd.read_parquet(path, columns=columns))
+        else:
+            frames.append(pd.read_feather(path, columns=columns))
+    if not frames:
+        return pd.DataFrame(columns=requested or [])
+    df = pd.concat(frames, ignore_index=True)
+    df = df.sort_values([SNAPSHOT_COLUMN, ROW_COLUMN], kind='stable').reset_index(drop=True)
+    if requested is None or ROW_COLUMN not in requested:
+        df = df.drop(columns=[ROW_COLUMN])
+    return df
+
+def load_history(dataset, start=None, end=None, competitions=None, columns=None, root=HISTORY_DIR):
+    """Load stored snapshots for a date range and/or competitions
+
+    Partitions outside the filters are skipped by directory name, and only the
+    requested columns are read from each file.
+
+    Args:
+        dataset: One of DATASETS
+        start: First snapshot date to include (inclusive, anything pd.Timestamp accepts)
+        end: Last snapshot date to include (inclusive)
+        competitions: Competition codes to include (default: all)
+        columns: Columns to read (default: all); snapshot_ts is always added
+        root: History directory
+
+    Returns:
+        DataFrame with the matching rows of every snapshot, oldest first and
+        in the original row order within a snapshot
+    """
+    if columns is not None and SNAPSHOT_COLUMN not in columns:
+        columns = list(columns) + [SNAPSHOT_COLUMN]
+    paths = [path for _, _, _, path in _partition_files(dataset, root, start, end, competitions)]
+    return _read_files(paths, columns)
+
+def list_snapshots(dataset, root=HISTORY_DIR):
+    """Return the timestamps of all stored runs for a dataset, oldest first"""
+    runs = {run for _, _, run, _ in _partition_files(dataset, root)}
+    return [datetime.strptime(run, SNAPSHOT_FORMAT) for run in sorted(runs)]
+
+def load_latest_snapshot(dataset, competitions=None, columns=None, root=HISTORY_DIR):
+    """Load only the most recent run of a dataset, without the snapshot_ts column
+
+    Returns:
+        DataFrame shaped like the dataset's CSV, or an empty DataFrame if no
+        snapshot is stored
+    """
+    files = list(_partition_files(dataset, root, competitions=competitions))
+    if not files:
+        return pd.DataFrame(columns=columns or [])
+    latest_run = max(run for _, _, run, _ in files)
+    df = _read_files([path for _, _, run, path in files if run == latest_run], columns)
+    return df.drop(columns=[SNAPSHOT_COLUMN], errors='ignore')
+
+def append_run(run_ts=None, root=HISTORY_DIR, file_format='parquet', frames=None, read_missing=True):
+    """Store the CSVs (or given DataFrames) of one run under a shared timestamp
+
+    Args:
+        run_ts: Timestamp of the run (default: now)
+        root: History directory
+        file_format: 'parquet' or 'feather'
+        frames: Optional dict of dataset -> DataFrame; datasets not given are
+            read from their CSV when it exists
+        read_missing: False stores only the given frames
+
+    Returns:
+        dict: Number of rows stored per dataset
+    """
+    run_ts = run_ts or datetime.now()
+    frames = dict(frames or {})
+    stored = {}
+    for dataset, csv_file in DATASETS.items():
+        df = frames.get(dataset)
+        if df is None:
+            if not read_missing or not os.path.exists(csv_file):
+                continue
+            df = pd.read_csv(csv_file)
+        append_snapshot(df, dataset, run_ts, root, file_format)
+        stored[dataset] = len(df)
+    return stored
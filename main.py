@@ -1,23 +1,84 @@
 import time
-import pandas as pd
 import os
 import argparse
 import traceback
 from datetime import datetime
 
-# Import utility modules
-from script_utils import run_script, verify_data
-from betting_utils import analyze_match_data
-from email_utils import send_email, format_bets_as_html, get_rating_description, format_error_as_html
+from margin_methods import DEFAULT_METHOD, MARGIN_METHOD_NAMES
+from metrics import METRICS, METRICS_FILE, profile_call
+
+def print_stage_timings(stage_timings):
+    """Print the wall-clock time spent in each stage of the run"""
+    if not stage_timings:
+        return
+    print("\nStage timings (wall-clock):")
+    for stage, elapsed in stage_timings.items():
+        print(f"   {stage}: {elapsed:.2f}s")
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Run Opta betting system')
     parser.add_argument('--email', action='store_true', help='Send email with recommendations')
     parser.add_argument('--to_email', type=str, help='Email address to send recommendations to')
+    parser.add_argument('--smtp_host', type=str, default='smtp.gmail.com', help='SMTP server for --email (default: smtp.gmail.com)')
+    parser.add_argument('--smtp_port', type=int, default=465, help='SMTP port (default: 465)')
+    parser.add_argument('--smtp_security', choices=['ssl', 'starttls', 'none'], default='ssl', help='ssl: SMTP over TLS (default); starttls: upgrade a plain connection; none: plain SMTP, e.g. a local test server')
+    parser.add_argument('--webhook_url', type=str, help='Also POST alerts as JSON to this URL')
+    parser.add_argument('--alert_file', type=str, help='Also append alerts as JSON lines to this file')
+    parser.add_argument('--notify_window', type=float, default=5.0, help='Seconds to collect alerts into one message before delivering (default: 5)')
     parser.add_argument('--skip_scrapers', action='store_true', help='Skip scraping steps, just analyze existing data')
+    parser.add_argument('--opta_timeout', type=float, default=300, help='Seconds before the Opta scraper is stopped (default: 300)')
+    parser.add_argument('--unibet_timeout', type=float, default=300, help='Seconds before the Unibet scraper is stopped (default: 300)')
+    parser.add_argument('--incremental', action='store_true', help='Only re-match fixtures that are new or changed since the previous run')
+    parser.add_argument('--no_csv', action='store_true', help='Do not write matched_predictions.csv (the scrapers still write their CSVs)')
+    parser.add_argument('--history', action='store_true', help='Append this run\'s Opta, Unibet and matched data to the history store')
+    parser.add_argument('--from_history', action='store_true', help='Match the latest snapshots in the history store instead of the CSV files (use with --skip_scrapers)')
+    parser.add_argument('--history_dir', type=str, help='History store directory (default: history)')
+    parser.add_argument('--daemon', action='store_true', help='Keep running, poll both sources and re-analyze whenever their data changes')
+    parser.add_argument('--opta_interval', type=float, default=1800, help='Daemon: seconds between Opta polls (default: 1800)')
+    parser.add_argument('--unibet_interval', type=float, default=300, help='Daemon: seconds between Unibet polls (default: 300)')
+    parser.add_argument('--poll_jitter', type=float, default=0.1, help='Daemon: random fraction added to or removed from each interval (default: 0.1)')
+    parser.add_argument('--max_backoff', type=float, default=3600, help='Daemon: longest delay in seconds after repeated poll failures (default: 3600)')
+    parser.add_argument('--status_file', type=str, default='daemon_status.json', help='Daemon: JSON file with health and timing counters (default: daemon_status.json)')
+    parser.add_argument('--bankroll', type=float, default=100.0, help='Bankroll used for the suggested stakes (default: 100)')
+    parser.add_argument('--kelly_fraction', type=float, default=0.25, help='Fraction of the full Kelly stake to suggest (default: 0.25)')
+    parser.add_argument('--max_exposure', type=float, default=0.5, help='Largest total stake on one slate as a fraction of the bankroll (default: 0.5)')
+    parser.add_argument('--margin_method', choices=MARGIN_METHOD_NAMES, default=DEFAULT_METHOD, help=f'How the bookmaker margin is removed before computing edges (default: {DEFAULT_METHOD})')
+    parser.add_argument('--odds_sources', nargs='+', metavar='NAME=KIND:ARG', help='Also fetch these bookmakers and bet at the best price, e.g. book_b=html:unibet_html_2.html (kinds: valuebase, html, csv; not used by --daemon)')
+    parser.add_argument('--history_format', choices=['parquet', 'feather'], default='parquet', help='File format for the history store (default: parquet)')
+    parser.add_argument('--metrics_file', type=str, default=METRICS_FILE, help=f'JSON report of the run\'s timers, counters and gauges (default: {METRICS_FILE}; empty to disable)')
+    parser.add_argument('--prometheus_file', type=str, help='Also write the metrics in Prometheus text format to this file (e.g. for the node_exporter textfile collector)')
+    parser.add_argument('--profile', action='store_true', help='Profile the whole run (pyinstrument if installed, else cProfile) and write the profile')
+    parser.add_argument('--profile_file', type=str, help='Profile output (default: run_profile.html with pyinstrument, run_profile.prof with cProfile)')
     args = parser.parse_args()
     
+    if args.profile:
+        profile_call(run, args, parser, output=args.profile_file)
+    else:
+        run(args, parser)
+
+def run(args, parser):
+    """Run the betting system once, or as a daemon, with the parsed arguments"""
+    # Heavy modules are imported after argument parsing: pandas comes in with
+    # the pipeline, and the alert formatting only when alerts are sent
+    from history_store import HISTORY_DIR
+    from pipeline import (AnalyzeStage, CsvSink, HistorySink, MatchStage, NotifyStage, OddsStage, Pipeline,
+                          PipelineError, RunState, ScrapeStage, VerifyStage)
+    notifying = bool(args.email or args.webhook_url or args.alert_file)
+    if notifying:
+        from email_utils import format_bets_as_html, format_error_as_html
+        from notifications import Alert, FileSink, NotificationDispatcher, SmtpSink, WebhookSink
+    args.history_dir = args.history_dir or HISTORY_DIR
+    analysis_options = {'bankroll': args.bankroll, 'kelly_fraction': args.kelly_fraction, 'max_exposure': args.max_exposure,
+                        'margin_method': args.margin_method}
+    odds_stages = []
+    if args.odds_sources:
+        from odds_sources import create_source
+        try:
+            odds_stages.append(OddsStage([create_source(spec) for spec in args.odds_sources]))
+        except ValueError as e:
+            parser.error(str(e))
+    
     # Get email credentials from environment variables if emailing is enabled
     gmail_user = os.environ.get('GMAIL_USER', '')
     gmail_password = os.environ.get('GMAIL_APP_PASSWORD', '')
@@ -27,130 +88,116 @@ def main():
     error_encountered = False
     error_message = ""
     error_traceback = ""
+    stage_timings = {}
+    run_start = time.perf_counter()
+    dispatcher = None
     
     try:
-        if args.email and (not gmail_user or not gmail_password or not to_email):
+        # A server other than Gmail (e.g. a local relay or test server) may not need a login
+        needs_login = args.smtp_host == 'smtp.gmail.com'
+        if args.email and (not to_email or (needs_login and (not gmail_user or not gmail_password))):
             error_encountered = True
             error_message = "Email credentials missing. Please set GMAIL_USER, GMAIL_APP_PASSWORD and TO_EMAIL environment variables."
             print(error_message)
             print("You can also provide the recipient email with --to_email option")
             return
         
+        # Alerts are delivered by a background dispatcher, so the run never
+        # waits on SMTP or the webhook
+        if notifying:
+            alert_sinks = []
+            if args.email:
+                alert_sinks.append(SmtpSink(
+                    gmail_user or 'opta-bets@localhost',
+                    gmail_user if gmail_user and gmail_password else None,
+                    gmail_password,
+                    host=args.smtp_host,
+                    port=args.smtp_port,
+                    use_ssl=args.smtp_security == 'ssl',
+                    starttls=args.smtp_security == 'starttls',
+                ))
+            if args.webhook_url:
+                alert_sinks.append(WebhookSink(args.webhook_url))
+            if args.alert_file:
+                alert_sinks.append(FileSink(args.alert_file))
+            dispatcher = NotificationDispatcher(alert_sinks, window=args.notify_window)
+        recipients = [address.strip() for address in to_email.split(',') if address.strip()]
+        
+        def notify(subject, body, bets=None):
+            if dispatcher:
+                dispatcher.submit(Alert(subject, body, recipients, bets))
+        
         print("Starting betting odds collection and analysis process...")
         
-        if not args.skip_scrapers:
-            # Run Opta scraper to get predictions
-            print("\nRunning Opta scraper...")
-            if not run_script('opta_scraper.py', 'Opta predictions scraper'):
-                error_encountered = True
-                error_message = "Failed to get Opta predictions."
-                print(f"{error_message} Stopping process.")
-                raise Exception(error_message)
-                
-            # Run Unibet scraper to get current odds
-            print("\nWaiting 5 seconds before running Unibet scraper...")
-            time.sleep(5)  # Small delay between scraping operations
+        def email_bets(bets):
+            if not notifying:
+                return
+            if not bets:
+                no_bets_message = "The system ran successfully, but no betting opportunities meeting the threshold criteria were found."
+                email_body = format_error_as_html(no_bets_message)
+                subject = f"Opta Betting System - No Bets Found - {datetime.now().strftime('%Y-%m-%d')}"
+                notify(subject, email_body)
+                return
+            today = datetime.now().strftime("%Y-%m-%d")
+            subject = f"Opta Betting Recommendations - {today}"
+            email_body = format_bets_as_html(bets)
             
-            if not run_script('unibet_scraper.py', 'Unibet odds scraper'):
-                error_encountered = True
-                error_message = "Failed to get Unibet odds."
-                print(f"{error_message} Stopping process.")
-                raise Exception(error_message)
-        else:
-            print("Skipping scraping steps as requested...")
+            print(f"Queueing alert for {to_email or 'the alert sinks'}...")
+            notify(subject, email_body, bets)
         
-        # Verify Opta data
-        if not verify_data('opta_predictions.csv'):
-            error_encountered = True
-            error_message = "Opta predictions data verification failed."
-            print(f"{error_message} Stopping process.")
-            raise Exception(error_message)
-        
-        # Verify Unibet data
-        if not verify_data('unibet_predictions.csv'):
-            error_encountered = True
-            error_message = "Unibet odds data verification failed."
-            print(f"{error_message} Stopping process.")
-            raise Exception(error_message)
+        if args.daemon:
+            from daemon import Daemon
+            
+            Daemon(
+                opta_interval=args.opta_interval,
+                unibet_interval=args.unibet_interval,
+                jitter=args.poll_jitter,
+                max_backoff=args.max_backoff,
+                analysis_options=analysis_options,
+                notifier=email_bets,
+                status_file=args.status_file,
+                write_csv=not args.no_csv,
+                history_dir=args.history_dir if args.history else None,
+                history_format=args.history_format,
+                prometheus_file=args.prometheus_file,
+            ).run()
+            return
         
-        # Run match data analysis
-        print("\nRunning match analysis...")
-        if not run_script('match_data.py', 'Match analysis'):
-            error_encountered = True
-            error_message = "Failed to complete match analysis."
-            print(error_message)
-            raise Exception(error_message)
+        # DataFrames are passed between the stages in memory; CSV and history
+        # writes are sinks that receive the stage outputs
+        sinks = [] if args.no_csv else [CsvSink(skip_unchanged=args.incremental)]
+        if args.history:
+            sinks.append(HistorySink(args.history_dir, args.history_format))
+        pipeline = Pipeline([
+            ScrapeStage(
+                run_scrapers=not args.skip_scrapers,
+                opta_timeout=args.opta_timeout,
+                unibet_timeout=args.unibet_timeout,
+                from_history=args.from_history,
+                history_dir=args.history_dir,
+            ),
+            VerifyStage(),
+            *odds_stages,
+            MatchStage(incremental=args.incremental, margin_method=args.margin_method),
+            AnalyzeStage(threshold=2.0, **analysis_options),
+            NotifyStage(email_bets),
+        ], sinks)
+        state = RunState(sinks)
         
-        # Verify final output
-        if not verify_data('matched_predictions.csv'):
+        try:
+            pipeline.run(state)
+        except PipelineError as e:
             error_encountered = True
-            error_message = "Process completed but no matched predictions were generated."
-            print(error_message)
-            if args.email:
+            error_message = str(e)
+            print(f"{error_message} Stopping process.")
+            if notifying:
                 email_body = format_error_as_html(error_message)
-                subject = f"⚠️ Opta Betting System - No Matches Found - {datetime.now().strftime('%Y-%m-%d')}"
-                send_email(subject, email_body, to_email, gmail_user, gmail_password)
+                no_matches = state.matched_df is not None and state.matched_df.empty
+                subject = f"⚠️ Opta Betting System - {'No Matches Found' if no_matches else 'Error'} - {datetime.now().strftime('%Y-%m-%d')}"
+                notify(subject, email_body)
             return
-        
-        print("\nProcess completed successfully!")
-        # Display summary of results
-        try:
-            # Load matched predictions
-            df = pd.read_csv('matched_predictions.csv')
-            print(f"\nFound {len(df)} matches with betting opportunities")
-            print("\nSample of opportunities:")
-            print(df[['home_team', 'away_team', 'prob_difference_home', 'prob_difference_draw', 'prob_difference_away']].head())
-            
-            # Analyze the data and get betting recommendations
-            threshold = 2.0
-            sorted_bets = analyze_match_data(df, threshold)
-            
-            # Display the recommendations
-            print("\n📊 RECOMMENDED BETS (BEST TO WORST) 📊")
-            print("=" * 80)
-            
-            if not sorted_bets:
-                print("No bets meeting the threshold criteria were found.")
-                
-                if args.email:
-                    no_bets_message = "The system ran successfully, but no betting opportunities meeting the threshold criteria were found."
-                    email_body = format_error_as_html(no_bets_message)
-                    subject = f"Opta Betting System - No Bets Found - {datetime.now().strftime('%Y-%m-%d')}"
-                    send_email(subject, email_body, to_email, gmail_user, gmail_password)
-                return
-            
-            for i, bet in enumerate(sorted_bets, 1):
-                rating = get_rating_description(bet['confidence_score'])
-                
-                print(f"{i}. Bet on {bet['bet_type']} in {bet['match']}")
-                print(f"   Odds: {bet['odds']:.2f}")
-                print(f"   Implied probability: {bet['implied_prob']:.2f}%")
-                print(f"   Opta probability: {bet['opta_prob']:.2f}%")
-                print(f"   Edge: +{bet['difference']:.2f}%")
-                print(f"   Expected profit per €1 bet: €{bet['expected_return']:.2f}")
-                print(f"   Confidence Score: {bet['confidence_score']}/100 - {rating}")
-                print()
-            
-            # Send email with recommendations if requested
-            if args.email:
-                today = datetime.now().strftime("%Y-%m-%d")
-                subject = f"Opta Betting Recommendations - {today}"
-                email_body = format_bets_as_html(sorted_bets)
-                
-                print(f"Sending email to {to_email}...")
-                send_email(subject, email_body, to_email, gmail_user, gmail_password)
-                
-        except Exception as e:
-            error_encountered = True
-            error_message = f"Error displaying results summary: {str(e)}"
-            error_traceback = traceback.format_exc()
-            print(error_message)
-            print(error_traceback)
-            
-            if args.email:
-                email_body = format_error_as_html(error_message, error_traceback)
-                subject = f"⚠️ Opta Betting System Error - {datetime.now().strftime('%Y-%m-%d')}"
-                send_email(subject, email_body, to_email, gmail_user, gmail_password)
+        finally:
+            stage_timings.update(state.timings)
     
     except Exception as e:
         error_encountered = True
@@ -160,12 +207,26 @@ def main():
         print(error_message)
         print(error_traceback)
         
-        if args.email:
+        if dispatcher:
             email_body = format_error_as_html(error_message, error_traceback)
             subject = f"⚠️ Opta Betting System Error - {datetime.now().strftime('%Y-%m-%d')}"
-            send_email(subject, email_body, to_email, gmail_user, gmail_password)
+            notify(subject, email_body)
     
     finally:
+        stage_timings['total'] = time.perf_counter() - run_start
+        print_stage_timings(stage_timings)
+        if dispatcher:
+            # Deliver whatever is still queued before the process exits
+            dispatcher.close()
+        
+        # Written after the dispatcher closes so the send timings are included
+        METRICS.observe('run.total', stage_timings['total'])
+        if args.metrics_file:
+            METRICS.write_json(args.metrics_file)
+            print(f"\nRun metrics written to {args.metrics_file}")
+        if args.prometheus_file:
+            METRICS.write_prometheus(args.prometheus_file)
+        
         if error_encountered:
             print("\n⚠️ Process completed with errors. See above for details.")
             if args.email:
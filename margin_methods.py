@@ -0,0 +1,5 @@
+# Names of the margin removal methods implemented in margins.py. Kept free of
+# NumPy so main.py and daemon.py can build their options without loading it.
+MARGIN_METHOD_NAMES = ('proportional', 'shin', 'power')
+
+DEFAULT_METHOD = 'shin'
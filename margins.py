@@ -0,0 +1,145 @@
+import numpy as np
+
+from margin_methods import DEFAULT_METHOD
+
+# Overround (sum of 1/odds - 1) a single 1X2 market can plausibly have; rows
+# outside it are mismatched or mis-scraped odds and get no fair probabilities
+OVERROUND_BAND = (0.0, 0.20)
+
+# Band for best prices taken across bookmakers: their combined book can drop
+# below 0% (an arbitrage), which is exactly what comparing books is for
+BEST_PRICE_OVERROUND_BAND = (-0.10, 0.20)
+
+# Newton iteration limits for the Shin and power solvers
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-12
+
+# (decimal odds column, fair probability column) per outcome of the matched frame
+FAIR_COLUMNS = [
+    ('unibet_home_odds', 'fair_home_prob_%'),
+    ('unibet_draw_odds', 'fair_draw_prob_%'),
+    ('unibet_away_odds', 'fair_away_prob_%'),
+]
+
+def inverse_odds(odds):
+    """1/odds as a float array, with NaN for missing or impossible odds (<= 1)"""
+    odds = np.asarray(odds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(odds > 1, 1 / odds, np.nan)
+
+def overround(odds):
+    """Bookmaker margin per row: sum of 1/odds minus 1 (NaN when an odd is missing)"""
+    return inverse_odds(odds).sum(axis=1) - 1
+
+def proportional(inverse):
+    """Scale 1/odds down by the same factor so each row sums to 1"""
+    return inverse / inverse.sum(axis=1, keepdims=True)
+
+def power(inverse):
+    """Raise 1/odds to the power k that makes each row sum to 1
+
+    k is found per row with Newton's method on sum(q ** k) = 1, for all rows
+    at once. Longshots lose relatively more probability than favourites.
+    """
+    log_inverse = np.log(inverse)
+    k = np.ones(len(inverse))
+    active = np.isfinite(log_inverse).all(axis=1)
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        powered = inverse[active] ** k[active, None]
+        step = (powered.sum(axis=1) - 1) / (powered * log_inverse[active]).sum(axis=1)
+        k[active] -= step
+        still_active = np.abs(step) > TOLERANCE
+        active[active] = still_active
+    return proportional(inverse ** k[:, None])
+
+def shin(inverse):
+    """Shin's model: remove the margin assuming a share z of insider money
+
+    With c = q ** 2 / sum(q), each outcome gets
+    p(z) = (sqrt(z ** 2 + 4 * (1 - z) * c) - z) / (2 * (1 - z)), and z in [0, 1)
+    is chosen so the row sums to 1. z is solved for all rows at once with
+    Newton's method, falling back to bisection whenever a step leaves the
+    bracket, which keeps rows with a large overround from stalling.
+    """
+    booksum = inverse.sum(axis=1, keepdims=True)
+    scaled = inverse ** 2 / booksum
+    # A book without margin needs no insiders (z = 0)
+    active = np.isfinite(booksum[:, 0]) & (booksum[:, 0] > 1)
+    # Start from the first fixed-point step, 2 * (sqrt(S) - 1), which lies just below the root
+    z = np.where(active, np.clip(2 * (np.sqrt(booksum[:, 0]) - 1), 0, 0.5), 0.0)
+    low = np.zeros(len(inverse))
+    high = np.ones(len(inverse))
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        z_active = z[active, None]
+        c = scaled[active]
+        root = np.sqrt(z_active ** 2 + 4 * (1 - z_active) * c)
+        excess = ((root - z_active) / (2 * (1 - z_active))).sum(axis=1) - 1
+        slope = ((((z_active - 2 * c) / root - 1) * (1 - z_active) + root - z_active)
+                 / (2 * (1 - z_active) ** 2)).sum(axis=1)
+        # The row sum falls as z grows, so the sign of the excess moves the bracket
+        too_low = excess > 0
+        low[active] = np.where(too_low, z[active], low[active])
+        high[active] = np.where(too_low, high[active], z[active])
+        new_z = z[active] - excess / slope
+        outside = (new_z < low[active]) | (new_z > high[active])
+        new_z = np.where(outside, (low[active] + high[active]) / 2, new_z)
+        step = np.abs(new_z - z[active])
+        z[active] = new_z
+        active[active] = step > TOLERANCE
+    z = z[:, None]
+    fair = (np.sqrt(z ** 2 + 4 * (1 - z) * scaled) - z) / (2 * (1 - z))
+    # Exact for a converged z; the rescale only absorbs rounding
+    return proportional(fair)
+
+# Margin removal methods: name -> function of the 1/odds array, one per margin_methods.MARGIN_METHOD_NAMES
+MARGIN_METHODS = {
+    'proportional': proportional,
+    'shin': shin,
+    'power': power,
+}
+
+def fair_probabilities(odds, method=DEFAULT_METHOD):
+    """Turn rows of decimal odds into margin-free probabilities in one array pass
+
+    Args:
+        odds: (rows, outcomes) array of decimal odds, e.g. home/draw/away
+        method: One of MARGIN_METHODS
+
+    Returns:
+        Tuple (fair probabilities (0-1, rows sum to 1), overround per row);
+        rows with missing odds are NaN in both
+    """
+    if method not in MARGIN_METHODS:
+        raise ValueError(f"Unknown margin method '{method}', choose from {', '.join(MARGIN_METHODS)}")
+    inverse = inverse_odds(np.atleast_2d(odds))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fair = MARGIN_METHODS[method](inverse)
+    return fair, inverse.sum(axis=1) - 1
+
+def overround_ok(overround_values, band=OVERROUND_BAND):
+    """True for rows whose overround lies inside band (missing odds are never ok)"""
+    low, high = band
+    overround_values = np.asarray(overround_values, dtype=float)
+    return (overround_values >= low) & (overround_values <= high)
+
+def add_fair_probabilities(df, method=DEFAULT_METHOD, band=OVERROUND_BAND):
+    """Add fair_*_prob_%, overround_% and overround_ok columns to a matched frame
+
+    Rows outside the overround band keep their flag but get NaN fair probabilities.
+
+    Returns:
+        The same DataFrame
+    """
+    odds = np.column_stack([df[odds_col].to_numpy(dtype=float) for odds_col, _ in FAIR_COLUMNS])
+    fair, margin = fair_probabilities(odds, method)
+    ok = overround_ok(margin, band)
+    fair[~ok] = np.nan
+    for i, (_, fair_col) in enumerate(FAIR_COLUMNS):
+        df[fair_col] = np.round(fair[:, i] * 100, 1)
+    df['overround_%'] = np.round(margin * 100, 1)
+    df['overround_ok'] = ok
+    return df
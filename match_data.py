@@ -1,11 +1,15 @@
 import pandas as pd
-from datetime import datetime
+import argparse
+import json
+import os
+import time
 import numpy as np
-from team_mappings import TEAM_MAP
-
-# Load the CSV files
-opta_df = pd.read_csv('opta_predictions.csv')
-unibet_df = pd.read_csv('unibet_predictions.csv')  # Changed from unibet_odds.csv to match new file name
+from team_mappings import team_alias
+from team_names import normalize_team_name
+from team_resolver import LEARNED_ALIASES_FILE, TeamResolver, load_learned_aliases, save_learned_aliases
+from history_store import HISTORY_DIR, load_latest_snapshot
+from margins import DEFAULT_METHOD, MARGIN_METHODS, OVERROUND_BAND, add_fair_probabilities
+from metrics import METRICS
 
 # Mapping dictionaries
 COMPETITION_MAP = {
@@ -23,223 +27,610 @@ COMPETITION_MAP = {
     'SEA': 'Ita',  # Alternative code for Serie A
     'LL': 'Spa',   # Alternative code for La Liga
     'LI1': 'Fra',  # Alternative code for Ligue 1
+    'CHA': 'Eng',  # Championship matches are under 'Eng' (Champions League is UCL)
+    'LEO': 'Eng',  # League One
+    'LET': 'Eng',  # League Two
 }
 
-def convert_time_format(date_time):
-    """Convert Opta's date_time format to match Unibet's"""
-    try:
-        # Parse "Feb 19 @ 18:45" format
-        dt = datetime.strptime(date_time, '%b %d @ %H:%M')
-        return dt.strftime('%H:%M')  # Return only time in HH:MM format
-    except:
-        return date_time
-
 def odds_to_probabilities(odds):
-    """Convert betting odds to probabilities"""
+    """Convert betting odds to raw implied probabilities (margin included; see margins.py)"""
     return 1 / odds * 100
 
-def normalize_team_name(name):
-    """Normalize team name for better matching by removing common variations"""
-    normalized = name.lower()
-    
-    # Common prefixes/suffixes to remove
-    replacements = {
-        'fc ': '', ' fc': '', 
-        'asc ': '', ' asc': '',
-        'ac ': '', ' ac': '',
-        'as ': '', ' as': '',
-        'ss ': '', ' ss': '',
-        'cf ': '', ' cf': '',
-        'united': 'utd',
-        'real ': '',
-        'racing ': '',
-        'olympic ': '',
-        'olympique ': '',
-        'athletic ': '',
-        'atletico ': '',
-        'rc ': '',
-        'afc ': '',
-        'rcd ': '',
-        'sd ': '',
-        'ud ': '',
-        'cd ': '',
-        'stade ': '',
-        'saint': 'st',
-        'sporting ': '',
-        'deportivo ': '',
-        'rovers': '',
-        'albion': '',
-        'city': '',
-        'town': '',
-        ' & ': '',
-        ' and ': '',
-    }
-    
-    # Remove accents and special characters
-    replacements.update({
-        'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
-        'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
-        'í': 'i', 'ì': 'i', 'î': 'i', 'ï': 'i',
-        'ó': 'o', 'ò': 'o', 'õ': 'o', 'ô': 'o',
-        'ú': 'u', 'ù': 'u', 'û': 'u', 'ü': 'u',
-        'ý': 'y', 'ÿ': 'y',
-        'ñ': 'n',
-        'ß': 'ss',
-        'ø': 'o',
-        'æ': 'ae',
-        '-': ' ',
-        '.': '',
-    })
+# Kickoff formats: Opta's "Mar 7 @ 20:30" and Unibet's "07 Mar 20:00", neither with a year
+KICKOFF_FORMATS = ['%Y %b %d @ %H:%M', '%Y %d %b %H:%M']
+
+# Kickoffs this far apart still count as the same fixture. It absorbs a one-hour
+# time zone difference between sources and is far below the gap between rounds,
+# so a rematch or reverse fixture later in a dump is not joined. Also the width
+# of the kickoff buckets Unibet games are indexed by.
+KICKOFF_TOLERANCE = pd.Timedelta(minutes=90)
+
+def parse_kickoffs(date_times, reference=None):
+    """Parse Opta or Unibet kickoff strings into timestamps, all at once
     
-    for old, new in replacements.items():
-        normalized = normalized.replace(old, new)
+    The sources give no year, so each kickoff is put in the year that brings
+    it closest to the reference time.
     
-    # Remove multiple spaces and strip
-    normalized = ' '.join(normalized.split())
-    return normalized.strip()
+    Args:
+        date_times: Series of kickoff strings in either source's format
+        reference: Time the listings are from (default: now)
+        
+    Returns:
+        Series of timestamps, NaT where a string is in neither format
+    """
+    reference = pd.Timestamp.now() if reference is None else pd.Timestamp(reference)
+    dated = f"{reference.year} " + date_times.astype(str).str.strip()
+    kickoffs = pd.Series(pd.NaT, index=date_times.index, dtype='datetime64[ns]')
+    for kickoff_format in KICKOFF_FORMATS:
+        missing = kickoffs.isna()
+        if not missing.any():
+            break
+        kickoffs[missing] = pd.to_datetime(dated[missing], format=kickoff_format, errors='coerce')
+    half_year = pd.Timedelta(days=183)
+    kickoffs = kickoffs.mask(kickoffs - reference > half_year, kickoffs - pd.DateOffset(years=1))
+    return kickoffs.mask(reference - kickoffs > half_year, kickoffs + pd.DateOffset(years=1))
 
-def find_team_match(team_name, df_column):
-    """Find if a team name matches in the given dataframe column using more flexible matching"""
-    df_column = df_column.astype(str)
+def build_team_index(unibet_df, aliases=None, reference=None, kickoff_tolerance=KICKOFF_TOLERANCE):
+    """Precompute the Unibet team-name lookups used by find_matching_games
     
-    # First try exact mapping
-    if team_name in TEAM_MAP:
-        mapped_name = TEAM_MAP[team_name]
-        exact_match = df_column.str.contains(mapped_name, case=False, na=False, regex=False)
-        if exact_match.any():
-            return exact_match
+    Builds, once per Unibet frame, the four columns the matcher compares
+    against (home, away and both halves of a "Home - Away" home_team). For each
+    column the distinct names are stored with their upper-cased and normalized
+    forms, the row positions they occur at and the name at each row, so a team
+    is resolved against the distinct names only once, or against just the
+    names in a fixture's kickoff window.
     
-    # Try normalized matching for both the original and mapped name
-    team_variations = [team_name]
-    if team_name in TEAM_MAP:
-        team_variations.append(TEAM_MAP[team_name])
+    The kickoffs are parsed and the games grouped by (competition, kickoff
+    bucket), buckets being kickoff_tolerance wide, so a fixture is only
+    compared with the games in the buckets around its own kickoff.
     
-    # Normalize all variations of team names
+    Args:
+        unibet_df: DataFrame with Unibet odds
+        aliases: Learned aliases {competition: {Opta name: Unibet name}},
+            extended in place as the resolver accepts new ones
+        reference: Time the listings are from, for parse_kickoffs (default: now)
+        kickoff_tolerance: Largest kickoff difference between an Opta fixture
+            and its Unibet game
+        
+    Returns:
+        dict: Index consumed by lookup_team_rows, lookup_fixture_rows and
+        resolve_fixture_rows
+    """
+    split_home_team = unibet_df['home_team'].str.split(' - ')
+    columns = {
+        'home_team': unibet_df['home_team'],
+        'away_team': unibet_df['away_team'],
+        'split_home': split_home_team.str[0],
+        'split_away': split_home_team.str[1],
+    }
+    
+    index = {'unibet_df': unibet_df, 'competitions': {}, 'aliases': {} if aliases is None else aliases,
+             'resolvers': {}, 'learned': []}
+    
+    # Kickoffs as int64 nanoseconds; games with an unreadable kickoff stay candidates for every fixture
+    reference = pd.Timestamp.now() if reference is None else pd.Timestamp(reference)
+    kickoffs = parse_kickoffs(unibet_df['date_time'], reference)
+    known = kickoffs.notna().to_numpy()
+    index['reference'] = reference
+    index['tolerance'] = kickoff_tolerance.value
+    index['kickoffs'] = kickoffs.to_numpy().view('int64')
+    index['unknown_kickoff'] = frozenset(np.flatnonzero(~known).tolist())
+    known_positions = np.flatnonzero(known)
+    competitions = unibet_df['competition'].astype(str)
+    buckets = pd.DataFrame({
+        'competition': competitions.to_numpy()[known],
+        'bucket': index['kickoffs'][known] // index['tolerance'],
+    })
+    index['buckets'] = {
+        key: known_positions[group].tolist()
+        for key, group in buckets.groupby(['competition', 'bucket'], sort=False).indices.items()
+    }
+    index['competition_positions'] = {
+        competition: group.tolist() for competition, group in competitions.groupby(competitions, sort=False).indices.items()
+    }
+    index['competition_names'] = {}
+    index['fixtures'] = {}
+    for key, column in columns.items():
+        values = column.astype(str)
+        positions = {}
+        for position, value in enumerate(values):
+            positions.setdefault(value, []).append(position)
+        names = list(positions)
+        index[key] = {
+            'names': names,
+            'upper': [name.upper() for name in names],
+            'normalized': [normalize_team_name(name) for name in names],
+            'positions': positions,
+            'codes': pd.Index(names).get_indexer(values).tolist(),
+            'teams': {},
+            'rules': {},
+        }
+    return index
+
+def _team_rules(team_name, alias):
+    """Matching rules for one team: the upper-cased alias and the padded normalized variations"""
+    team_variations = [team_name]
+    if alias is not None:
+        team_variations.append(alias)
     normalized_variations = [normalize_team_name(v) for v in team_variations]
-    normalized_column = df_column.apply(normalize_team_name)
     
-    # Try to match any of the normalized variations
-    return normalized_column.apply(lambda x: any(v in x or x in v for v in normalized_variations))
+    # Whole words only: 'inter' must not match 'internacional'
+    padded_variations = [f" {v} " for v in normalized_variations]
+    return (alias.upper() if alias is not None else None), padded_variations
 
-def find_matching_games():
-    matches = []
-    recommendations = []
+def _matching_names(rules, candidates):
+    """Keys of the candidate (key, upper-cased name, normalized name) triples that match a team
     
-    # Convert DataFrame columns to string type
-    unibet_df = pd.read_csv('unibet_predictions.csv')
-    for col in ['competition', 'home_team', 'away_team']:
-        unibet_df[col] = unibet_df[col].astype(str)
+    Names containing the alias win; only when there are none are the
+    normalized names compared.
+    """
+    mapped_upper, padded_variations = rules
+    # First try exact mapping
+    if mapped_upper is not None:
+        hits = [key for key, upper, _ in candidates if mapped_upper in upper]
+        if hits:
+            return hits
     
-    # Get available competitions for logging
-    available_competitions = unibet_df['competition'].unique()
+    # Fall back to normalized matching for both the original and mapped name
+    return [
+        key for key, _, x in candidates
+        if any(v in f" {x} " or f" {x} " in v for v in padded_variations)
+    ]
+
+def _resolve_team_rows(entry, team_name, alias):
+    """Apply a team's matching rules to the distinct names of one indexed column"""
+    hits = _matching_names(_team_rules(team_name, alias), list(zip(entry['names'], entry['upper'], entry['normalized'])))
+    return frozenset(pos for name in hits for pos in entry['positions'][name])
+
+def lookup_team_rows(index, column, team_name, opta_comp=None, rows=None):
+    """Return the row positions in an indexed Unibet column that match a team name
     
-    # Process each Opta prediction
-    for _, opta_row in opta_df.iterrows():
-        # Convert competition name
-        opta_comp = COMPETITION_MAP.get(opta_row['competition'], opta_row['competition'])
+    Args:
+        index: Index built by build_team_index
+        column: One of 'home_team', 'away_team', 'split_home', 'split_away'
+        team_name: Team name to look up
+        opta_comp: Competition whose team aliases apply to team_name
+        rows: Only compare the names at these row positions, e.g. a fixture's
+            kickoff window (default: every distinct name, cached per team)
         
+    Returns:
+        frozenset: Row positions whose name matches the team
+    """
+    entry = index[column]
+    alias = team_alias(opta_comp, team_name)
+    if rows is not None:
+        rules = entry['rules'].get((team_name, alias))
+        if rules is None:
+            rules = entry['rules'][(team_name, alias)] = _team_rules(team_name, alias)
+        by_code = {}
+        for position in rows:
+            by_code.setdefault(entry['codes'][position], []).append(position)
+        hits = _matching_names(rules, [(code, entry['upper'][code], entry['normalized'][code]) for code in by_code])
+        return frozenset(position for code in hits for position in by_code[code])
+    
+    rows = entry['teams'].get((team_name, alias))
+    if rows is None:
+        rows = _resolve_team_rows(entry, team_name, alias)
+        entry['teams'][(team_name, alias)] = rows
+    return rows
+
+def lookup_competition_rows(index, opta_comp):
+    """Return the row positions of Unibet games in the competition(s) searched for opta_comp"""
+    rows = index['competitions'].get(opta_comp)
+    if rows is None:
+        # Compare the distinct competition names, not every row
+        competition = pd.Series(list(index['competition_positions']), dtype=object)
         # For Champions League games, look in both original competition and 'Cha'
-        competition_matches = (unibet_df['competition'].str.contains(opta_comp, case=False, na=False))
+        competition_matches = competition.str.contains(opta_comp, case=False, na=False)
         if opta_comp in ['Eng', 'Spa', 'Ita', 'Dui', 'Fra', 'Ned']:
-            competition_matches = (
-                (unibet_df['competition'] == opta_comp) | 
-                (unibet_df['competition'] == 'Cha')  # Also check Champions League
-            )
-        
-        # Get original and mapped team names
-        opta_home = opta_row['home_team']
-        opta_away = opta_row['away_team']
-        mapped_home = TEAM_MAP.get(opta_home, opta_home)
-        mapped_away = TEAM_MAP.get(opta_away, opta_away)
+            competition_matches = (competition == opta_comp) | (competition == 'Cha')
+        names = competition[competition_matches].tolist()
+        rows = frozenset(position for name in names for position in index['competition_positions'][name])
+        index['competitions'][opta_comp] = rows
+        index['competition_names'][opta_comp] = names
+    return rows
+
+def lookup_fixture_rows(index, opta_comp, kickoff):
+    """Return the row positions of Unibet games a fixture can be matched with
+    
+    These are the games of the fixture's competition(s) kicking off within the
+    index's tolerance of the fixture, found through the (competition, kickoff
+    bucket) groups, plus the competition's games with an unreadable kickoff.
+    
+    Args:
+        index: Index built by build_team_index
+        opta_comp: Unibet competition code of the fixture
+        kickoff: Fixture kickoff from parse_kickoffs (NaT: the whole competition)
         
-        # Filter Unibet data for matching games
-        matching_games = unibet_df[
-            competition_matches &
-            (
-                (find_team_match(mapped_home, unibet_df['home_team']) & 
-                 find_team_match(mapped_away, unibet_df['away_team']))
-                |
-                (find_team_match(mapped_home, unibet_df['home_team'].str.split(' - ').str[0]) & 
-                 find_team_match(mapped_away, unibet_df['home_team'].str.split(' - ').str[1]))
-            )
+    Returns:
+        frozenset: Row positions
+    """
+    competition_rows = lookup_competition_rows(index, opta_comp)
+    if pd.isna(kickoff):
+        return competition_rows
+    kickoff = pd.Timestamp(kickoff).value
+    rows = index['fixtures'].get((opta_comp, kickoff))
+    if rows is None:
+        tolerance = index['tolerance']
+        kickoffs = index['kickoffs']
+        rows = [
+            position
+            for competition in index['competition_names'][opta_comp]
+            for bucket in range((kickoff - tolerance) // tolerance, (kickoff + tolerance) // tolerance + 1)
+            for position in index['buckets'].get((competition, bucket), ())
+            if abs(kickoffs[position] - kickoff) <= tolerance
         ]
+        rows = frozenset(rows) | (competition_rows & index['unknown_kickoff'])
+        index['fixtures'][(opta_comp, kickoff)] = rows
+    return rows
+
+def _resolve_team_name(index, column, opta_comp, fixture_rows, team_name):
+    """Unibet name for a team in one indexed column among a fixture's candidate games, or None
+    
+    Returns:
+        tuple: (Unibet name or None, resolver score; None for a learned alias)
+    """
+    
+    entry = index[column]
+    alias = index['aliases'].get(opta_comp, {}).get(team_name)
+    if alias in entry['positions'] and not fixture_rows.isdisjoint(entry['positions'][alias]):
+        return alias, None
+    
+    resolver = index['resolvers'].get((column, fixture_rows))
+    if resolver is None:
+        names = [name for name in entry['names'] if not fixture_rows.isdisjoint(entry['positions'][name])]
+        resolver = TeamResolver(names)
+        index['resolvers'][(column, fixture_rows)] = resolver
+    return resolver.resolve(team_name, team_alias(opta_comp, team_name))
+
+def resolve_fixture_rows(index, opta_comp, fixture_rows, opta_home, opta_away):
+    """Fuzzy fallback for a fixture the team alias and normalized-name rules missed
+    
+    Both teams are looked up in the aliases learned in earlier runs, then
+    resolved with a TeamResolver over the Unibet names of the fixture's
+    candidate games. New aliases are learned only when both teams resolve to a
+    listed game.
+    
+    Args:
+        index: Index built by build_team_index
+        opta_comp: Unibet competition code of the fixture
+        fixture_rows: Row positions from lookup_fixture_rows
+        opta_home: Opta home team (code or name)
+        opta_away: Opta away team (code or name)
         
-        if not matching_games.empty:
-            unibet_game = matching_games.iloc[0]
-            
-            # Convert odds to probabilities - handling empty or invalid odds
-            try:
-                unibet_home_odds = float(unibet_game['home_odds']) if pd.notna(unibet_game['home_odds']) else 0
-                unibet_draw_odds = float(unibet_game['draw_odds']) if pd.notna(unibet_game['draw_odds']) else 0
-                unibet_away_odds = float(unibet_game['away_odds']) if pd.notna(unibet_game['away_odds']) else 0
-                
-                unibet_home_prob = odds_to_probabilities(unibet_home_odds) if unibet_home_odds > 0 else 0
-                unibet_draw_prob = odds_to_probabilities(unibet_draw_odds) if unibet_draw_odds > 0 else 0
-                unibet_away_prob = odds_to_probabilities(unibet_away_odds) if unibet_away_odds > 0 else 0
-            except (ValueError, ZeroDivisionError):
-                print(f"Invalid odds for {mapped_home} vs {mapped_away}")
-                continue
-            
-            match_data = {
-                'competition': opta_comp,
-                'date_time': opta_row['date_time'],
-                'home_team': mapped_home,
-                'away_team': mapped_away,
-                'opta_home_win_%': opta_row['home_win_%'],
-                'opta_draw_%': opta_row['draw_%'],
-                'opta_away_win_%': opta_row['away_win_%'],
-                'unibet_home_odds': unibet_home_odds,
-                'unibet_draw_odds': unibet_draw_odds,
-                'unibet_away_odds': unibet_away_odds,
-                'unibet_home_prob_%': round(unibet_home_prob, 1),
-                'unibet_draw_prob_%': round(unibet_draw_prob, 1),
-                'unibet_away_prob_%': round(unibet_away_prob, 1),
-                'prob_difference_home': round(opta_row['home_win_%'] - unibet_home_prob, 1),
-                'prob_difference_draw': round(opta_row['draw_%'] - unibet_draw_prob, 1),
-                'prob_difference_away': round(opta_row['away_win_%'] - unibet_away_prob, 1)
-            }
-            
-            # Only add valid matches where we have both probabilities
-            if all(v != 0 for v in [unibet_home_prob, unibet_draw_prob, unibet_away_prob]):
-                matches.append(match_data)
-                print(f"Matched: {mapped_home} vs {mapped_away} ({opta_comp})")
-                
-                # Add betting recommendations with more detailed odds info
-                threshold = 5  # Minimum probability difference to recommend a bet
-                if match_data['prob_difference_home'] > threshold:
-                    recommendations.append(
-                        f"Bet on {mapped_home} to win against {mapped_away} "
-                        f"(Unibet odds: {unibet_home_odds:.2f}, "
-                        f"Implied prob: {unibet_home_prob:.1f}%, "
-                        f"Opta prob: {opta_row['home_win_%']:.1f}%)"
-                    )
-                if match_data['prob_difference_draw'] > threshold:
-                    recommendations.append(
-                        f"Bet on draw between {mapped_home} and {mapped_away} "
-                        f"(Unibet odds: {unibet_draw_odds:.2f}, "
-                        f"Implied prob: {unibet_draw_prob:.1f}%, "
-                        f"Opta prob: {opta_row['draw_%']:.1f}%)"
-                    )
-                if match_data['prob_difference_away'] > threshold:
-                    recommendations.append(
-                        f"Bet on {mapped_away} to win against {mapped_home} "
-                        f"(Unibet odds: {unibet_away_odds:.2f}, "
-                        f"Implied prob: {unibet_away_prob:.1f}%, "
-                        f"Opta prob: {opta_row['away_win_%']:.1f}%)"
-                    )
-        else:
+    Returns:
+        tuple: (row positions, Unibet home name, Unibet away name); empty rows
+        and None names when the fixture stays unresolved
+    """
+    for home_column, away_column in (('home_team', 'away_team'), ('split_home', 'split_away')):
+        home, home_score = _resolve_team_name(index, home_column, opta_comp, fixture_rows, opta_home)
+        away, away_score = _resolve_team_name(index, away_column, opta_comp, fixture_rows, opta_away)
+        if home is None or away is None:
+            continue
+        rows = (fixture_rows
+                & frozenset(index[home_column]['positions'][home])
+                & frozenset(index[away_column]['positions'][away]))
+        if not rows:
+            continue
+        for team_name, name, score in ((opta_home, home, home_score), (opta_away, away, away_score)):
+            if score is not None:
+                index['aliases'].setdefault(opta_comp, {})[team_name] = name
+                index['learned'].append((opta_comp, team_name, name, score))
+        return rows, home, away
+    return frozenset(), None, None
+
+# Columns that identify a fixture and the inputs that feed its match row
+OPTA_FINGERPRINT_COLUMNS = ['competition', 'date_time', 'home_team', 'away_team', 'home_win_%', 'draw_%', 'away_win_%']
+UNIBET_FINGERPRINT_COLUMNS = ['competition', 'date_time', 'home_team', 'away_team', 'home_odds', 'draw_odds', 'away_odds']
+
+# Bookmaker of each odd when the odds are best prices across books (see odds_sources.best_prices)
+BOOK_COLUMNS = ['home_book', 'draw_book', 'away_book']
+
+# Previous run's match table, used by incremental mode
+MATCH_STATE_FILE = 'match_state.json'
+
+def fingerprint_rows(df, columns):
+    """Return a stable hex fingerprint per row of the given columns"""
+    hashes = pd.util.hash_pandas_object(df[columns], index=False)
+    return [f"{value:016x}" for value in hashes.tolist()]
+
+def load_match_state(state_file=MATCH_STATE_FILE):
+    """Load the previous run's match table (empty if missing or unreadable)
+    
+    Returns:
+        tuple: (fixtures keyed by Opta fingerprint, set of Unibet fingerprints seen)
+    """
+    if not os.path.exists(state_file):
+        return {}, set()
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state.get('fixtures', {}), set(state.get('unibet', []))
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable match state {state_file}: {e}")
+        return {}, set()
+
+def save_match_state(fixtures, unibet_fingerprints, state_file=MATCH_STATE_FILE):
+    """Write the match table atomically so an interrupted run keeps the old state"""
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'fixtures': fixtures, 'unibet': sorted(unibet_fingerprints)}, f,
+                  default=lambda value: value.item())
+    os.replace(tmp_file, state_file)
+
+def match_fixture(opta_row, team_index, verbose=True, kickoff=None):
+    """Match one Opta fixture against the indexed Unibet games
+    
+    Only the games of the fixture's competition kicking off within the
+    index's tolerance are considered; of several that match, the one closest
+    to the fixture's kickoff is used.
+    
+    Args:
+        opta_row: One row of the Opta predictions
+        team_index: Index built by build_team_index
+        verbose: Print the outcome for the fixture
+        kickoff: Fixture kickoff, when parse_kickoffs already ran over all
+            fixtures (default: parse opta_row's date_time)
+    
+    Returns:
+        tuple: (match_data, recommendations, unibet row position), or None
+        when there is no usable Unibet game
+    """
+    unibet_df = team_index['unibet_df']
+    
+    # Convert competition name
+    opta_comp = COMPETITION_MAP.get(opta_row['competition'], opta_row['competition'])
+    if kickoff is None:
+        kickoff = parse_kickoffs(pd.Series([opta_row['date_time']]), team_index['reference']).iloc[0]
+    fixture_rows = lookup_fixture_rows(team_index, opta_comp, kickoff)
+    
+    # Get original and mapped team names
+    opta_home = opta_row['home_team']
+    opta_away = opta_row['away_team']
+    mapped_home = team_alias(opta_comp, opta_home) or opta_home
+    mapped_away = team_alias(opta_comp, opta_away) or opta_away
+    
+    # Find Unibet games listed as home/away or as a single "Home - Away" name,
+    # comparing only the names in the kickoff window when the kickoff is known
+    window = None if pd.isna(kickoff) else fixture_rows
+    candidate_rows = fixture_rows & (
+        (lookup_team_rows(team_index, 'home_team', mapped_home, opta_comp, window) &
+         lookup_team_rows(team_index, 'away_team', mapped_away, opta_comp, window))
+        |
+        (lookup_team_rows(team_index, 'split_home', mapped_home, opta_comp, window) &
+         lookup_team_rows(team_index, 'split_away', mapped_away, opta_comp, window))
+    )
+    
+    if not candidate_rows:
+        candidate_rows, resolved_home, resolved_away = resolve_fixture_rows(
+            team_index, opta_comp, fixture_rows, opta_home, opta_away
+        )
+        if candidate_rows:
+            if verbose:
+                print(f"Resolved: {opta_home} vs {opta_away} -> {resolved_home} vs {resolved_away} ({opta_comp})")
+            mapped_home, mapped_away = resolved_home, resolved_away
+    
+    if not candidate_rows:
+        if verbose:
             print(f"No match found: {mapped_home} vs {mapped_away} ({opta_comp})")
             print(f"Looking for competition containing: {opta_comp}")
             print(f"Available competitions in Unibet data: {unibet_df['competition'].unique()}")
+        return None
+    
+    if pd.isna(kickoff):
+        unibet_position = min(candidate_rows)
+    else:
+        # Closest kickoff first, games with an unreadable kickoff last
+        kickoffs = team_index['kickoffs']
+        kickoff = pd.Timestamp(kickoff).value
+        unibet_position = min(candidate_rows, key=lambda position: (
+            position in team_index['unknown_kickoff'], abs(int(kickoffs[position]) - kickoff), position))
+    unibet_game = unibet_df.iloc[unibet_position]
+    
+    # Convert odds to probabilities - handling empty or invalid odds
+    try:
+        unibet_home_odds = float(unibet_game['home_odds']) if pd.notna(unibet_game['home_odds']) else 0
+        unibet_draw_odds = float(unibet_game['draw_odds']) if pd.notna(unibet_game['draw_odds']) else 0
+        unibet_away_odds = float(unibet_game['away_odds']) if pd.notna(unibet_game['away_odds']) else 0
+        
+        unibet_home_prob = odds_to_probabilities(unibet_home_odds) if unibet_home_odds > 0 else 0
+        unibet_draw_prob = odds_to_probabilities(unibet_draw_odds) if unibet_draw_odds > 0 else 0
+        unibet_away_prob = odds_to_probabilities(unibet_away_odds) if unibet_away_odds > 0 else 0
+    except (ValueError, ZeroDivisionError):
+        if verbose:
+            print(f"Invalid odds for {mapped_home} vs {mapped_away}")
+        return None
+    
+    match_data = {
+        'competition': opta_comp,
+        'date_time': opta_row['date_time'],
+        'home_team': mapped_home,
+        'away_team': mapped_away,
+        'opta_home_win_%': opta_row['home_win_%'],
+        'opta_draw_%': opta_row['draw_%'],
+        'opta_away_win_%': opta_row['away_win_%'],
+        'unibet_home_odds': unibet_home_odds,
+        'unibet_draw_odds': unibet_draw_odds,
+        'unibet_away_odds': unibet_away_odds,
+        'unibet_home_prob_%': round(unibet_home_prob, 1),
+        'unibet_draw_prob_%': round(unibet_draw_prob, 1),
+        'unibet_away_prob_%': round(unibet_away_prob, 1),
+        'prob_difference_home': round(opta_row['home_win_%'] - unibet_home_prob, 1),
+        'prob_difference_draw': round(opta_row['draw_%'] - unibet_draw_prob, 1),
+        'prob_difference_away': round(opta_row['away_win_%'] - unibet_away_prob, 1)
+    }
+    for book_col in BOOK_COLUMNS:
+        if book_col in unibet_game.index:
+            match_data[book_col] = unibet_game[book_col]
+    
+    # Only add valid matches where we have both probabilities
+    if not all(v != 0 for v in [unibet_home_prob, unibet_draw_prob, unibet_away_prob]):
+        return None
+    if verbose:
+        print(f"Matched: {mapped_home} vs {mapped_away} ({opta_comp})")
+    
+    # Add betting recommendations with more detailed odds info
+    recommendations = []
+    threshold = 5  # Minimum probability difference to recommend a bet
+    if match_data['prob_difference_home'] > threshold:
+        recommendations.append(
+            f"Bet on {mapped_home} to win against {mapped_away} "
+            f"(Unibet odds: {unibet_home_odds:.2f}, "
+            f"Implied prob: {unibet_home_prob:.1f}%, "
+            f"Opta prob: {opta_row['home_win_%']:.1f}%)"
+        )
+    if match_data['prob_difference_draw'] > threshold:
+        recommendations.append(
+            f"Bet on draw between {mapped_home} and {mapped_away} "
+            f"(Unibet odds: {unibet_draw_odds:.2f}, "
+            f"Implied prob: {unibet_draw_prob:.1f}%, "
+            f"Opta prob: {opta_row['draw_%']:.1f}%)"
+        )
+    if match_data['prob_difference_away'] > threshold:
+        recommendations.append(
+            f"Bet on {mapped_away} to win against {mapped_home} "
+            f"(Unibet odds: {unibet_away_odds:.2f}, "
+            f"Implied prob: {unibet_away_prob:.1f}%, "
+            f"Opta prob: {opta_row['away_win_%']:.1f}%)"
+        )
+    return match_data, recommendations, unibet_position
+
+def find_matching_games(opta_df=None, unibet_df=None, incremental=False, state_file=MATCH_STATE_FILE,
+                        output_file='matched_predictions.csv', aliases_file=LEARNED_ALIASES_FILE,
+                        kickoff_tolerance=KICKOFF_TOLERANCE, margin_method=DEFAULT_METHOD,
+                        overround_band=OVERROUND_BAND, reference=None):
+    """Match Opta predictions with Unibet odds and save them to matched_predictions.csv
+    
+    In incremental mode the previous run's match table is loaded from
+    state_file. A fixture is skipped when its teams, kickoff and Opta
+    probabilities are unchanged and the Unibet game it matched (same teams,
+    kickoff and odds) is still listed. Unmatched fixtures are only retried when
+    Unibet lists a game in their competition and kickoff window that it did not
+    list before. New and changed fixtures are matched again, and fixtures no
+    longer listed by Opta are dropped.
+    
+    Args:
+        opta_df: Opta predictions (default: read opta_predictions.csv)
+        unibet_df: Unibet odds (default: read unibet_predictions.csv), or
+            best prices across bookmakers whose BOOK_COLUMNS are carried over
+        incremental: Reuse unchanged matches from state_file
+        state_file: Where the match table is kept between runs (None: do not keep it)
+        output_file: CSV to write the matches to (None: only return them)
+        aliases_file: Team aliases the fuzzy resolver learned, loaded before
+            matching and updated when it learns new ones (None: do not keep them)
+        kickoff_tolerance: Largest kickoff difference between an Opta fixture
+            and its Unibet game (Timedelta)
+        margin_method: Margin removal method for the fair_*_prob_% columns;
+            use the one the analysis uses (see margins.MARGIN_METHODS)
+        overround_band: (low, high) overround of a usable book; pass
+            margins.BEST_PRICE_OVERROUND_BAND for best prices across books
+        reference: Time the listings are from, for parse_kickoffs (default:
+            now); pass the snapshot time when matching stored runs
+    
+    Returns:
+        DataFrame of matched games sorted by date_time and competition
+        (empty when nothing matched)
+    """
+    matches = []
+    recommendations = []
+    
+    # Load the CSV files unless the data was passed in
+    if opta_df is None:
+        opta_df = pd.read_csv('opta_predictions.csv')
+    if unibet_df is None:
+        unibet_df = pd.read_csv('unibet_predictions.csv')
+    
+    # Convert DataFrame columns to string type
+    unibet_df = unibet_df.copy()
+    for col in ['competition', 'home_team', 'away_team']:
+        unibet_df[col] = unibet_df[col].astype(str)
+    
+    # Normalize the Unibet team names once instead of once per Opta fixture
+    aliases = {}
+    if aliases_file:
+        aliases = load_learned_aliases(aliases_file)
+    with METRICS.timer('match.index'):
+        team_index = build_team_index(unibet_df, aliases, reference, kickoff_tolerance)
+    opta_kickoffs = parse_kickoffs(opta_df['date_time'], team_index['reference'])
+    
+    opta_fingerprints = fingerprint_rows(opta_df, OPTA_FINGERPRINT_COLUMNS)
+    unibet_fingerprints = fingerprint_rows(unibet_df, UNIBET_FINGERPRINT_COLUMNS)
+    current_unibet = set(unibet_fingerprints)
+    previous, previous_unibet = load_match_state(state_file) if incremental else ({}, set())
+    new_unibet_rows = frozenset(
+        position for position, unibet_fp in enumerate(unibet_fingerprints)
+        if unibet_fp not in previous_unibet
+    )
+    fixtures = {}
+    skipped = rematched = 0
+    start = time.perf_counter()
+    
+    # Process each Opta prediction
+    for opta_fp, kickoff, (_, opta_row) in zip(opta_fingerprints, opta_kickoffs, opta_df.iterrows()):
+        state = previous.get(opta_fp)
+        if state and state['match']:
+            unchanged = state['unibet'] in current_unibet
+        elif state:
+            opta_comp = COMPETITION_MAP.get(opta_row['competition'], opta_row['competition'])
+            unchanged = not (lookup_fixture_rows(team_index, opta_comp, kickoff) & new_unibet_rows)
+        else:
+            unchanged = False
+        if unchanged:
+            skipped += 1
+        else:
+            rematched += 1
+            result = match_fixture(opta_row, team_index, kickoff=kickoff)
+            state = {'unibet': None, 'match': None, 'recommendations': []}
+            if result:
+                match_data, match_recommendations, unibet_position = result
+                state = {
+                    'unibet': unibet_fingerprints[unibet_position],
+                    'match': match_data,
+                    'recommendations': match_recommendations,
+                }
+        fixtures[opta_fp] = state
+        if state['match']:
+            matches.append(state['match'])
+            recommendations.extend(state['recommendations'])
+    
+    dropped = len(set(previous) - set(opta_fingerprints))
+    METRICS.observe('match.fixtures', time.perf_counter() - start)
+    METRICS.gauge('match.rows_in', len(opta_df))
+    METRICS.gauge('match.unibet_rows', len(unibet_df))
+    METRICS.gauge('match.rows_out', len(matches))
+    METRICS.gauge('match.hit_rate', round(len(matches) / len(opta_df), 4) if len(opta_df) else 0.0)
+    METRICS.count('match.rematched', rematched)
+    METRICS.count('match.skipped', skipped)
+    METRICS.count('match.learned_aliases', len(team_index['learned']))
+    if state_file:
+        save_match_state(fixtures, current_unibet, state_file)
+    if team_index['learned']:
+        print(f"\nLearned {len(team_index['learned'])} team aliases: " + ", ".join(
+            f"{name} -> {resolved} ({competition}, {score:.2f})" for competition, name, resolved, score in team_index['learned']))
+        if aliases_file:
+            save_learned_aliases(team_index['aliases'], aliases_file)
+    if incremental:
+        print(f"\nIncremental matching: {skipped} fixtures skipped, {rematched} re-matched, {dropped} dropped")
     
     # Create DataFrame and save to CSV
     if matches:
         matched_df = pd.DataFrame(matches)
         # Sort by date_time and competition
         matched_df = matched_df.sort_values(['date_time', 'competition'])
-        # Save to CSV
-        matched_df.to_csv('matched_predictions.csv', index=False)
-        print(f"\nSaved {len(matches)} matched games to matched_predictions.csv")
+        # Margin-free probabilities and overround flags for the whole frame at once
+        matched_df = add_fair_probabilities(matched_df, margin_method, overround_band)
+        flagged = int((~matched_df['overround_ok']).sum())
+        if flagged:
+            low, high = overround_band
+            print(f"\n{flagged} matched games have an overround outside {low:.0%} to {high:.0%} and will not be bet on")
+        # Save to CSV unless an incremental run found nothing to update
+        if output_file is None:
+            print(f"\nMatched {len(matches)} games")
+        elif incremental and not rematched and not dropped and os.path.exists(output_file):
+            print(f"\n{output_file} is up to date ({len(matches)} matched games)")
+        else:
+            matched_df.to_csv(output_file, index=False)
+            print(f"\nSaved {len(matches)} matched games to {output_file}")
         print("\nSample of matched data:")
         print(matched_df.head())
         
@@ -263,9 +654,35 @@ def find_matching_games():
             print("\nBetting Recommendations:")
             for recommendation in recommendations:
                 print(recommendation)
+        return matched_df
     else:
         print("No matches were found")
+        return pd.DataFrame()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Match Opta predictions with Unibet odds')
+    parser.add_argument('--from_history', action='store_true', help='Use the latest snapshots in the history store instead of the CSV files')
+    parser.add_argument('--history_dir', type=str, default=HISTORY_DIR, help='History store directory')
+    parser.add_argument('--incremental', action='store_true', help='Only re-match fixtures that are new or changed since the previous run')
+    parser.add_argument('--state_file', type=str, default=MATCH_STATE_FILE, help='Match table kept between runs for --incremental')
+    parser.add_argument('--aliases_file', type=str, default=LEARNED_ALIASES_FILE, help='Team aliases learned by the fuzzy resolver, kept between runs')
+    parser.add_argument('--kickoff_tolerance', type=float, default=KICKOFF_TOLERANCE.total_seconds() / 60,
+                        help='Largest kickoff difference in minutes between an Opta fixture and its Unibet game (default: 90)')
+    parser.add_argument('--margin_method', choices=list(MARGIN_METHODS), default=DEFAULT_METHOD, help=f'How the bookmaker margin is removed for the fair probability columns (default: {DEFAULT_METHOD})')
+    args = parser.parse_args()
+    kickoff_tolerance = pd.Timedelta(minutes=args.kickoff_tolerance)
+    
     print("Starting to match games...")
-    find_matching_games()
\ No newline at end of file
+    if args.from_history:
+        find_matching_games(
+            load_latest_snapshot('opta', root=args.history_dir),
+            load_latest_snapshot('unibet', root=args.history_dir),
+            incremental=args.incremental,
+            state_file=args.state_file,
+            aliases_file=args.aliases_file,
+            kickoff_tolerance=kickoff_tolerance,
+            margin_method=args.margin_method,
+        )
+    else:
+        find_matching_games(incremental=args.incremental, state_file=args.state_file, aliases_file=args.aliases_file,
+                            kickoff_tolerance=kickoff_tolerance, margin_method=args.margin_method)
\ No newline at end of file
@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+# JSON report of the last run's timers, counters and gauges
+METRICS_FILE = 'run_metrics.json'
+
+# Set for scraper subprocesses: the file a child writes its own report to before exiting
+CHILD_METRICS_ENV = 'OPTA_BETS_CHILD_METRICS'
+
+# Prefix of every series in the Prometheus text file
+PROMETHEUS_PREFIX = 'opta_bets'
+
+# Default --profile output: cProfile stats, or an HTML page when pyinstrument is installed
+PROFILE_FILE = 'run_profile.prof'
+PROFILE_HTML_FILE = 'run_profile.html'
+
+class _Timer:
+    """Context manager behind Metrics.timer; a class is cheaper than @contextmanager"""
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+class Metrics:
+    """Thread-safe timers, counters and gauges for one process
+
+    Names are dotted, source or stage first: 'unibet.fetch', 'stage.match',
+    'match.fixtures'. A timer keeps how often it ran, the total and the
+    longest seconds; a counter adds up; a gauge keeps the last value set.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.timers = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe(self, name, seconds):
+        """Record one run of a timer"""
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+            timer['count'] += 1
+            timer['seconds'] += seconds
+            if seconds > timer['max_seconds']:
+                timer['max_seconds'] = seconds
+
+    def timer(self, name):
+        """Context manager timing the with-block, also when it raises"""
+        return _Timer(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of a function"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        """Add value to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        """Set a gauge to its latest value"""
+        with self._lock:
+            self.gauges[name] = value
+
+    def merge(self, report):
+        """Add a report from another process (e.g. a scraper subprocess) to this one"""
+        for name, timer in report.get('timers', {}).items():
+            with self._lock:
+                own = self.timers.setdefault(name, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                own['count'] += timer['count']
+                own['seconds'] += timer['seconds']
+                own['max_seconds'] = max(own['max_seconds'], timer['max_seconds'])
+        for name, value in report.get('counters', {}).items():
+            self.count(name, value)
+        for name, value in report.get('gauges', {}).items():
+            self.gauge(name, value)
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self.started = datetime.now().isoformat(timespec='seconds')
+            self.timers.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def report(self):
+        """Return the metrics as a JSON-serializable dict"""
+        with self._lock:
+            return {
+                'started': self.started,
+                'updated': datetime.now().isoformat(timespec='seconds'),
+                'pid': os.getpid(),
+                'timers': {
+                    name: {'count': timer['count'], 'seconds': round(timer['seconds'], 6),
+                           'max_seconds': round(timer['max_seconds'], 6)}
+                    for name, timer in sorted(self.timers.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': dict(sorted(self.gauges.items())),
+            }
+
+    def write_json(self, path):
+        """Write the report atomically"""
+        _write_atomic(path, json.dumps(self.report(), indent=2, default=str))
+
+    def write_prometheus(self, path, prefix=PROMETHEUS_PREFIX):
+        """Write the metrics in the Prometheus text format, e.g. for node_exporter's textfile collector"""
+        report = self.report()
+        lines = []
+
+        def series(metric, kind, help_text, values):
+            if not values:
+                return
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for name, value in values:
+                lines.append(f'{prefix}_{metric}{{name="{_label(name)}"}} {_number(value)}')
+
+        timers = report['timers'].items()
+        series('timer_seconds_total', 'counter', 'Seconds spent in each timed step',
+               [(name, timer['seconds']) for name, timer in timers])
+        series('timer_calls_total', 'counter', 'Times each timed step ran',
+               [(name, timer['count']) for name, timer in timers])
+        series('timer_max_seconds', 'gauge', 'Longest single run of each timed step',
+               [(name, timer['max_seconds']) for name, timer in timers])
+        series('events_total', 'counter', 'Counted events, rows and bytes', report['counters'].items())
+        series('value', 'gauge', 'Latest value of each gauge',
+               [(name, value) for name, value in report['gauges'].items() if isinstance(value, (int, float))])
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+def _label(name):
+    return str(name).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+def _write_atomic(path, text):
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+# Metrics of this process; the module functions below record into it
+METRICS = Metrics()
+timer = METRICS.timer
+timed = METRICS.timed
+count = METRICS.count
+gauge = METRICS.gauge
+
+def load_report(path):
+    """Read a JSON report written by Metrics.write_json (None if missing or unreadable)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def export_child_metrics():
+    """Write this process's report where the parent asked for it, if it did
+
+    Scrapers call this before exiting; script_utils sets CHILD_METRICS_ENV
+    when it starts them and merges the report afterwards.
+    """
+    path = os.environ.get(CHILD_METRICS_ENV)
+    if path:
+        METRICS.write_json(path)
+
+def profile_call(func, *args, output=None, **kwargs):
+    """Call func under a profiler and write the profile
+
+    pyinstrument, a sampling profiler with little overhead, is used when it
+    is installed and writes an HTML page; otherwise cProfile writes a stats
+    file (open it with `python -m pstats` or snakeviz). The slowest calls are
+    printed either way.
+
+    Args:
+        func: Callable to profile, called with the remaining arguments
+        output: Profile file (default: run_profile.html or run_profile.prof)
+
+    Returns:
+        Whatever func returns
+    """
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+            output = output or PROFILE_HTML_FILE
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            print(profiler.output_text(unicode=False, color=False))
+            print(f"Sampling profile written to {output}")
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        output = output or PROFILE_FILE
+        profiler.dump_stats(output)
+        print("\nSlowest calls (cumulative time):")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+        print(f"Profile written to {output} (view with: python -m pstats {output})")
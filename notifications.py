@@ -0,0 +1,316 @@
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime
+
+from metrics import METRICS
+
+class Alert:
+    """One message for a set of recipients
+
+    Alerts that carry bets are merged with other bet alerts for the same
+    recipients when they arrive within the dispatcher's window.
+
+    Args:
+        subject: Message subject
+        body: HTML body
+        recipients: List of addresses (sinks without addresses ignore it)
+        bets: Optional list of bet dicts the body was rendered from
+    """
+
+    def __init__(self, subject, body, recipients, bets=None):
+        self.subject = subject
+        self.body = body
+        self.recipients = list(recipients)
+        self.bets = list(bets) if bets is not None else None
+        self.created = datetime.now()
+
+    def to_dict(self):
+        return {
+            'subject': self.subject,
+            'recipients': self.recipients,
+            'created': self.created.isoformat(timespec='seconds'),
+            'bets': self.bets,
+            'body': self.body,
+        }
+
+def coalesce_alerts(alerts):
+    """Merge bet alerts per recipient list; other alerts are kept as they are
+
+    Within a merged alert the newest entry wins for each (match, bet_type), and
+    the bets are re-ranked by confidence score and rendered again.
+    """
+    messages = []
+    bet_slots = {}
+    for alert in alerts:
+        if alert.bets is None:
+            messages.append(alert)
+            continue
+        key = tuple(alert.recipients)
+        if key not in bet_slots:
+            bet_slots[key] = len(messages)
+            messages.append([alert, {}, 0])
+        entry = messages[bet_slots[key]]
+        entry[0] = alert
+        entry[2] += 1
+        for bet in alert.bets:
+            entry[1][(bet['match'], bet['bet_type'])] = bet
+
+    coalesced = []
+    for message in messages:
+        if isinstance(message, Alert):
+            coalesced.append(message)
+            continue
+        last, bets, count = message
+        if count == 1:
+            coalesced.append(last)
+            continue
+        from email_utils import format_bets_as_html
+
+        ranked = sorted(bets.values(), key=lambda bet: bet['confidence_score'], reverse=True)
+        coalesced.append(Alert(last.subject, format_bets_as_html(ranked), last.recipients, ranked))
+    return coalesced
+
+class SmtpSink:
+    """Send alerts over one SMTP session that is kept open between batches
+
+    The session is checked with NOOP before each batch and re-opened (and
+    logged in again) when the server has dropped it.
+
+    Args:
+        sender: From address
+        user: Login name (None: do not log in, e.g. for a local test server)
+        password: Login password
+        host: SMTP server
+        port: SMTP port
+        use_ssl: Connect with SMTP_SSL (port 465) instead of plain SMTP
+        starttls: Upgrade a plain connection with STARTTLS
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, sender, user=None, password=None, host='smtp.gmail.com', port=465,
+                 use_ssl=True, starttls=False, timeout=30):
+        self.sender = sender
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.timeout = timeout
+        self._server = None
+        self.connections = 0
+        self.sent = 0
+
+    def _connect(self):
+        import smtplib
+
+        server_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        server = server_class(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.user:
+            server.login(self.user, self.password)
+        self._server = server
+        self.connections += 1
+
+    def _ensure_connected(self):
+        import smtplib
+
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._drop()
+        self._connect()
+
+    def _drop(self):
+        try:
+            self._server.close()
+        except Exception:
+            pass
+        self._server = None
+
+    def _send_blocking(self, alert):
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['Subject'] = alert.subject
+        msg['From'] = self.sender
+        msg['To'] = ', '.join(alert.recipients)
+        msg.attach(MIMEText(alert.body, 'html'))
+
+        self._ensure_connected()
+        try:
+            self._server.sendmail(self.sender, alert.recipients, msg.as_string())
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # The server closed an idle session between NOOP and send; retry once
+            self._drop()
+            self._connect()
+            self._server.sendmail(self.sender, alert.recipients, msg.as_string())
+        self.sent += 1
+
+    async def send(self, alert):
+        await asyncio.to_thread(self._send_blocking, alert)
+
+    async def close(self):
+        if self._server is not None:
+            server, self._server = self._server, None
+            try:
+                await asyncio.to_thread(server.quit)
+            except Exception:
+                server.close()
+
+class WebhookSink:
+    """POST each alert as JSON to a webhook URL
+
+    Args:
+        url: Endpoint that accepts a JSON body
+        timeout: Request timeout in seconds
+    """
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+        self.sent = 0
+
+    def _post_blocking(self, alert):
+        import requests
+
+        response = requests.post(self.url, json=alert.to_dict(), timeout=self.timeout)
+        response.raise_for_status()
+        self.sent += 1
+
+    async def send(self, alert):
+        await asyncio.to_thread(self._post_blocking, alert)
+
+    async def close(self):
+        pass
+
+class FileSink:
+    """Append each alert as one JSON line to a local file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.sent = 0
+
+    def _write_blocking(self, alert):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert.to_dict(), default=str) + '\n')
+        self.sent += 1
+
+    async def send(self, alert):
+        await asyncio.to_thread(self._write_blocking, alert)
+
+    async def close(self):
+        pass
+
+class NotificationDispatcher:
+    """Deliver alerts from a background asyncio loop so callers never wait on delivery
+
+    submit() only queues the alert. The loop collects alerts for `window`
+    seconds after the first one arrives, merges bet alerts per recipient list,
+    and hands each resulting message to every sink. A failing sink is logged
+    and does not stop the others.
+
+    Args:
+        sinks: Objects with async send(alert) and close() methods
+        window: Seconds to wait for more alerts before delivering a batch
+    """
+
+    def __init__(self, sinks, window=5.0):
+        self.sinks = list(sinks)
+        self.window = window
+        self.delivered = 0
+        self.failures = 0
+        self._loop = asyncio.new_event_loop()
+        self._queue = None
+        self._closing = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name='notifications', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._closing = asyncio.Event()
+        self._ready.set()
+        self._loop.run_until_complete(self._consume())
+        self._loop.close()
+
+    def submit(self, alert):
+        """Queue an alert for delivery; safe to call from any thread"""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, alert)
+
+    async def _next(self, timeout):
+        getter = asyncio.ensure_future(self._queue.get())
+        closing = asyncio.ensure_future(self._closing.wait())
+        done, _ = await asyncio.wait({getter, closing}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        closing.cancel()
+        if getter in done:
+            return getter.result()
+        getter.cancel()
+        return None
+
+    async def _consume(self):
+        while True:
+            alert = await self._next(None)
+            if alert is None:
+                # Closing: stop once nothing is left to deliver
+                if self._queue.empty():
+                    break
+                alert = self._queue.get_nowait()
+            batch = [alert]
+            # Keep collecting until the window ends (or right away when closing)
+            deadline = self._loop.time() + self.window
+            while not self._closing.is_set():
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                alert = await self._next(remaining)
+                if alert is not None:
+                    batch.append(alert)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._deliver(batch)
+        for sink in self.sinks:
+            try:
+                await sink.close()
+            except Exception as e:
+                print(f"Error closing {type(sink).__name__}: {e}")
+
+    async def _send(self, sink, alert):
+        with METRICS.timer(f'send.{type(sink).__name__}'):
+            await sink.send(alert)
+
+    async def _deliver(self, batch):
+        messages = coalesce_alerts(batch)
+        for alert in messages:
+            results = await asyncio.gather(*(self._send(sink, alert) for sink in self.sinks), return_exceptions=True)
+            for sink, result in zip(self.sinks, results):
+                if isinstance(result, Exception):
+                    self.failures += 1
+                    METRICS.count('send.failures')
+                    print(f"Failed to deliver '{alert.subject}' via {type(sink).__name__}: {result}")
+                else:
+                    self.delivered += 1
+                    METRICS.count('send.delivered')
+        METRICS.count('send.alerts', len(batch))
+        METRICS.count('send.messages', len(messages))
+        print(f"Delivered {len(batch)} alert(s) as {len(messages)} message(s)")
+
+    def close(self, timeout=60):
+        """Deliver everything still queued, close the sinks and stop the loop"""
+        if not self._thread.is_alive():
+            return
+        self._loop.call_soon_threadsafe(self._closing.set)
+        self._thread.join(timeout)
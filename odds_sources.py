@@ -0,0 +1,236 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from metrics import METRICS
+
+# Normalized odds record every source yields, one row per fixture
+ODDS_COLUMNS = ['competition', 'date_time', 'home_team', 'away_team', 'home_odds', 'draw_odds', 'away_odds']
+TEXT_COLUMNS = ['competition', 'date_time', 'home_team', 'away_team']
+OUTCOME_ODDS = ['home_odds', 'draw_odds', 'away_odds']
+
+# Fixture key for aggregating books: competition, kickoff date and normalized
+# team names; the date keeps a replay or a league game plus a cup tie of the
+# same pairing apart
+FIXTURE_KEY = ['competition', 'kickoff_date', 'home_key', 'away_key']
+
+# Registered source kinds: kind -> class (see register_source)
+SOURCE_KINDS = {}
+
+def register_source(kind):
+    """Class decorator that makes a source usable in a 'name=kind:argument' spec"""
+    def register(cls):
+        cls.kind = kind
+        SOURCE_KINDS[kind] = cls
+        return cls
+    return register
+
+def normalize_odds(df, bookmaker):
+    """Bring a source's frame into ODDS_COLUMNS with numeric odds and a bookmaker column
+
+    Odds that cannot be parsed (e.g. '' for a suspended market) become NaN.
+    """
+    missing = [column for column in ODDS_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Odds from {bookmaker} are missing columns: {', '.join(missing)}")
+    records = df[ODDS_COLUMNS].copy()
+    for column in TEXT_COLUMNS:
+        records[column] = records[column].astype(str)
+    for column in OUTCOME_ODDS:
+        records[column] = pd.to_numeric(records[column], errors='coerce')
+    records['bookmaker'] = bookmaker
+    return records.reset_index(drop=True)
+
+class OddsSource:
+    """One bookmaker's odds
+
+    Subclasses implement fetch() returning a DataFrame with at least
+    ODDS_COLUMNS; records() normalizes it and tags it with the source name.
+
+    Args:
+        name: Bookmaker name shown with the best prices
+    """
+    kind = None
+
+    def __init__(self, name):
+        self.name = name
+
+    def fetch(self):
+        raise NotImplementedError
+
+    def records(self):
+        return normalize_odds(self.fetch(), self.name)
+
+class FrameSource(OddsSource):
+    """Odds that are already in memory, e.g. the scraped Unibet frame"""
+
+    def __init__(self, name, df):
+        super().__init__(name)
+        self.df = df
+
+    def fetch(self):
+        return self.df
+
+@register_source('csv')
+class CsvFileSource(OddsSource):
+    """Odds from a CSV file in the unibet_predictions.csv format"""
+
+    def __init__(self, name, path):
+        super().__init__(name)
+        self.path = path
+
+    def fetch(self):
+        return pd.read_csv(self.path)
+
+@register_source('html')
+class HtmlFileSource(OddsSource):
+    """Odds parsed from a saved valuebase top picks page, e.g. unibet_html_2.html
+
+    Useful as a stub bookmaker: the saved pages need no network, and delay
+    simulates the latency of a live fetch.
+
+    Args:
+        name: Bookmaker name
+        path: Saved HTML page
+        parser_backend: HTML backend (see unibet_parsers)
+        delay: Seconds to sleep before parsing
+    """
+
+    def __init__(self, name, path, parser_backend='auto', delay=0.0):
+        super().__init__(name)
+        self.path = path
+        self.parser_backend = parser_backend
+        self.delay = delay
+
+    def fetch(self):
+        from unibet_parsers import UNIBET_COLUMNS, get_parser_backend
+
+        if self.delay:
+            time.sleep(self.delay)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            page_source = f.read()
+        _, extract_cards = get_parser_backend(self.parser_backend)
+        return pd.DataFrame(extract_cards(page_source) or [], columns=UNIBET_COLUMNS)
+
+@register_source('valuebase')
+class ValuebaseSource(OddsSource):
+    """Live odds of one bookmaker market from the valuebase top picks page
+
+    Args:
+        name: Bookmaker name
+        market: Bookmaker site as valuebase names it, e.g. www.unibet.nl
+        mode: 'http', 'chrome' or 'auto' (see unibet_scraper.fetch_unibet_odds)
+        pool: Optional BrowserPool for the Chrome path
+    """
+    URL = 'https://valuebase.io/api/bestbacked/toppicks?market={market}'
+
+    def __init__(self, name, market, mode='auto', pool=None):
+        super().__init__(name)
+        self.market = market
+        self.mode = mode
+        self.pool = pool
+
+    def fetch(self):
+        from unibet_scraper import fetch_unibet_odds
+
+        return fetch_unibet_odds(self.mode, self.pool, self.URL.format(market=self.market))
+
+def create_source(spec):
+    """Build a source from a 'name=kind:argument' spec
+
+    Examples: 'unibet=valuebase:www.unibet.nl', 'book_b=html:unibet_html_2.html',
+    'archive=csv:odds.csv'.
+    """
+    name, sep, rest = spec.partition('=')
+    kind, sep2, argument = rest.partition(':')
+    if not (sep and sep2 and name and argument):
+        raise ValueError(f"Invalid odds source '{spec}', expected name=kind:argument")
+    if kind not in SOURCE_KINDS:
+        raise ValueError(f"Unknown odds source kind '{kind}', choose from {', '.join(SOURCE_KINDS)}")
+    return SOURCE_KINDS[kind](name, argument)
+
+def fetch_all(sources, max_workers=None):
+    """Fetch every source concurrently and stack their normalized records
+
+    A source that fails is reported and left out; the others still count.
+
+    Returns:
+        DataFrame with ODDS_COLUMNS plus bookmaker, in source order
+    """
+    sources = list(sources)
+    if not sources:
+        return pd.DataFrame(columns=ODDS_COLUMNS + ['bookmaker'])
+
+    def fetch(source):
+        start = time.perf_counter()
+        try:
+            records = source.records()
+        except Exception as e:
+            METRICS.count(f'odds.{source.name}.failures')
+            print(f"Odds source {source.name} failed after {time.perf_counter() - start:.2f}s: {e}")
+            return None
+        finally:
+            METRICS.observe(f'odds.{source.name}.fetch', time.perf_counter() - start)
+        METRICS.count(f'odds.{source.name}.rows', len(records))
+        print(f"Odds source {source.name}: {len(records)} fixtures in {time.perf_counter() - start:.2f}s")
+        return records
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as executor:
+        frames = [frame for frame in executor.map(fetch, sources) if frame is not None]
+    if not frames:
+        return pd.DataFrame(columns=ODDS_COLUMNS + ['bookmaker'])
+    return pd.concat(frames, ignore_index=True)
+
+def best_prices(odds):
+    """Best price per outcome across bookmakers, one row per fixture
+
+    Books are matched on competition, kickoff date and normalized team names.
+    Fixture names and kickoff come from the first source that lists the
+    fixture. Records whose kickoff cannot be parsed are only matched with each
+    other.
+
+    Args:
+        odds: Records from fetch_all
+
+    Returns:
+        DataFrame with ODDS_COLUMNS holding the best odds, the bookmaker of
+        each best price (home_book, draw_book, away_book) and n_books
+    """
+    from match_data import parse_kickoffs
+    from team_names import normalize_team_name
+
+    columns = ODDS_COLUMNS + ['home_book', 'draw_book', 'away_book', 'n_books']
+    if odds.empty:
+        return pd.DataFrame(columns=columns)
+    odds = odds.reset_index(drop=True)
+    # Normalize each distinct name once; big dumps repeat the same teams
+    names = pd.unique(pd.concat([odds['home_team'], odds['away_team']]))
+    normalized = dict(zip(names, map(normalize_team_name, names)))
+    # Likewise parse each distinct kickoff string once
+    date_times = pd.Series(pd.unique(odds['date_time']))
+    kickoff_dates = dict(zip(date_times, parse_kickoffs(date_times).dt.normalize()))
+    keyed = odds.assign(
+        kickoff_date=odds['date_time'].map(kickoff_dates),
+        home_key=odds['home_team'].map(normalized),
+        away_key=odds['away_team'].map(normalized),
+    )
+    groups = keyed.groupby(FIXTURE_KEY, sort=False, dropna=False)
+    best = groups.agg(
+        date_time=('date_time', 'first'),
+        home_team=('home_team', 'first'),
+        away_team=('away_team', 'first'),
+        n_books=('bookmaker', 'nunique'),
+    ).reset_index()
+
+    # Group number per record (same order as best), so each outcome is one integer groupby
+    fixture = groups.ngroup().to_numpy()
+    bookmakers = keyed['bookmaker'].to_numpy()
+    for column in OUTCOME_ODDS:
+        # Missing odds never win; a fixture with no price at all keeps NaN
+        rows = keyed[column].fillna(-np.inf).groupby(fixture).idxmax().to_numpy()
+        prices = keyed[column].to_numpy()[rows]
+        best[column] = prices
+        best[column.replace('_odds', '_book')] = np.where(np.isnan(prices), None, bookmakers[rows])
+    return best[columns]
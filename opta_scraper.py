@@ -1,83 +1,128 @@
 import pandas as pd
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import time
 
-# Setup undetected Chrome with additional options
-options = uc.ChromeOptions()
-options.add_argument('--window-size=1920,1080')
-options.add_argument('--no-first-run')
-options.add_argument('--no-service-autorun')
-options.add_argument('--password-store=basic')
-driver = uc.Chrome(options=options)
+from browser_pool import BrowserPool
+from metrics import METRICS, export_child_metrics
 
-try:
+OPTA_URL = "https://dataviz.theanalyst.com/opta-football-predictions/?ticker=true"
+
+# Card selectors in order of preference; the last one is a generic fallback
+CARD_SELECTORS = [
+    "[role='link']",
+    "div[style*='background-color: rgb(255, 255, 255)']",
+    ".match-card",
+    "[class*='match']",
+    "[class*='card']",
+    "div > div > div"  # More generic selector
+]
+
+def take_card_snapshot(driver, selectors, timeout=5, poll_interval=0.5):
+    """Parse the rendered page once and probe the card selectors against it
+    
+    Polls page_source until one of the specific selectors matches (or the
+    timeout passes), so finding the cards costs one WebDriver call per poll
+    instead of one per selector and per card.
+    
+    Returns:
+        tuple: (page_source, selector, cards, snapshots) where selector is None
+            and cards is empty when nothing matched
+    """
+    deadline = time.monotonic() + timeout
+    snapshots = 0
+    while True:
+        page_source = driver.page_source
+        soup = BeautifulSoup(page_source, "html.parser")
+        snapshots += 1
+        for selector in selectors:
+            cards = soup.select(selector)
+            if cards:
+                break
+        else:
+            selector, cards = None, []
+        # Keep polling while only the generic fallback matches; the cards may still be rendering
+        if (cards and selector != selectors[-1]) or time.monotonic() >= deadline:
+            return page_source, selector, cards, snapshots
+        time.sleep(poll_interval)
+
+def find_all_in_card(card, name, **kwargs):
+    """find_all over a card and its descendants
+    
+    The card itself is included when it matches, as it was when each card's
+    outerHTML was parsed as a document of its own.
+    """
+    matches = card.find_all(name, **kwargs)
+    parent = card.parent
+    if parent is not None and any(match is card for match in parent.find_all(name, recursive=False, **kwargs)):
+        matches.insert(0, card)
+    return matches
+
+def scrape_opta_predictions(driver):
+    """Scrape the Opta predictions ticker with an existing WebDriver
+    
+    Args:
+        driver: Selenium WebDriver to load the page with (e.g. leased from a BrowserPool)
+        
+    Returns:
+        DataFrame with one row per match: competition, date_time, teams and
+        home/draw/away win percentages
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
     # Access the ticker URL directly
-    url = "https://dataviz.theanalyst.com/opta-football-predictions/?ticker=true"
+    url = OPTA_URL
     print(f"Attempting to access ticker URL: {url}")
+    start = time.perf_counter()
     driver.get(url)
+    round_trips = 1
     print("Page loaded, waiting for content...")
 
     wait = WebDriverWait(driver, 5)
     wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-
-    # Print a portion of the page source for debugging
-    print("\nPage source:")
-    print(driver.page_source[:1000])
+    round_trips += 1
 
     print("\nLooking for match cards...")
+    page_source, selector, cards, snapshots = take_card_snapshot(driver, CARD_SELECTORS)
+    round_trips += snapshots
+    METRICS.observe('opta.fetch', time.perf_counter() - start)
+    METRICS.count('opta.webdriver_round_trips', round_trips)
+    METRICS.count('opta.bytes_parsed', len(page_source.encode('utf-8')))
 
-    # Try different selectors with explicit wait
-    selectors = [
-        "[role='link']",
-        "div[style*='background-color: rgb(255, 255, 255)']",
-        ".match-card",
-        "[class*='match']",
-        "[class*='card']",
-        "div > div > div"  # More generic selector
-    ]
-
-    cards = []
-    for selector in selectors:
-        try:
-            found_cards = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector)))
-            print(f"\nTrying selector '{selector}': found {len(found_cards)} elements")
-            if found_cards:
-                # Print first element found for debugging if available
-                print("First element HTML:")
-                print(found_cards[0].get_attribute('outerHTML'))
-                cards = found_cards
-                break
-        except Exception as e:
-            print(f"Error with selector '{selector}': {e}")
+    # Print a portion of the page source for debugging
+    print("\nPage source:")
+    print(page_source[:1000])
 
-    if not cards:
+    if cards:
+        print(f"\nUsing selector '{selector}': found {len(cards)} elements")
+        print("First element HTML:")
+        print(cards[0])
+    else:
         print("No match cards found using provided selectors.")
 
+    # Probing each selector with wait.until and reading every card's outerHTML
+    # used to cost one WebDriver call per selector tried and per card
+    selectors_tried = CARD_SELECTORS.index(selector) + 1 if selector else len(CARD_SELECTORS)
+    per_element_round_trips = 3 + selectors_tried + (1 + len(cards) if cards else 0)
+    print(f"\nWebDriver round trips: {round_trips} "
+          f"(per-element outerHTML approach: ~{per_element_round_trips} for {len(cards)} cards)")
+
+    start = time.perf_counter()
     data = []
     for card in cards:
         try:
-            # Get HTML content
-            card_html = card.get_attribute('outerHTML')
-            print("\nProcessing card HTML:")
-            print(card_html[:200])  # Print truncated HTML for debugging
-            
-            soup = BeautifulSoup(card_html, "html.parser")
-            
             # Try multiple methods to find team names
             team_names = []
             
             # Method 1: Look for spans with specific style
-            team_spans = soup.find_all("span", style=lambda x: x and "color: rgb(29, 10, 48)" in str(x))
+            team_spans = find_all_in_card(card, "span", style=lambda x: x and "color: rgb(29, 10, 48)" in str(x))
             if len(team_spans) >= 2:
                 team_names = [span.get_text().strip() for span in team_spans[:2]]
             
             # Method 2: Look for team badges or team names
             if not team_names:
-                team_elements = soup.find_all("div", class_=lambda x: x and ("team" in str(x).lower() or "badge" in str(x).lower()))
+                team_elements = find_all_in_card(card, "div", class_=lambda x: x and ("team" in str(x).lower() or "badge" in str(x).lower()))
                 if len(team_elements) >= 2:
                     team_names = [elem.get_text().strip() for elem in team_elements[:2]]
             
@@ -85,13 +130,13 @@ try:
             percentages = []
             
             # Method 1: Look for specific percentage text
-            prob_elements = soup.find_all(string=lambda text: text and '%' in str(text))
+            prob_elements = card.find_all(string=lambda text: text and '%' in str(text))
             if prob_elements:
                 percentages = [elem.strip().strip('%') for elem in prob_elements if elem.strip().strip('%').replace('.', '').isdigit()]
             
             # Method 2: Look for probability divs
             if not percentages:
-                prob_divs = soup.find_all("div", class_=lambda x: x and "prob" in str(x).lower())
+                prob_divs = find_all_in_card(card, "div", class_=lambda x: x and "prob" in str(x).lower())
                 for div in prob_divs:
                     text = div.get_text().strip()
                     if '%' in text:
@@ -108,7 +153,7 @@ try:
                     print(f"Found probabilities: {home_prob}% - {away_prob}% - {draw_prob}%")
                     
                     # Get competition and date (if available) from meta content
-                    meta_content = soup.find("div", class_=lambda x: x and "match-card-meta-content" in x)
+                    meta_content = next(iter(find_all_in_card(card, "div", class_=lambda x: x and "match-card-meta-content" in x)), None)
                     competition = "Unknown"
                     date_time = "Unknown"
                     if meta_content:
@@ -148,23 +193,33 @@ try:
         "draw_%",
         "away_win_%"
     ])
+    METRICS.observe('opta.parse', time.perf_counter() - start)
+    METRICS.count('opta.rows', len(df))
     print("\nFinal DataFrame:")
     print(df)
-    
+    return df
+
+def save_predictions(df, output_file='opta_predictions.csv'):
+    """Write scraped predictions to CSV if any were collected"""
     if len(df) > 0:
-        output_file = 'opta_predictions.csv'
         df.to_csv(output_file, index=False)
         print(f"\nData saved to {output_file}")
     else:
         print("\nNo data was collected!")
 
-except Exception as e:
-    print(f"An error occurred: {e}")
-    raise e
-
-finally:
-    print("\nClosing browser...")
+def main():
+    pool = BrowserPool()
     try:
-        driver.quit()
-    except:
-        pass
+        with pool.lease() as driver:
+            df = scrape_opta_predictions(driver)
+        save_predictions(df)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        raise e
+    finally:
+        print("\nClosing browser...")
+        pool.close()
+        export_child_metrics()
+
+if __name__ == "__main__":
+    main()
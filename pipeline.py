@@ -0,0 +1,325 @@
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from history_store import DATASETS, HISTORY_DIR, append_run, load_latest_snapshot
+from margin_methods import DEFAULT_METHOD
+from margins import OVERROUND_BAND
+from metrics import METRICS
+from team_resolver import LEARNED_ALIASES_FILE
+
+class PipelineError(Exception):
+    """A stage could not produce usable output; the message is shown to the user"""
+
+class RunState:
+    """Data passed in memory from one stage to the next
+
+    Attributes:
+        opta_df: Opta predictions (set by the scrape stage)
+        unibet_df: Unibet odds (set by the scrape stage)
+        matched_df: Matched games (set by the match stage)
+        bets: Recommended bets, best first (set by the analyze stage)
+        overround_band: Overround accepted by matching and analysis (widened
+            by the odds stage, whose best prices may form an arbitrage)
+        timings: Wall-clock seconds per stage, in the order the stages ran
+        sinks: Objects with a write(dataset, df) method that receive every
+            DataFrame a stage produces
+    """
+
+    def __init__(self, sinks=None):
+        self.opta_df = None
+        self.unibet_df = None
+        self.matched_df = None
+        self.bets = None
+        self.overround_band = OVERROUND_BAND
+        self.timings = {}
+        self.sinks = list(sinks or [])
+
+    def emit(self, dataset, df):
+        """Hand a stage's output to every sink"""
+        for sink in self.sinks:
+            sink.write(dataset, df)
+
+class Stage:
+    """One step of the pipeline
+
+    Subclasses set name and implement run(state), reading the inputs they need
+    from the RunState and storing their output on it. A stage raises
+    PipelineError when the run cannot continue.
+    """
+    name = 'stage'
+
+    def run(self, state):
+        raise NotImplementedError
+
+class ScrapeStage(Stage):
+    """Run both scrapers at the same time and load their output once
+
+    The scrapers stay separate processes so a hung Chrome can be killed on
+    timeout. With run_scrapers=False the existing CSV files (or the latest
+    history snapshots) are loaded instead.
+    """
+    name = 'scrape'
+
+    def __init__(self, run_scrapers=True, opta_timeout=300, unibet_timeout=300,
+                 from_history=False, history_dir=HISTORY_DIR):
+        self.run_scrapers = run_scrapers
+        self.opta_timeout = opta_timeout
+        self.unibet_timeout = unibet_timeout
+        self.from_history = from_history
+        self.history_dir = history_dir
+
+    def run(self, state):
+        if self.run_scrapers:
+            from script_utils import run_scripts_concurrently
+
+            results = run_scripts_concurrently([
+                {'source': 'opta', 'script': 'opta_scraper.py', 'description': 'Opta predictions scraper', 'timeout': self.opta_timeout},
+                {'source': 'unibet', 'script': 'unibet_scraper.py', 'description': 'Unibet odds scraper', 'timeout': self.unibet_timeout},
+            ])
+            for source, result in results.items():
+                state.timings[f'{source} scraper'] = result['elapsed']
+            if not results['opta']['success']:
+                raise PipelineError("Failed to get Opta predictions.")
+            if not results['unibet']['success']:
+                raise PipelineError("Failed to get Unibet odds.")
+        else:
+            print("Skipping scraping steps as requested...")
+
+        if self.from_history:
+            state.opta_df = load_latest_snapshot('opta', root=self.history_dir)
+            state.unibet_df = load_latest_snapshot('unibet', root=self.history_dir)
+        else:
+            for dataset in ('opta', 'unibet'):
+                try:
+                    df = pd.read_csv(DATASETS[dataset])
+                except Exception as e:
+                    print(f"\nError reading {DATASETS[dataset]}: {e}")
+                    df = pd.DataFrame()
+                setattr(state, f'{dataset}_df', df)
+                state.emit(dataset, df)
+        for dataset in ('opta', 'unibet'):
+            METRICS.gauge(f'scrape.{dataset}_rows', len(getattr(state, f'{dataset}_df')))
+
+class VerifyStage(Stage):
+    """Check that both sources produced rows, without touching the disk"""
+    name = 'verify'
+
+    def run(self, state):
+        for dataset, label in (('opta', 'Opta predictions'), ('unibet', 'Unibet odds')):
+            df = getattr(state, f'{dataset}_df')
+            if df is None or df.empty:
+                print(f"\nWarning: no {dataset} data")
+                raise PipelineError(f"{label} data verification failed.")
+            print(f"\nSuccessfully verified {dataset} data - contains {len(df)} rows")
+
+class OddsStage(Stage):
+    """Replace the Unibet odds with the best price per outcome across bookmakers
+
+    The scraped Unibet odds count as one bookmaker; the other sources are
+    fetched concurrently. Matching and analysis then run on the best prices,
+    and each bet names the bookmaker offering it.
+
+    Args:
+        sources: Extra odds_sources.OddsSource instances
+        max_workers: Sources fetched at the same time (default: all)
+    """
+    name = 'odds'
+
+    def __init__(self, sources, max_workers=None):
+        self.sources = list(sources)
+        self.max_workers = max_workers
+
+    def run(self, state):
+        from margins import BEST_PRICE_OVERROUND_BAND
+        from odds_sources import FrameSource, best_prices, fetch_all
+
+        print(f"\nFetching odds from {len(self.sources)} more bookmaker(s)...")
+        records = fetch_all([FrameSource('unibet', state.unibet_df)] + self.sources, self.max_workers)
+        best = best_prices(records)
+        METRICS.gauge('odds.rows_in', len(records))
+        METRICS.gauge('odds.rows_out', len(best))
+        if best.empty:
+            raise PipelineError("No odds left after combining the bookmakers.")
+        books = best[['home_book', 'draw_book', 'away_book']].stack().value_counts()
+        print(f"Best prices for {len(best)} games from {records['bookmaker'].nunique()} bookmakers: "
+              + ", ".join(f"{book} {count}" for book, count in books.items()))
+        state.unibet_df = best
+        state.overround_band = BEST_PRICE_OVERROUND_BAND
+
+class MatchStage(Stage):
+    """Match the Opta fixtures with the Unibet games
+
+    Only incremental runs keep the match table on disk. The team aliases the
+    fuzzy resolver learns are loaded and saved on every run, so a name is
+    resolved once and reused by later runs.
+
+    Args:
+        incremental: Reuse unchanged matches from the previous run
+        margin_method: Margin removal method for the fair probability columns;
+            pass the one AnalyzeStage uses
+        aliases_file: Learned team aliases kept between runs (None: do not keep them)
+    """
+    name = 'match'
+
+    def __init__(self, incremental=False, margin_method=DEFAULT_METHOD, aliases_file=LEARNED_ALIASES_FILE):
+        self.incremental = incremental
+        self.margin_method = margin_method
+        self.aliases_file = aliases_file
+
+    def run(self, state):
+        from match_data import MATCH_STATE_FILE, find_matching_games
+
+        print("\nRunning match analysis...")
+        state.matched_df = find_matching_games(
+            state.opta_df, state.unibet_df, incremental=self.incremental,
+            state_file=MATCH_STATE_FILE if self.incremental else None, output_file=None,
+            aliases_file=self.aliases_file, margin_method=self.margin_method, overround_band=state.overround_band,
+        )
+        if state.matched_df.empty:
+            raise PipelineError("Process completed but no matched predictions were generated.")
+        state.emit('matched', state.matched_df)
+
+class AnalyzeStage(Stage):
+    """Rank the value bets in the matched games
+
+    Args:
+        threshold: Minimum edge (percentage points) for a recommended bet
+        bankroll: Attach fractional-Kelly stakes for this bankroll (None: no stakes)
+        kelly_fraction: Multiplier on the full-Kelly stakes
+        max_exposure: Largest total stake on the slate as a fraction of the bankroll
+        margin_method: How the bookmaker margin is removed from the odds
+            (see margins.MARGIN_METHODS)
+    """
+    name = 'analyze'
+
+    def __init__(self, threshold=2.0, bankroll=None, kelly_fraction=0.25, max_exposure=0.5, margin_method=DEFAULT_METHOD):
+        self.threshold = threshold
+        self.margin_method = margin_method
+        self.bankroll = bankroll
+        self.kelly_fraction = kelly_fraction
+        self.max_exposure = max_exposure
+
+    def run(self, state):
+        from betting_utils import analyze_match_data
+
+        df = state.matched_df
+        print(f"\nFound {len(df)} matches with betting opportunities")
+        print("\nSample of opportunities:")
+        print(df[['home_team', 'away_team', 'prob_difference_home', 'prob_difference_draw', 'prob_difference_away']].head())
+        state.bets = analyze_match_data(df, self.threshold, margin_method=self.margin_method, band=state.overround_band)
+        METRICS.gauge('analyze.rows_in', len(df))
+        METRICS.gauge('analyze.bets', len(state.bets))
+        if self.bankroll is not None:
+            from staking import attach_stakes
+
+            attach_stakes(state.bets, self.bankroll, self.kelly_fraction, self.max_exposure)
+
+class NotifyStage(Stage):
+    """Print the recommended bets and hand them to an optional notifier
+
+    Args:
+        notifier: Callable taking the list of bets (e.g. one that emails them),
+            or None to only print them
+    """
+    name = 'notify'
+
+    def __init__(self, notifier=None):
+        self.notifier = notifier
+
+    def run(self, state):
+        from rendering import render_bets_text
+
+        print("\n📊 RECOMMENDED BETS (BEST TO WORST) 📊")
+        print("=" * 80)
+
+        if state.bets:
+            print(render_bets_text(state.bets))
+        else:
+            print("No bets meeting the threshold criteria were found.")
+
+        if self.notifier:
+            with METRICS.timer('notify.notifier'):
+                self.notifier(state.bets or [])
+
+class CsvSink:
+    """Write selected datasets to their CSV files
+
+    Args:
+        datasets: Datasets to write (default: only 'matched'; the scrapers
+            already write their own CSVs)
+        skip_unchanged: Leave a file alone when it already holds the same
+            rows, as incremental runs do
+    """
+
+    def __init__(self, datasets=('matched',), skip_unchanged=False):
+        self.datasets = set(datasets)
+        self.skip_unchanged = skip_unchanged
+
+    def write(self, dataset, df):
+        if dataset not in self.datasets:
+            return
+        path = DATASETS[dataset]
+        text = df.to_csv(index=False)
+        if self.skip_unchanged and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                if f.read() == text:
+                    print(f"\n{path} is up to date ({len(df)} rows)")
+                    return
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        print(f"\nSaved {len(df)} rows to {path}")
+
+class HistorySink:
+    """Append a run's frames to the history store once the matched data arrives
+
+    Frames are buffered so a run that fails before matching stores nothing,
+    and every dataset of the run shares one snapshot timestamp. Only the
+    datasets the stages emitted are stored: a run matching the latest
+    snapshots (--from_history) adds no Opta or Unibet copies.
+    """
+
+    def __init__(self, root=HISTORY_DIR, file_format='parquet', run_ts=None):
+        self.root = root
+        self.file_format = file_format
+        self.run_ts = run_ts or datetime.now()
+        self.frames = {}
+
+    def write(self, dataset, df):
+        self.frames[dataset] = df
+        if dataset == 'matched':
+            stored = append_run(self.run_ts, self.root, self.file_format, self.frames, read_missing=False)
+            print(f"\nStored snapshots in {self.root}: " + ", ".join(f"{name} ({rows} rows)" for name, rows in stored.items()))
+
+class Pipeline:
+    """Run stages in order on a shared RunState, timing each one
+
+    Stage times go to state.timings and to the process metrics as
+    'stage.<name>' timers.
+
+    Args:
+        stages: Stage instances, typically scrape, verify, match, analyze, notify
+        sinks: Optional sinks that receive every DataFrame the stages emit
+    """
+
+    def __init__(self, stages, sinks=None):
+        self.stages = list(stages)
+        self.sinks = list(sinks or [])
+
+    def run(self, state=None):
+        """Run every stage; the state keeps its timings even when a stage fails
+
+        Returns:
+            RunState: The state after the last stage
+        """
+        state = state or RunState(self.sinks)
+        for stage in self.stages:
+            start = time.perf_counter()
+            try:
+                stage.run(state)
+            finally:
+                state.timings[stage.name] = time.perf_counter() - start
+                METRICS.observe(f'stage.{stage.name}', state.timings[stage.name])
+        return state
@@ -0,0 +1,132 @@
+import json
+from bisect import bisect_right
+from datetime import datetime
+
+from metrics import timed
+
+# Minimum confidence score, description and CSS class per rating, best first
+RATING_LEVELS = [
+    (80, "⭐⭐⭐⭐⭐ EXCELLENT", "excellent"),
+    (60, "⭐⭐⭐⭐ VERY GOOD", "very-good"),
+    (40, "⭐⭐⭐ GOOD", "good"),
+    (20, "⭐⭐ SPECULATIVE", "speculative"),
+    (float('-inf'), "⭐ LOW CONFIDENCE", "low-confidence"),
+]
+
+# The same levels, worst first, for a binary search on the score
+_RATING_MINIMUMS = [minimum for minimum, _, _ in reversed(RATING_LEVELS[:-1])]
+_RATINGS = [(description, css_class) for _, description, css_class in reversed(RATING_LEVELS)]
+
+def rating_for(confidence_score):
+    """Return (description, css_class) for a confidence score"""
+    return _RATINGS[bisect_right(_RATING_MINIMUMS, confidence_score)]
+
+# Static part of the email, built once at import
+HTML_HEAD = """
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; }
+            .header { background-color: #4CAF50; color: white; padding: 10px; text-align: center; }
+            .bet { margin-bottom: 20px; padding: 15px; border: 1px solid #ddd; border-radius: 5px; }
+            .excellent { background-color: #CCFFCC; }
+            .very-good { background-color: #E6FFE6; }
+            .good { background-color: #F0FFF0; }
+            .speculative { background-color: #FFFAF0; }
+            .low-confidence { background-color: #FFF0F0; }
+            .bet-header { font-weight: bold; font-size: 18px; }
+            .details { margin-left: 15px; }
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>Opta Betting Recommendations</h1>
+            <p>Generated on: """
+
+HTML_HEADER_END = """</p>
+        </div>
+    """
+
+HTML_FOOTER = """
+    </body>
+    </html>
+    """
+
+# Optional lines, only shown for bets with a bookmaker (best prices) or a suggested stake
+BOOK_HTML_TEMPLATE = """
+                <p>Best price at: %s</p>"""
+
+BOOK_TEXT_TEMPLATE = """   Best price at: %s
+"""
+
+STAKE_HTML_TEMPLATE = """
+                <p>Suggested stake: €%.2f (%.2f%% of bankroll)</p>"""
+
+STAKE_TEXT_TEMPLATE = """   Suggested stake: €%.2f (%.2f%% of bankroll)
+"""
+
+def _extra_lines(bet, book_template, stake_template):
+    lines = ""
+    if bet.get('bookmaker') is not None:
+        lines += book_template % bet['bookmaker']
+    if bet.get('stake') is not None:
+        lines += stake_template % (bet['stake'], bet['stake_fraction'] * 100)
+    return lines
+
+def iter_bets_html(bets, generated=None):
+    """Yield the HTML email in pieces, for streaming to a file or socket
+
+    Args:
+        bets: Bet dicts as returned by analyze_match_data, best first
+        generated: Timestamp shown in the header (default: now)
+    """
+    generated = generated or datetime.now()
+    yield HTML_HEAD
+    yield generated.strftime("%Y-%m-%d %H:%M:%S")
+    yield HTML_HEADER_END
+    for rank, bet in enumerate(bets, 1):
+        rating, css_class = rating_for(bet['confidence_score'])
+        extra = _extra_lines(bet, BOOK_HTML_TEMPLATE, STAKE_HTML_TEMPLATE) if 'bookmaker' in bet or 'stake' in bet else ""
+        yield f"""
+        <div class="bet {css_class}">
+            <div class="bet-header">{rank}. Bet on {bet['bet_type']} in {bet['match']}</div>
+            <div class="details">
+                <p>Odds: {bet['odds']:.2f}</p>
+                <p>Implied probability: {bet['implied_prob']:.2f}%</p>
+                <p>Opta probability: {bet['opta_prob']:.2f}%</p>
+                <p>Edge: +{bet['difference']:.2f}%</p>
+                <p>Expected profit per €1 bet: €{bet['expected_return']:.2f}</p>
+                <p>Confidence Score: {bet['confidence_score']}/100 - {rating}</p>{extra}
+            </div>
+        </div>
+        """
+    yield HTML_FOOTER
+
+@timed('render.html')
+def render_bets_html(bets, generated=None):
+    """Render the bets as the HTML email body with a single join"""
+    return "".join(iter_bets_html(bets, generated))
+
+@timed('render.text')
+def render_bets_text(bets):
+    """Render the bets as plain text, one block per bet as shown in the console"""
+    return "\n".join(
+        f"""{rank}. Bet on {bet['bet_type']} in {bet['match']}
+   Odds: {bet['odds']:.2f}
+   Implied probability: {bet['implied_prob']:.2f}%
+   Opta probability: {bet['opta_prob']:.2f}%
+   Edge: +{bet['difference']:.2f}%
+   Expected profit per €1 bet: €{bet['expected_return']:.2f}
+   Confidence Score: {bet['confidence_score']}/100 - {rating_for(bet['confidence_score'])[0]}
+{_extra_lines(bet, BOOK_TEXT_TEMPLATE, STAKE_TEXT_TEMPLATE)}"""
+        for rank, bet in enumerate(bets, 1)
+    )
+
+@timed('render.json')
+def render_bets_json(bets, generated=None):
+    """Render the bets as a JSON document including each bet's rating"""
+    generated = generated or datetime.now()
+    return json.dumps({
+        'generated': generated.isoformat(timespec='seconds'),
+        'bets': [dict(bet, rank=rank, rating=rating_for(bet['confidence_score'])[0]) for rank, bet in enumerate(bets, 1)],
+    }, ensure_ascii=False, default=str)
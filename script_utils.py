@@ -1,13 +1,45 @@
+import os
 import subprocess
 import sys
-import pandas as pd
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def run_script(script_name, description):
+from metrics import CHILD_METRICS_ENV, METRICS, load_report
+
+# Serializes prefixed output lines from concurrently running scripts
+_print_lock = threading.Lock()
+
+def _child_metrics_file():
+    """Temp file a child script writes its metrics report to"""
+    fd, path = tempfile.mkstemp(prefix='opta_bets_metrics_', suffix='.json')
+    os.close(fd)
+    return path
+
+def _collect_child_metrics(path):
+    """Merge a child's metrics report into this process's and remove the file"""
+    report = load_report(path)
+    if report:
+        METRICS.merge(report)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def run_script(script_name, description, args=None):
     """Run a Python script and capture its output
     
+    Kept for compatibility with external callers; main.py runs matching and
+    analysis in-process through pipeline.py.
+    
+    The script's own metrics report (see metrics.export_child_metrics) is
+    merged into this process's metrics when it exits.
+    
     Args:
         script_name: Name of the script to run
         description: Description of the script for logging
+        args: Optional list of command line arguments for the script
         
     Returns:
         bool: True if script executed successfully, False otherwise
@@ -16,8 +48,11 @@ def run_script(script_name, description):
     print(f"Running {description}...")
     print(f"{'='*80}\n")
     
+    metrics_file = _child_metrics_file()
+    start = time.perf_counter()
     try:
-        result = subprocess.run([sys.executable, script_name], capture_output=True, text=True)
+        result = subprocess.run([sys.executable, script_name] + list(args or []), capture_output=True, text=True,
+                                env=dict(os.environ, **{CHILD_METRICS_ENV: metrics_file}))
         print(result.stdout)
         if result.stderr:
             print("Errors/Warnings:")
@@ -29,6 +64,89 @@ def run_script(script_name, description):
     except Exception as e:
         print(f"Exception running {script_name}: {e}")
         return False
+    finally:
+        METRICS.observe(f"{os.path.splitext(os.path.basename(script_name))[0]}.script", time.perf_counter() - start)
+        _collect_child_metrics(metrics_file)
+
+def _stream_output(process, prefix):
+    """Print each line a child process writes, tagged with its source prefix"""
+    for line in process.stdout:
+        with _print_lock:
+            print(f"[{prefix}] {line.rstrip()}", flush=True)
+
+def _run_streamed(script_name, prefix, timeout):
+    """Run one script, streaming its output, and kill it if it exceeds the timeout"""
+    start = time.perf_counter()
+    metrics_file = _child_metrics_file()
+    env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8', **{CHILD_METRICS_ENV: metrics_file})
+    result = {'success': False, 'returncode': None, 'timed_out': False, 'elapsed': 0.0}
+    
+    try:
+        process = subprocess.Popen(
+            [sys.executable, script_name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            env=env,
+        )
+    except Exception as e:
+        print(f"Exception running {script_name}: {e}")
+        result['elapsed'] = time.perf_counter() - start
+        METRICS.count(f"{prefix}.script_failures")
+        _collect_child_metrics(metrics_file)
+        return result
+    
+    reader = threading.Thread(target=_stream_output, args=(process, prefix), daemon=True)
+    reader.start()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result['timed_out'] = True
+        process.kill()
+        process.wait()
+    reader.join()
+    
+    result['returncode'] = process.returncode
+    result['elapsed'] = time.perf_counter() - start
+    METRICS.observe(f"{prefix}.script", result['elapsed'])
+    _collect_child_metrics(metrics_file)
+    if result['timed_out']:
+        print(f"Error running {script_name}: timed out after {timeout} seconds")
+        METRICS.count(f"{prefix}.script_timeouts")
+    elif process.returncode != 0:
+        print(f"Error running {script_name}. Return code: {process.returncode}")
+        METRICS.count(f"{prefix}.script_failures")
+    else:
+        result['success'] = True
+    return result
+
+def run_scripts_concurrently(scripts):
+    """Run several independent Python scripts at the same time
+    
+    Output from each script is streamed line by line with a "[source]" prefix.
+    
+    Args:
+        scripts: List of dicts with 'source', 'script', 'description' and an
+            optional per-script 'timeout' in seconds
+        
+    Returns:
+        dict: Maps each source to a dict with 'success', 'returncode',
+            'timed_out' and 'elapsed' (wall-clock seconds)
+    """
+    print(f"\n{'='*80}")
+    print("Running " + ", ".join(script['description'] for script in scripts) + " concurrently...")
+    print(f"{'='*80}\n")
+    
+    with ThreadPoolExecutor(max_workers=len(scripts)) as executor:
+        futures = {
+            script['source']: executor.submit(
+                _run_streamed, script['script'], script['source'], script.get('timeout')
+            )
+            for script in scripts
+        }
+        return {source: future.result() for source, future in futures.items()}
 
 def verify_data(filename):
     """Verify that the CSV file exists and contains data
@@ -39,6 +157,8 @@ def verify_data(filename):
     Returns:
         bool: True if file exists and contains data, False otherwise
     """
+    import pandas as pd
+    
     try:
         df = pd.read_csv(filename)
         if len(df) > 0:
@@ -49,4 +169,4 @@ def verify_data(filename):
             return False
     except Exception as e:
         print(f"\nError verifying {filename}: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,208 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from betting_utils import analyze_match_data
+
+# Elements of the (draws, strategies, bets) working array per chunk; bounds memory to ~16 MB
+CHUNK_ELEMENTS = 2_000_000
+
+# Slates smaller than this (draws x bets) are simulated in-process
+PARALLEL_MIN_WORK = 20_000_000
+
+def flat_stakes(bets, unit):
+    """The same stake on every bet"""
+    return np.full(len(bets), unit)
+
+def edge_stakes(bets, unit):
+    """Stakes proportional to the edge, scaled to the same total as flat staking"""
+    edge = np.array([bet['difference'] for bet in bets], dtype=float)
+    return unit * edge / edge.mean()
+
+def confidence_stakes(bets, unit):
+    """Stakes proportional to the confidence score, scaled to the same total as flat staking"""
+    score = np.array([bet['confidence_score'] for bet in bets], dtype=float)
+    return unit * score / score.mean()
+
+def kelly_stakes(bets, unit):
+    """The suggested fractional-Kelly stakes (unit is not used)
+
+    Uses the stake_fraction already attached to the bets when present,
+    otherwise computes it with the staking defaults.
+    """
+    if all('stake_fraction' in bet for bet in bets):
+        return np.array([bet['stake_fraction'] for bet in bets], dtype=float)
+    from staking import kelly_stakes as slate_kelly_stakes
+
+    return slate_kelly_stakes(bets)[1]
+
+# Staking strategies: name -> function(bets, unit) returning stakes as fractions of the bankroll
+STAKING_STRATEGIES = {
+    'flat': flat_stakes,
+    'edge': edge_stakes,
+    'confidence': confidence_stakes,
+    'kelly': kelly_stakes,
+}
+
+def build_slate(bets):
+    """Turn a bets list into the arrays the simulator draws against
+
+    Bets on the same match share one draw per simulation, so at most one of
+    them can win. Each bet owns the slice [lower, lower + probability) of its
+    match's unit interval; whatever is left over belongs to outcomes that
+    were not bet on.
+
+    Returns:
+        dict with match_index, lower, upper and odds arrays (one entry per bet)
+        and the number of matches
+    """
+    match_ids = {}
+    match_index = np.empty(len(bets), dtype=np.int64)
+    lower = np.empty(len(bets))
+    upper = np.empty(len(bets))
+    used = []
+    for i, bet in enumerate(bets):
+        index = match_ids.setdefault(bet['match'], len(match_ids))
+        if index == len(used):
+            used.append(0.0)
+        match_index[i] = index
+        lower[i] = used[index]
+        used[index] += bet['opta_prob'] / 100
+        upper[i] = used[index]
+    if any(total > 1 + 1e-9 for total in used):
+        raise ValueError("Opta probabilities of the bets on one match add up to more than 100%")
+    return {
+        'match_index': match_index,
+        'lower': lower,
+        'upper': upper,
+        'odds': np.array([bet['odds'] for bet in bets], dtype=float),
+        'n_matches': len(match_ids),
+    }
+
+def _simulate_chunk(slate, stakes, n_draws, seed_sequence):
+    """Simulate n_draws slates; return (profit, max drawdown) arrays of shape (strategies, n_draws)
+
+    Bets settle in list order, so drawdown is measured on the running P&L as
+    the slate is played out bet by bet.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n_strategies, n_bets = stakes.shape
+    batch = max(1, CHUNK_ELEMENTS // max(1, n_strategies * n_bets))
+    profit = np.empty((n_strategies, n_draws))
+    drawdown = np.empty((n_strategies, n_draws))
+    win_return = slate['odds'] - 1
+
+    for start in range(0, n_draws, batch):
+        stop = min(start + batch, n_draws)
+        draws = rng.random((stop - start, slate['n_matches']))[:, slate['match_index']]
+        won = (draws >= slate['lower']) & (draws < slate['upper'])
+        # Return per unit staked: odds - 1 on a win, -1 on a loss
+        unit_return = np.where(won, win_return, -1.0)
+        path = np.cumsum(unit_return[:, None, :] * stakes[None, :, :], axis=2)
+        peak = np.maximum.accumulate(np.maximum(path, 0), axis=2)
+        profit[:, start:stop] = path[:, :, -1].T
+        drawdown[:, start:stop] = (peak - path).max(axis=2).T
+    return profit, drawdown
+
+def _summarize(profit, drawdown, total_stake):
+    # A strategy that stakes nothing (e.g. Kelly with no positive edge) has no ROI; report 0
+    roi = profit / total_stake * 100 if total_stake > 0 else np.zeros_like(profit)
+    percentiles = np.percentile(roi, [5, 25, 50, 75, 95])
+    return {
+        'total_stake': round(float(total_stake), 4),
+        'expected_profit': float(profit.mean()),
+        'roi_mean': float(roi.mean()),
+        'roi_std': float(roi.std()),
+        'roi_percentiles': dict(zip(['p5', 'p25', 'p50', 'p75', 'p95'], percentiles.tolist())),
+        'prob_loss': float((profit < 0).mean()),
+        'max_drawdown_mean': float(drawdown.mean()),
+        'max_drawdown_p95': float(np.percentile(drawdown, 95)),
+    }
+
+def simulate_bets(bets, n_sims=1_000_000, strategies=None, unit=0.01, seed=None, workers=None, chunk_size=250_000):
+    """Monte Carlo simulation of a slate of bets under several staking strategies
+
+    Every simulation draws one 1X2 outcome per match from the Opta
+    probabilities and settles all bets of the slate. Draws are split into
+    chunks with independent child seeds of one SeedSequence, so results only
+    depend on the seed and chunk_size, not on the number of workers.
+
+    Args:
+        bets: Bets as returned by analyze_match_data
+        n_sims: Number of simulated slates
+        strategies: Dict of name -> stake function (default: STAKING_STRATEGIES)
+        unit: Flat stake per bet as a fraction of the bankroll
+        seed: Seed for reproducible results (default: random)
+        workers: Processes to use (default: all cores for large slates, else 1)
+        chunk_size: Simulations per chunk
+
+    Returns:
+        dict of strategy -> summary with ROI mean/std/percentiles (% of the
+        amount staked; 0 for a strategy that stakes nothing), probability of
+        a loss, and mean and 95th percentile max drawdown (fraction of the
+        bankroll)
+    """
+    if not bets:
+        return {}
+    strategies = strategies or STAKING_STRATEGIES
+    slate = build_slate(bets)
+    stakes = np.vstack([np.asarray(stake_fn(bets, unit), dtype=float) for stake_fn in strategies.values()])
+
+    chunks = [min(chunk_size, n_sims - start) for start in range(0, n_sims, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    if workers is None:
+        workers = os.cpu_count() if n_sims * len(bets) >= PARALLEL_MIN_WORK else 1
+    workers = max(1, min(workers, len(chunks)))
+
+    if workers == 1:
+        results = [_simulate_chunk(slate, stakes, n, s) for n, s in zip(chunks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_chunk, [slate] * len(chunks), [stakes] * len(chunks), chunks, seeds))
+
+    profit = np.concatenate([chunk_profit for chunk_profit, _ in results], axis=1)
+    drawdown = np.concatenate([chunk_drawdown for _, chunk_drawdown in results], axis=1)
+    return {
+        name: _summarize(profit[i], drawdown[i], stakes[i].sum())
+        for i, name in enumerate(strategies)
+    }
+
+def simulate_matches(df, threshold=2.0, **kwargs):
+    """Analyse a matched predictions DataFrame and simulate the resulting bets"""
+    return simulate_bets(analyze_match_data(df.copy(), threshold), **kwargs)
+
+def print_simulation(results, n_sims):
+    """Print one line per staking strategy"""
+    print(f"\nMonte Carlo simulation ({n_sims:,} slates)")
+    print(f"{'strategy':<12} {'stake':>7} {'ROI mean':>9} {'ROI std':>8} {'ROI p5':>8} {'ROI p95':>8} {'P(loss)':>8} {'DD mean':>8} {'DD p95':>8}")
+    for name, summary in results.items():
+        if summary['total_stake'] <= 0:
+            print(f"{name:<12} {'no stake':>7}")
+            continue
+        print(f"{name:<12} {summary['total_stake']:>7.2%} {summary['roi_mean']:>8.1f}% {summary['roi_std']:>7.1f}% "
+              f"{summary['roi_percentiles']['p5']:>7.1f}% {summary['roi_percentiles']['p95']:>7.1f}% "
+              f"{summary['prob_loss']:>8.1%} {summary['max_drawdown_mean']:>8.2%} {summary['max_drawdown_p95']:>8.2%}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate the ROI and drawdown of the recommended bets')
+    parser.add_argument('--input', type=str, default='matched_predictions.csv', help='Matched predictions CSV')
+    parser.add_argument('--threshold', type=float, default=2.0, help='Minimum edge for a bet (default: 2.0)')
+    parser.add_argument('--n_sims', type=int, default=1_000_000, help='Number of simulated slates (default: 1,000,000)')
+    parser.add_argument('--unit', type=float, default=0.01, help='Flat stake per bet as a fraction of the bankroll (default: 0.01)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible results')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores for large slates)')
+    args = parser.parse_args()
+
+    bets = analyze_match_data(pd.read_csv(args.input), args.threshold)
+    print(f"Simulating {len(bets)} bets on {len({bet['match'] for bet in bets})} matches...")
+    start = time.perf_counter()
+    results = simulate_bets(bets, args.n_sims, unit=args.unit, seed=args.seed, workers=args.workers)
+    print_simulation(results, args.n_sims)
+    print(f"\nSimulated in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import numpy as np
+
+# Defaults for the suggested stakes
+DEFAULT_BANKROLL = 100.0
+DEFAULT_KELLY_FRACTION = 0.25
+DEFAULT_MAX_EXPOSURE = 0.5
+
+# Slates with fewer bets are solved with a per-match Python loop: below about
+# 100 bets the NumPy setup costs more than it saves (benchmarks/bench_staking.py)
+VECTORIZE_MIN_BETS = 100
+
+def _slate_arrays(bets):
+    """Group bets by match into padded (matches, outcomes) arrays
+
+    Padding slots get probability 0 and odds 1, so they are never staked.
+
+    Returns:
+        (prob, odds, slot) where slot[i] is the (match, column) of bet i
+    """
+    match_ids = {}
+    columns = []
+    for bet in bets:
+        index = match_ids.setdefault(bet['match'], len(match_ids))
+        columns.append(index)
+    match_index = np.array(columns, dtype=np.int64)
+    counts = np.bincount(match_index, minlength=len(match_ids))
+    # Position of each bet within its match, in list order
+    order = np.argsort(match_index, kind='stable')
+    column = np.empty(len(bets), dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    column[order] = np.arange(len(bets)) - np.repeat(starts, counts)
+
+    width = int(counts.max())
+    prob = np.zeros((len(match_ids), width))
+    odds = np.ones((len(match_ids), width))
+    prob[match_index, column] = [bet['opta_prob'] / 100 for bet in bets]
+    odds[match_index, column] = [bet['odds'] for bet in bets]
+    return prob, odds, (match_index, column)
+
+def kelly_fractions(prob, odds):
+    """Full-Kelly stakes for mutually exclusive outcomes, one row per match
+
+    Uses the Smoczynski-Tomkins solution for a single event with several
+    outcomes, evaluated for all matches at once: outcomes are taken in order
+    of expected revenue p * o while that exceeds the reserve rate
+    R = (1 - sum p) / (1 - sum 1/o) of the outcomes already taken, and each
+    taken outcome gets the stake p - R / o.
+
+    Args:
+        prob: (matches, outcomes) array of win probabilities (0-1)
+        odds: (matches, outcomes) array of decimal odds
+
+    Returns:
+        (matches, outcomes) array of stakes as fractions of the bankroll
+    """
+    revenue = prob * odds
+    order = np.argsort(-revenue, axis=1, kind='stable')
+    sorted_prob = np.take_along_axis(prob, order, axis=1)
+    sorted_odds = np.take_along_axis(odds, order, axis=1)
+    sorted_revenue = np.take_along_axis(revenue, order, axis=1)
+
+    # Reserve rate before adding the k-th outcome (R = 1 with nothing taken)
+    prob_taken = np.cumsum(sorted_prob, axis=1) - sorted_prob
+    inverse_odds_taken = np.cumsum(1 / sorted_odds, axis=1) - 1 / sorted_odds
+    denominator = 1 - inverse_odds_taken
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reserve_before = np.where(denominator > 0, (1 - prob_taken) / denominator, np.inf)
+    taken = np.logical_and.accumulate(sorted_revenue > reserve_before, axis=1)
+
+    # Reserve rate of the final set, then the stake of every taken outcome
+    prob_in = np.where(taken, sorted_prob, 0).sum(axis=1)
+    inverse_odds_in = np.where(taken, 1 / sorted_odds, 0).sum(axis=1)
+    reserve = np.where(taken.any(axis=1), (1 - prob_in) / (1 - inverse_odds_in), 1.0)
+    sorted_stakes = np.where(taken, sorted_prob - reserve[:, None] / sorted_odds, 0.0)
+
+    stakes = np.empty_like(sorted_stakes)
+    np.put_along_axis(stakes, order, np.maximum(sorted_stakes, 0), axis=1)
+    return stakes
+
+def _loop_kelly_fractions(bets):
+    """Full-Kelly stake per bet, solving one match at a time in plain Python
+
+    Same solution as kelly_fractions, cheaper for the small slates of a
+    normal run.
+
+    Returns:
+        List of stakes as fractions of the bankroll, in bet order
+    """
+    by_match = {}
+    for i, bet in enumerate(bets):
+        by_match.setdefault(bet['match'], []).append(i)
+
+    full_kelly = [0.0] * len(bets)
+    for indices in by_match.values():
+        # Stable sort on expected revenue, like the argsort in kelly_fractions
+        outcomes = sorted(indices, key=lambda i: -bets[i]['opta_prob'] / 100 * bets[i]['odds'])
+        taken = []
+        prob_in = inverse_odds_in = 0.0
+        reserve = 1.0
+        for i in outcomes:
+            prob = bets[i]['opta_prob'] / 100
+            if inverse_odds_in >= 1 or prob * bets[i]['odds'] <= reserve:
+                break
+            taken.append(i)
+            prob_in += prob
+            inverse_odds_in += 1 / bets[i]['odds']
+            reserve = (1 - prob_in) / (1 - inverse_odds_in)
+        for i in taken:
+            full_kelly[i] = max(bets[i]['opta_prob'] / 100 - reserve / bets[i]['odds'], 0.0)
+    return full_kelly
+
+def kelly_stakes(bets, kelly_fraction=DEFAULT_KELLY_FRACTION, max_exposure=DEFAULT_MAX_EXPOSURE):
+    """Suggested stake per bet as a fraction of the bankroll
+
+    Kelly is solved per match so home/draw/away are treated as mutually
+    exclusive, scaled by kelly_fraction, and the whole slate is scaled down
+    when its total stake exceeds max_exposure of the bankroll. Matches are
+    assumed independent; the cap keeps the combined exposure of simultaneous
+    matches in check.
+
+    Args:
+        bets: Bets as returned by analyze_match_data
+        kelly_fraction: Multiplier on the full-Kelly stakes (1.0 = full Kelly)
+        max_exposure: Largest total stake on the slate as a fraction of the bankroll
+
+    Returns:
+        Tuple (full-Kelly fractions, stake fractions), arrays in bet order
+    """
+    if not bets:
+        return np.zeros(0), np.zeros(0)
+    if len(bets) < VECTORIZE_MIN_BETS:
+        full_kelly = np.array(_loop_kelly_fractions(bets))
+    else:
+        prob, odds, slot = _slate_arrays(bets)
+        full_kelly = kelly_fractions(prob, odds)[slot]
+    stakes = full_kelly * kelly_fraction
+    total = stakes.sum()
+    if total > max_exposure:
+        stakes *= max_exposure / total
+    return full_kelly, stakes
+
+def attach_stakes(bets, bankroll=DEFAULT_BANKROLL, kelly_fraction=DEFAULT_KELLY_FRACTION,
+                  max_exposure=DEFAULT_MAX_EXPOSURE):
+    """Add kelly_fraction, stake_fraction and stake (in bankroll currency) to each bet dict
+
+    Returns:
+        The same list, for chaining
+    """
+    full_kelly, stakes = kelly_stakes(bets, kelly_fraction, max_exposure)
+    for bet, full, fraction in zip(bets, full_kelly.tolist(), stakes.tolist()):
+        bet['kelly_fraction'] = full
+        bet['stake_fraction'] = fraction
+        bet['stake'] = round(fraction * bankroll, 2)
+    return bets
@@ -0,0 +1,242 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from betting_utils import analyze_match_data
+from margins import DEFAULT_METHOD, MARGIN_METHODS, add_fair_probabilities
+from match_data import KICKOFF_TOLERANCE, build_team_index, match_fixture, parse_kickoffs
+from metrics import METRICS
+from team_resolver import LEARNED_ALIASES_FILE, load_learned_aliases, save_learned_aliases
+
+# Unibet rows read per chunk; memory use is bounded by the chunk, not the file
+CHUNK_ROWS = 50_000
+
+UNIBET_COLUMNS = ['competition', 'date_time', 'home_team', 'away_team', 'home_odds', 'draw_odds', 'away_odds']
+UNIBET_TEXT_COLUMNS = ['competition', 'date_time', 'home_team', 'away_team']
+
+def iter_unibet_chunks(source, chunk_rows=CHUNK_ROWS):
+    """Yield the Unibet odds as DataFrames of at most chunk_rows rows
+
+    Args:
+        source: Path to a CSV or Parquet file, or an iterable of record
+            batches (DataFrames, pyarrow RecordBatches/Tables or lists of dicts)
+        chunk_rows: Rows per chunk when reading a file
+    """
+    if isinstance(source, str):
+        if source.endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows, columns=UNIBET_COLUMNS):
+                yield batch.to_pandas()
+        else:
+            dtypes = {column: str for column in UNIBET_TEXT_COLUMNS}
+            yield from pd.read_csv(source, chunksize=chunk_rows, usecols=UNIBET_COLUMNS, dtype=dtypes)
+        return
+    for batch in source:
+        if hasattr(batch, 'to_pandas'):
+            batch = batch.to_pandas()
+        elif not isinstance(batch, pd.DataFrame):
+            batch = pd.DataFrame(batch)
+        yield batch
+
+def _kickoff_distance(team_index, unibet_position, kickoff):
+    """How far a matched game is from the fixture's kickoff, ranked as match_fixture ranks candidates
+
+    None when the fixture's kickoff is unknown: match_fixture then takes the
+    first game listed, so the first chunk's match stands.
+    """
+    if pd.isna(kickoff):
+        return None
+    return (unibet_position in team_index['unknown_kickoff'],
+            abs(int(team_index['kickoffs'][unibet_position]) - pd.Timestamp(kickoff).value))
+
+def match_chunk(opta_rows, chunk, skip=(), reference=None, aliases=None, kickoff_tolerance=KICKOFF_TOLERANCE):
+    """Match the Opta fixtures against one chunk of Unibet odds
+
+    Args:
+        opta_rows: List of (position, Opta row, kickoff) triples, built once per stream
+        chunk: DataFrame of Unibet odds
+        skip: Opta positions not to match again
+        reference: Time the kickoffs were parsed against (see parse_kickoffs)
+        aliases: Learned aliases shared by every chunk; aliases the resolver
+            learns in this chunk are added to it
+        kickoff_tolerance: Largest kickoff difference between a fixture and its game
+
+    Returns:
+        (list of (Opta position, matched row as dict, kickoff distance),
+        aliases learned in this chunk)
+    """
+    chunk = chunk.reset_index(drop=True)
+    for col in UNIBET_TEXT_COLUMNS:
+        chunk[col] = chunk[col].astype(str)
+    team_index = build_team_index(chunk, aliases, reference, kickoff_tolerance)
+    matches = []
+    for position, opta_row, kickoff in opta_rows:
+        if position in skip:
+            continue
+        result = match_fixture(opta_row, team_index, verbose=False, kickoff=kickoff)
+        if result:
+            matches.append((position, result[0], _kickoff_distance(team_index, result[2], kickoff)))
+    return matches, team_index['learned']
+
+def _analyse(matches, threshold, margin_method):
+    with METRICS.timer('stream.analyze'):
+        matched_df = add_fair_probabilities(pd.DataFrame(matches), margin_method)
+        bets = analyze_match_data(matched_df, threshold, margin_method=margin_method)
+    METRICS.count('stream.matched', len(matched_df))
+    METRICS.count('stream.bets', len(bets))
+    return matched_df, bets
+
+def stream_bets(unibet_source, opta_df=None, threshold=2.0, chunk_rows=CHUNK_ROWS,
+                once_per_fixture=True, margin_method=DEFAULT_METHOD, kickoff_tolerance=KICKOFF_TOLERANCE,
+                aliases_file=LEARNED_ALIASES_FILE):
+    """Match and analyse the Unibet odds chunk by chunk
+
+    Only the Opta fixtures (small), at most one match per fixture and one
+    Unibet chunk are held in memory. Each fixture is matched against a chunk
+    with the same rules as find_matching_games: competition and kickoff
+    window, aliases, and the fuzzy resolver with the learned aliases, which
+    are shared by all chunks and saved at the end like find_matching_games
+    does.
+
+    A match at the fixture's exact kickoff cannot be beaten, so it is
+    analysed with its chunk. Any other match is kept until the end of the
+    stream, replaced by a closer one from a later chunk, and the remaining
+    ones are analysed last. This gives the closest kickoff over the whole
+    file, as in find_matching_games.
+
+    Args:
+        unibet_source: Anything iter_unibet_chunks accepts
+        opta_df: Opta predictions (default: read opta_predictions.csv)
+        threshold: Minimum edge for a bet
+        chunk_rows: Rows per chunk when reading a file
+        once_per_fixture: Keep one match per fixture, the closest kickoff
+            (the same result as find_matching_games); False yields every
+            chunk's match, e.g. for a dump holding many odds snapshots of
+            each game
+        margin_method: Margin removal method for the analysis
+        kickoff_tolerance: Largest kickoff difference between a fixture and
+            its game (Timedelta)
+        aliases_file: Learned aliases to load and update (None: do not keep them)
+
+    Yields:
+        (matched DataFrame, bets) per chunk that matched anything
+    """
+    if opta_df is None:
+        opta_df = pd.read_csv('opta_predictions.csv')
+    reference = pd.Timestamp.now()
+    kickoffs = parse_kickoffs(opta_df['date_time'], reference)
+    opta_rows = [(position, row, kickoff) for position, ((_, row), kickoff) in enumerate(zip(opta_df.iterrows(), kickoffs))]
+    aliases = {}
+    if aliases_file:
+        aliases = load_learned_aliases(aliases_file)
+    learned = []
+    # Fixtures whose match cannot improve, and the best match so far of the others
+    final = set()
+    pending = {}
+
+    for chunk in iter_unibet_chunks(unibet_source, chunk_rows):
+        with METRICS.timer('stream.match'):
+            matches, chunk_learned = match_chunk(opta_rows, chunk, final if once_per_fixture else (),
+                                                 reference, aliases, kickoff_tolerance)
+        learned.extend(chunk_learned)
+        METRICS.count('stream.chunks')
+        METRICS.count('stream.unibet_rows', len(chunk))
+        ready = []
+        for position, match_data, distance in matches:
+            if not once_per_fixture:
+                ready.append(match_data)
+            elif distance is None or distance == (False, 0):
+                final.add(position)
+                pending.pop(position, None)
+                ready.append(match_data)
+            elif position not in pending or distance < pending[position][0]:
+                pending[position] = (distance, match_data)
+        if ready:
+            yield _analyse(ready, threshold, margin_method)
+
+    if pending:
+        yield _analyse([match_data for _, (_, match_data) in sorted(pending.items())], threshold, margin_method)
+    if learned:
+        print(f"Learned {len(learned)} team aliases: " + ", ".join(
+            f"{name} -> {resolved} ({competition}, {score:.2f})" for competition, name, resolved, score in learned))
+        if aliases_file:
+            save_learned_aliases(aliases, aliases_file)
+
+class AppendCsvSink:
+    """Append every chunk of a dataset to its own CSV file
+
+    The files are truncated on the first chunk of a run and the header is
+    written only once.
+
+    Args:
+        paths: dict of dataset ('matched' or 'bets') -> CSV path
+    """
+
+    def __init__(self, paths):
+        self.paths = dict(paths)
+        self.started = set()
+        self.rows = dict.fromkeys(self.paths, 0)
+
+    def write(self, dataset, df):
+        path = self.paths.get(dataset)
+        if path is None or df.empty:
+            return
+        first = dataset not in self.started
+        df.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+        self.started.add(dataset)
+        self.rows[dataset] += len(df)
+
+def run_stream(unibet_source, opta_df=None, sinks=None, threshold=2.0, chunk_rows=CHUNK_ROWS,
+               once_per_fixture=True, margin_method=DEFAULT_METHOD, kickoff_tolerance=KICKOFF_TOLERANCE,
+               aliases_file=LEARNED_ALIASES_FILE):
+    """Stream the odds through matching and analysis into the sinks
+
+    Each sink gets write('matched', df) and write('bets', df) per chunk, like
+    the pipeline sinks.
+
+    Returns:
+        dict with the number of chunks, matched rows and bets
+    """
+    sinks = list(sinks or [])
+    totals = {'chunks': 0, 'matched': 0, 'bets': 0}
+    start = time.perf_counter()
+    for matched_df, bets in stream_bets(unibet_source, opta_df, threshold, chunk_rows, once_per_fixture, margin_method,
+                                        kickoff_tolerance, aliases_file):
+        totals['chunks'] += 1
+        totals['matched'] += len(matched_df)
+        totals['bets'] += len(bets)
+        for sink in sinks:
+            sink.write('matched', matched_df)
+            sink.write('bets', pd.DataFrame(bets))
+        print(f"Chunk {totals['chunks']}: {len(matched_df)} matched, {len(bets)} bets "
+              f"({totals['matched']} matched / {totals['bets']} bets so far)")
+    print(f"\nStreamed {totals['matched']} matched rows and {totals['bets']} bets in {time.perf_counter() - start:.1f}s")
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description='Match and analyse a large Unibet odds export in bounded memory')
+    parser.add_argument('--unibet', type=str, required=True, help='Unibet odds CSV or Parquet file')
+    parser.add_argument('--opta', type=str, default='opta_predictions.csv', help='Opta predictions CSV (default: opta_predictions.csv)')
+    parser.add_argument('--chunk_rows', type=int, default=CHUNK_ROWS, help=f'Unibet rows per chunk (default: {CHUNK_ROWS:,})')
+    parser.add_argument('--threshold', type=float, default=2.0, help='Minimum edge for a bet (default: 2.0)')
+    parser.add_argument('--all_matches', action='store_true', help='Keep every chunk\'s match of a fixture, not only the closest kickoff')
+    parser.add_argument('--kickoff_tolerance', type=float, default=KICKOFF_TOLERANCE.total_seconds() / 60,
+                        help='Largest kickoff difference in minutes between an Opta fixture and its Unibet game (default: 90)')
+    parser.add_argument('--aliases_file', type=str, default=LEARNED_ALIASES_FILE, help='Team aliases learned by the fuzzy resolver, kept between runs')
+    parser.add_argument('--margin_method', choices=list(MARGIN_METHODS), default=DEFAULT_METHOD, help=f'How the bookmaker margin is removed (default: {DEFAULT_METHOD})')
+    parser.add_argument('--matched_out', type=str, default='matched_stream.csv', help='CSV the matched rows are appended to')
+    parser.add_argument('--bets_out', type=str, default='bets_stream.csv', help='CSV the bets are appended to')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.unibet):
+        parser.error(f"{args.unibet} does not exist")
+    sink = AppendCsvSink({'matched': args.matched_out, 'bets': args.bets_out})
+    run_stream(args.unibet, pd.read_csv(args.opta), [sink], args.threshold, args.chunk_rows,
+               not args.all_matches, args.margin_method, pd.Timedelta(minutes=args.kickoff_tolerance), args.aliases_file)
+    print(f"Wrote {sink.rows['matched']} rows to {args.matched_out} and {sink.rows['bets']} rows to {args.bets_out}")
+
+if __name__ == "__main__":
+    main()
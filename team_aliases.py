@@ -0,0 +1,200 @@
+import marshal
+import os
+import sys
+import zlib
+from types import MappingProxyType
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Team aliases as (competition, code, name) rows; '*' applies in every competition
+ALIASES_FILE = os.path.join(ROOT, 'team_aliases.csv')
+
+# Compiled tables are cached here, outside the source tree, and rebuilt whenever
+# the CSV's size or modification time changes; OPTA_BETS_CACHE_DIR overrides it
+CACHE_DIR_ENV = 'OPTA_BETS_CACHE_DIR'
+CACHE_VERSION = 2
+
+WILDCARD = '*'
+
+class AliasConflictError(ValueError):
+    """The alias file maps one (competition, code) to different names"""
+
+def read_alias_rows(path=ALIASES_FILE):
+    """Read the alias file, skipping blank lines and '#' comments
+
+    Returns:
+        list of (line number, competition, code, name)
+    """
+    import csv
+
+    rows = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        if [column.strip() for column in header] != ['competition', 'code', 'name']:
+            raise ValueError(f"{path} must start with the header competition,code,name")
+        for row in reader:
+            if len(row) == 3:
+                competition, code, name = row[0].strip(), row[1].strip(), row[2].strip()
+                if (competition or code or name) and not competition.startswith('#'):
+                    rows.append((reader.line_num, competition, code, name))
+                    continue
+            if not row or not ''.join(row).strip() or row[0].lstrip().startswith('#'):
+                continue
+            raise ValueError(f"{path}:{reader.line_num}: expected competition,code,name, got {row}")
+    return rows
+
+def compile_aliases(rows, path=ALIASES_FILE):
+    """Build {competition: {code: name}} and list the rows that repeat a (competition, code)
+
+    A (competition, code) listed twice with the same name is a duplicate;
+    listed with different names it is a conflict. Either way the first row
+    wins. A competition row may override a '*' row for the same code.
+
+    Returns:
+        (table, duplicate messages, conflict messages)
+    """
+    table = {}
+    first_line = {}
+    duplicates = []
+    conflicts = []
+    for line, competition, code, name in rows:
+        key = (competition, code)
+        aliases = table.setdefault(sys.intern(competition), {})
+        if key in first_line:
+            if aliases[code] == name:
+                duplicates.append(f"{path}:{line}: duplicate alias {competition}/{code} -> {name} "
+                                  f"(first on line {first_line[key]})")
+            else:
+                conflicts.append(f"{path}:{line}: {competition}/{code} -> {name} conflicts with "
+                                 f"{aliases[code]} on line {first_line[key]}")
+            continue
+        first_line[key] = line
+        aliases[sys.intern(code)] = sys.intern(name)
+    return table, duplicates, conflicts
+
+def validate_aliases(path=ALIASES_FILE):
+    """Check the alias file, printing duplicates and raising every conflict at once
+
+    load_aliases only warns about conflicts (the first row wins), so run
+    this, or `python team_aliases.py`, after editing the file.
+
+    Returns:
+        dict: The compiled {competition: {code: name}} table
+
+    Raises:
+        AliasConflictError: When a (competition, code) maps to different names
+    """
+    table, duplicates, conflicts = compile_aliases(read_alias_rows(path), path)
+    for duplicate in duplicates:
+        print(duplicate)
+    if conflicts:
+        raise AliasConflictError("Conflicting team aliases:\n" + "\n".join(conflicts))
+    return table
+
+def freeze_aliases(table):
+    """Read-only view of a compiled table, safe to share between callers"""
+    return MappingProxyType({competition: MappingProxyType(aliases) for competition, aliases in table.items()})
+
+def default_cache_file(path=ALIASES_FILE):
+    """Cache file for an alias CSV under the user cache directory (one per CSV path)"""
+    cache_dir = os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'opta-bets')
+    path = os.path.abspath(path)
+    return os.path.join(cache_dir, f"team_aliases-{zlib.crc32(path.encode('utf-8')):08x}.marshal")
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return [CACHE_VERSION, os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+def load_aliases(path=ALIASES_FILE, cache_file=None):
+    """Load the compiled alias table, compiling the CSV only when the cache is stale
+
+    The cache holds the table in marshal format (strings stay interned) with
+    the CSV's size and modification time. A cache that cannot be read or
+    written is ignored, so a read-only install just compiles the CSV.
+    Conflicting aliases are printed as a warning on every load (the first
+    row wins); validate_aliases raises on them instead.
+
+    Args:
+        path: Alias CSV
+        cache_file: Compiled cache (default: default_cache_file(path); '' disables it)
+
+    Returns:
+        Read-only {competition: {code: name}} mapping
+    """
+    if cache_file is None:
+        cache_file = default_cache_file(path)
+    stamp = _source_stamp(path)
+    table = conflicts = None
+    if cache_file:
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_stamp, cached_table, cached_conflicts = marshal.loads(f.read())
+            if cached_stamp == stamp:
+                table, conflicts = cached_table, cached_conflicts
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+    if table is None:
+        table, _, conflicts = compile_aliases(read_alias_rows(path), path)
+        if cache_file:
+            try:
+                os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(marshal.dumps([stamp, table, conflicts]))
+                os.replace(tmp_file, cache_file)
+            except OSError:
+                pass
+    if conflicts:
+        print(f"Warning: {len(conflicts)} conflicting team aliases, the first row wins "
+              f"(run python team_aliases.py):\n" + "\n".join(conflicts))
+    return freeze_aliases(table)
+
+def alias_for(aliases, competition, code):
+    """Name a code stands for in a competition, else its '*' alias, else None"""
+    scoped = aliases.get(competition)
+    if scoped is not None and code in scoped:
+        return scoped[code]
+    return aliases[WILDCARD].get(code) if WILDCARD in aliases else None
+
+def flat_aliases(aliases):
+    """Flat {code: name} view for callers that do not know the competition
+
+    Holds the '*' aliases plus competition aliases whose code means the same
+    team everywhere; codes whose name depends on the competition are left out.
+    """
+    names = {}
+    for competition, scoped in aliases.items():
+        if competition == WILDCARD:
+            continue
+        for code, name in scoped.items():
+            names.setdefault(code, set()).add(name)
+    flat = {code: next(iter(found)) for code, found in names.items() if len(found) == 1}
+    flat.update(aliases.get(WILDCARD, {}))
+    return flat
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check the team alias table and compile its cache')
+    parser.add_argument('--file', type=str, default=ALIASES_FILE, help='Alias CSV (default: team_aliases.csv)')
+    parser.add_argument('--cache_file', type=str, default=None, help='Compiled cache to write (default: under ~/.cache/opta-bets)')
+    args = parser.parse_args()
+    cache_file = default_cache_file(args.file) if args.cache_file is None else args.cache_file
+
+    try:
+        table = validate_aliases(args.file)
+    except (AliasConflictError, ValueError) as e:
+        print(e)
+        sys.exit(1)
+    # Rebuild the cache now, e.g. as an install step, so the first import does not compile the CSV
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+    load_aliases(args.file, cache_file)
+    scoped = sum(len(aliases) for competition, aliases in table.items() if competition != WILDCARD)
+    print(f"{len(table.get(WILDCARD, {}))} aliases for every competition and {scoped} scoped to "
+          f"{len(table) - (WILDCARD in table)} competitions; compiled to {cache_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import re
+from functools import lru_cache
+
+# Common prefixes/suffixes to remove or shorten, in order of precedence.
+# 'afc ' is intentionally absent: the old one-by-one str.replace loop stripped
+# 'fc ' first, so 'afc ' could never match and 'AFC X' normalized to 'ax'.
+TEAM_TOKEN_REPLACEMENTS = {
+    'fc ': '', ' fc': '', 
+    'asc ': '', ' asc': '',
+    'ac ': '', ' ac': '',
+    'as ': '', ' as': '',
+    'ss ': '', ' ss': '',
+    'cf ': '', ' cf': '',
+    'united': 'utd',
+    'real ': '',
+    'racing ': '',
+    'olympic ': '',
+    'olympique ': '',
+    'athletic ': '',
+    'atletico ': '',
+    'rc ': '',
+    'rcd ': '',
+    'sd ': '',
+    'ud ': '',
+    'cd ': '',
+    'stade ': '',
+    'saint': 'st',
+    'sporting ': '',
+    'deportivo ': '',
+    'rovers': '',
+    'albion': '',
+    'city': '',
+    'town': '',
+    ' & ': '',
+    ' and ': '',
+}
+
+# Accents and special characters, folded after the token replacements
+TEAM_CHARACTER_FOLDING = str.maketrans({
+    'á': 'a', 'à': 'a', 'ã': 'a', 'â': 'a',
+    'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+    'í': 'i', 'ì': 'i', 'î': 'i', 'ï': 'i',
+    'ó': 'o', 'ò': 'o', 'õ': 'o', 'ô': 'o',
+    'ú': 'u', 'ù': 'u', 'û': 'u', 'ü': 'u',
+    'ý': 'y', 'ÿ': 'y',
+    'ñ': 'n',
+    'ß': 'ss',
+    'ø': 'o',
+    'æ': 'ae',
+    '-': ' ',
+    '.': None,
+})
+
+TEAM_TOKEN_PATTERN = re.compile('|'.join(re.escape(token) for token in TEAM_TOKEN_REPLACEMENTS))
+
+@lru_cache(maxsize=8192)
+def normalize_team_name(name):
+    """Normalize team name for better matching by removing common variations
+
+    One alternation regex handles the prefix/suffix tokens and one translate
+    table folds accents and punctuation. Results are cached per raw name.
+    """
+    normalized = TEAM_TOKEN_PATTERN.sub(
+        lambda match: TEAM_TOKEN_REPLACEMENTS[match.group(0)], name.lower()
+    )
+    normalized = normalized.translate(TEAM_CHARACTER_FOLDING)
+
+    # Remove multiple spaces and strip
+    return ' '.join(normalized.split())
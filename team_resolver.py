@@ -0,0 +1,215 @@
+import heapq
+import json
+import os
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+
+from team_names import TEAM_CHARACTER_FOLDING, normalize_team_name
+
+# Team names the fuzzy resolver accepted in earlier runs: {competition: {Opta name: Unibet name}}
+LEARNED_ALIASES_FILE = 'learned_aliases.json'
+
+# Lowest score a resolution is accepted at without a human looking at it
+AUTO_ACCEPT = 0.8
+
+# The best candidate must beat the runner-up by this much, otherwise the name is ambiguous
+AMBIGUITY_MARGIN = 0.05
+
+# A full name is only scored against names sharing this fraction of its trigrams,
+# and only against the MAX_CANDIDATES of them with the highest trigram overlap
+MIN_SHARED_TRIGRAMS = 0.3
+MAX_CANDIDATES = 25
+
+# Scores of the abbreviation rules for short codes such as Opta's 'CAG' or 'M05'
+PREFIX_SCORE = 0.95        # code starts the name: NOR -> Norwich City
+WORD_PREFIX_SCORE = 0.9    # code starts a later word: BOC -> VfL Bochum
+INITIALS_SCORE = 0.9       # code spells the initials: PSG -> Paris Saint-Germain
+WORD_STARTS_SCORE = 0.85   # code is spelled in order using every word's first letter: MCI -> Manchester City
+FIRST_WORD_SCORE = 0.85    # code is spelled in order inside the first word: CAG -> Cagliari
+SPREAD_SCORE = 0.75        # code is spelled in order some other way (below AUTO_ACCEPT)
+
+# Same normalized name, or its whole words all appear in the other one: Liverpool -> Liverpool FC.
+# Only identical plain names score 1, since normalizing also maps Atlético Madrid and Real Madrid to 'madrid'
+TOKEN_SCORE = 0.9
+
+CODE_PATTERN = re.compile(r'[A-Z0-9]{2,4}')
+
+def is_code(name):
+    """True for short upper-case codes such as 'CAG', 'M05' or 'OL'"""
+    return bool(CODE_PATTERN.fullmatch(name))
+
+def plain_name(name):
+    """Lower-case, accent-folded words of a name, keeping the FC/AS/City tokens codes are built from"""
+    return ' '.join(name.lower().translate(TEAM_CHARACTER_FOLDING).split())
+
+def trigrams(normalized):
+    """Character trigrams of a normalized name, padded so word starts count"""
+    padded = f" {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _spell(code, words):
+    """Spell code in order from words, preferring the first letter of the next word
+
+    Returns:
+        list: (word index, at word start) per letter of code, or None when code
+        cannot be spelled starting at words[0][0]
+    """
+    if not words or not words[0] or words[0][0] != code[0]:
+        return None
+    spelled = [(0, True)]
+    word, position = 0, 1
+    for char in code[1:]:
+        if word + 1 < len(words) and words[word + 1][:1] == char:
+            word, position = word + 1, 1
+            spelled.append((word, True))
+            continue
+        found = words[word].find(char, position)
+        while found < 0 and word + 1 < len(words):
+            word += 1
+            found = words[word].find(char)
+        if found < 0:
+            return None
+        position = found + 1
+        spelled.append((word, found == 0))
+    return spelled
+
+def abbreviation_score(code, plain):
+    """How well a short code abbreviates a name in plain_name form (0 when it does not)"""
+    code = code.lower()
+    words = plain.split()
+    if not words:
+        return 0.0
+    if ''.join(words).startswith(code):
+        return PREFIX_SCORE
+    if any(word.startswith(code) for word in words[1:]):
+        return WORD_PREFIX_SCORE
+    if len(words) > 1 and ''.join(word[0] for word in words) == code:
+        return INITIALS_SCORE
+    spelled = _spell(code, words)
+    if spelled is None:
+        return 0.0
+    if len(words) > 1 and {word for word, at_start in spelled if at_start} == set(range(len(words))):
+        return WORD_STARTS_SCORE
+    if {word for word, _ in spelled} == {0}:
+        return FIRST_WORD_SCORE
+    return SPREAD_SCORE
+
+def name_score(query, normalized):
+    """Similarity of two normalized full names: whole-word containment or edit similarity"""
+    query_words, words = set(query.split()), set(normalized.split())
+    if query_words and words and (query_words <= words or words <= query_words):
+        return TOKEN_SCORE
+    return SequenceMatcher(None, query, normalized).ratio()
+
+class TeamResolver:
+    """Resolve a team name or code to one of a fixed set of known names
+
+    Known names are indexed once: an inverted index from character trigram
+    to the names containing it, and an index from first letter to names for
+    abbreviation codes. A lookup only scores the names that share a trigram
+    or first letter with the query, not the whole list.
+
+    Args:
+        names: Known team names, e.g. the Unibet names of one competition
+        threshold: Lowest score resolve() accepts
+    """
+
+    def __init__(self, names, threshold=AUTO_ACCEPT):
+        self.names = list(dict.fromkeys(names))
+        self.threshold = threshold
+        self.normalized = [normalize_team_name(name) for name in self.names]
+        self.plain = [plain_name(name) for name in self.names]
+        self.gram_index = {}
+        self.gram_counts = []
+        self.initial_index = {}
+        for position, (normalized, plain) in enumerate(zip(self.normalized, self.plain)):
+            grams = trigrams(normalized)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.gram_index.setdefault(gram, []).append(position)
+            for initial in {word[0] for word in plain.split()}:
+                self.initial_index.setdefault(initial, []).append(position)
+
+    def candidates(self, query):
+        """Positions of the names worth scoring against a query
+
+        A code is scored against the names with a word starting with its
+        first letter. A full name is scored against the names sharing enough
+        trigrams, best trigram Dice coefficient first.
+        """
+        if is_code(query):
+            return list(self.initial_index.get(query[0].lower(), []))
+        grams = trigrams(normalize_team_name(query))
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.gram_index.get(gram, ()))
+        min_shared = max(1, int(len(grams) * MIN_SHARED_TRIGRAMS))
+        dice = {
+            position: 2 * shared / (len(grams) + self.gram_counts[position])
+            for position, shared in counts.items() if shared >= min_shared
+        }
+        return heapq.nlargest(MAX_CANDIDATES, dice, key=dice.get)
+
+    def score(self, query, position):
+        """Score of one known name against a query, from 0 to 1"""
+        if is_code(query):
+            return abbreviation_score(query, self.plain[position])
+        if plain_name(query) == self.plain[position]:
+            return 1.0
+        return name_score(normalize_team_name(query), self.normalized[position])
+
+    def rank(self, queries):
+        """Known names scored against the best of several queries, best first
+
+        Args:
+            queries: Names for the same team, e.g. an Opta code and its team alias
+
+        Returns:
+            list of (score, name)
+        """
+        scores = {}
+        for query in queries:
+            if not query:
+                continue
+            for position in self.candidates(query):
+                scores[position] = max(scores.get(position, 0.0), self.score(query, position))
+        return sorted(((score, self.names[position]) for position, score in scores.items() if score > 0), reverse=True)
+
+    def resolve(self, *queries):
+        """Best known name if it clears the threshold and is not ambiguous
+
+        Returns:
+            tuple: (name or None, score of the best candidate)
+        """
+        ranked = self.rank(queries)
+        if not ranked:
+            return None, 0.0
+        best_score, best_name = ranked[0]
+        if best_score < self.threshold:
+            return None, best_score
+        if len(ranked) > 1 and best_score - ranked[1][0] < AMBIGUITY_MARGIN:
+            return None, best_score
+        return best_name, best_score
+
+def load_learned_aliases(aliases_file=LEARNED_ALIASES_FILE):
+    """Load the aliases accepted in earlier runs (empty if missing or unreadable)
+
+    Returns:
+        dict: {competition: {team name or code: Unibet name}}
+    """
+    if not os.path.exists(aliases_file):
+        return {}
+    try:
+        with open(aliases_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable aliases {aliases_file}: {e}")
+        return {}
+
+def save_learned_aliases(aliases, aliases_file=LEARNED_ALIASES_FILE):
+    """Write the aliases atomically, sorted so the file diffs cleanly"""
+    tmp_file = f"{aliases_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(aliases, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_file, aliases_file)
@@ -0,0 +1,305 @@
+# HTML backends for extracting Unibet match cards.
+#
+# Every backend takes the page source and returns one row per match card in
+# UNIBET_COLUMNS order, or None when the page has no matches list. selectolax
+# and lxml are optional; BeautifulSoup is always available as the fallback and
+# defines the reference behaviour, including treating an element without any
+# child nodes as missing.
+from bs4 import BeautifulSoup
+
+UNIBET_COLUMNS = [
+    'competition',
+    'date_time',
+    'home_team',
+    'away_team',
+    'home_odds',
+    'draw_odds',
+    'away_odds'
+]
+
+# Preferred order when the backend is 'auto'
+BACKEND_PREFERENCE = ['selectolax', 'lxml', 'bs4']
+
+def _competition(comp_text):
+    return comp_text[:3] if len(comp_text) >= 3 else comp_text
+
+def _odds_value(odds_str):
+    try:
+        return float(odds_str) if odds_str else ''
+    except (ValueError, AttributeError):
+        return odds_str
+
+def _card_row(competition, date_time, home_team, away_team, odds):
+    home_odds, draw_odds, away_odds = odds if odds else ('', '', '')
+    return [competition, date_time, home_team, away_team, home_odds, draw_odds, away_odds]
+
+def extract_cards_bs4(page_source):
+    """Extract match cards with BeautifulSoup and the built-in html.parser"""
+    soup = BeautifulSoup(page_source, 'html.parser')
+
+    # Find the container with match cards; based on provided html structure
+    matches_list = soup.find('div', id='matches-list')
+    if not matches_list:
+        return None
+
+    rows = []
+    for card in matches_list.find_all('a'):
+        try:
+            # Extract competition from first .match-details.small-text block
+            comp_container = card.find('div', class_='match-details')
+            competition = 'Unknown'
+            if comp_container:
+                path_div = comp_container.find('div', class_='match-details-path')
+                if path_div:
+                    span = path_div.find('span')
+                    if span and span.text.strip():
+                        competition = _competition(span.text.strip())
+
+            # Extract date and time from second .match-details.small-text block
+            date_time = 'Unknown'
+            details_blocks = card.find_all('div', class_='match-details')
+            if len(details_blocks) >= 2:
+                clock_div = details_blocks[-1].find('div', class_='match-clock')
+                if clock_div and clock_div.text.strip():
+                    date_time = clock_div.text.strip()
+
+            # Extract team names from the live-match section
+            home_team = 'Unknown'
+            away_team = 'Unknown'
+            live_match = card.find('div', class_='live-match')
+            if live_match:
+                participants = live_match.find('div', class_='match-participants')
+                if participants:
+                    team_divs = participants.find_all('div')
+                    if len(team_divs) >= 2:
+                        home_team = team_divs[0].text.strip()
+                        away_team = team_divs[1].text.strip()
+
+            # Extract odds from bet-button elements using data-odds-decimal attribute
+            odds = None
+            bets_div = card.find('div', class_='bets')
+            if bets_div:
+                bet_divs = bets_div.find_all('div', class_='bet', recursive=False)
+                if len(bet_divs) >= 3:
+                    def extract_odds(bet_div):
+                        # Find any element within bet-div that has data-odds-decimal
+                        odds_element = bet_div.find(attrs={'data-odds-decimal': True})
+                        if odds_element:
+                            return _odds_value(odds_element['data-odds-decimal'])
+                        return ''
+
+                    odds = [extract_odds(bet_div) for bet_div in bet_divs[:3]]
+
+            rows.append(_card_row(competition, date_time, home_team, away_team, odds))
+        except Exception as e:
+            print(f'Error processing a match card: {e}')
+            continue
+    return rows
+
+_lxml_xpaths = None
+
+def _lxml_compiled():
+    """Compile the lxml XPath expressions once, on first use"""
+    global _lxml_xpaths
+    if _lxml_xpaths is None:
+        from lxml import etree
+
+        def with_class(axis, class_name):
+            return f"{axis}div[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+        _lxml_xpaths = {
+            'matches_list': etree.XPath("(//div[@id='matches-list'])[1]"),
+            'cards': etree.XPath('descendant::a'),
+            'match_details': etree.XPath(with_class('descendant::', 'match-details')),
+            'details_path': etree.XPath(f"({with_class('descendant::', 'match-details-path')})[1]"),
+            'first_span': etree.XPath('(descendant::span)[1]'),
+            'match_clock': etree.XPath(f"({with_class('descendant::', 'match-clock')})[1]"),
+            'live_match': etree.XPath(f"({with_class('descendant::', 'live-match')})[1]"),
+            'participants': etree.XPath(f"({with_class('descendant::', 'match-participants')})[1]"),
+            'divs': etree.XPath('descendant::div'),
+            'bets': etree.XPath(f"({with_class('descendant::', 'bets')})[1]"),
+            'bet_children': etree.XPath(with_class('child::', 'bet')),
+            'odds_element': etree.XPath('(descendant::*[@data-odds-decimal])[1]'),
+        }
+    return _lxml_xpaths
+
+def _lxml_present(elements):
+    """First element of an XPath result, treated as missing when it has no child nodes"""
+    if not elements:
+        return None
+    element = elements[0]
+    if len(element) == 0 and not element.text:
+        return None
+    return element
+
+def extract_cards_lxml(page_source):
+    """Extract match cards with lxml and precompiled XPath expressions"""
+    import lxml.html
+
+    xpaths = _lxml_compiled()
+    try:
+        document = lxml.html.document_fromstring(page_source)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        document = lxml.html.document_fromstring(page_source.encode('utf-8'))
+
+    matches_list = _lxml_present(xpaths['matches_list'](document))
+    if matches_list is None:
+        return None
+
+    rows = []
+    for card in xpaths['cards'](matches_list):
+        try:
+            details_blocks = xpaths['match_details'](card)
+
+            competition = 'Unknown'
+            comp_container = _lxml_present(details_blocks)
+            if comp_container is not None:
+                path_div = _lxml_present(xpaths['details_path'](comp_container))
+                if path_div is not None:
+                    span = _lxml_present(xpaths['first_span'](path_div))
+                    if span is not None and span.text_content().strip():
+                        competition = _competition(span.text_content().strip())
+
+            date_time = 'Unknown'
+            if len(details_blocks) >= 2:
+                clock_div = _lxml_present(xpaths['match_clock'](details_blocks[-1]))
+                if clock_div is not None and clock_div.text_content().strip():
+                    date_time = clock_div.text_content().strip()
+
+            home_team = 'Unknown'
+            away_team = 'Unknown'
+            live_match = _lxml_present(xpaths['live_match'](card))
+            if live_match is not None:
+                participants = _lxml_present(xpaths['participants'](live_match))
+                if participants is not None:
+                    team_divs = xpaths['divs'](participants)
+                    if len(team_divs) >= 2:
+                        home_team = team_divs[0].text_content().strip()
+                        away_team = team_divs[1].text_content().strip()
+
+            odds = None
+            bets_div = _lxml_present(xpaths['bets'](card))
+            if bets_div is not None:
+                bet_divs = xpaths['bet_children'](bets_div)
+                if len(bet_divs) >= 3:
+                    odds = []
+                    for bet_div in bet_divs[:3]:
+                        odds_element = _lxml_present(xpaths['odds_element'](bet_div))
+                        odds.append('' if odds_element is None else _odds_value(odds_element.get('data-odds-decimal')))
+
+            rows.append(_card_row(competition, date_time, home_team, away_team, odds))
+        except Exception as e:
+            print(f'Error processing a match card: {e}')
+            continue
+    return rows
+
+def _selectolax_present(node):
+    """Treat a node without any child nodes as missing, like BeautifulSoup does"""
+    if node is None or node.child is None:
+        return None
+    return node
+
+def _selectolax_descendants(node, selector):
+    """Lexbor's css() also matches the node itself; BeautifulSoup only searches below it"""
+    return [match for match in node.css(selector) if match.mem_id != node.mem_id]
+
+def _selectolax_first(node, selector):
+    matches = _selectolax_descendants(node, selector)
+    return matches[0] if matches else None
+
+def _selectolax_text(node):
+    return node.text(deep=True).strip()
+
+def extract_cards_selectolax(page_source):
+    """Extract match cards with selectolax (Lexbor engine) CSS selectors"""
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(page_source)
+    matches_list = _selectolax_present(tree.css_first('div#matches-list'))
+    if matches_list is None:
+        return None
+
+    rows = []
+    for card in _selectolax_descendants(matches_list, 'a'):
+        try:
+            details_blocks = _selectolax_descendants(card, 'div.match-details')
+
+            competition = 'Unknown'
+            comp_container = _selectolax_present(details_blocks[0] if details_blocks else None)
+            if comp_container is not None:
+                path_div = _selectolax_present(_selectolax_first(comp_container, 'div.match-details-path'))
+                if path_div is not None:
+                    span = _selectolax_present(_selectolax_first(path_div, 'span'))
+                    if span is not None and _selectolax_text(span):
+                        competition = _competition(_selectolax_text(span))
+
+            date_time = 'Unknown'
+            if len(details_blocks) >= 2:
+                clock_div = _selectolax_present(_selectolax_first(details_blocks[-1], 'div.match-clock'))
+                if clock_div is not None and _selectolax_text(clock_div):
+                    date_time = _selectolax_text(clock_div)
+
+            home_team = 'Unknown'
+            away_team = 'Unknown'
+            live_match = _selectolax_present(_selectolax_first(card, 'div.live-match'))
+            if live_match is not None:
+                participants = _selectolax_present(_selectolax_first(live_match, 'div.match-participants'))
+                if participants is not None:
+                    team_divs = _selectolax_descendants(participants, 'div')
+                    if len(team_divs) >= 2:
+                        home_team = _selectolax_text(team_divs[0])
+                        away_team = _selectolax_text(team_divs[1])
+
+            odds = None
+            bets_div = _selectolax_present(_selectolax_first(card, 'div.bets'))
+            if bets_div is not None:
+                bet_divs = [
+                    child for child in bets_div.iter(include_text=False)
+                    if child.tag == 'div' and 'bet' in (child.attributes.get('class') or '').split()
+                ]
+                if len(bet_divs) >= 3:
+                    odds = []
+                    for bet_div in bet_divs[:3]:
+                        odds_element = _selectolax_present(_selectolax_first(bet_div, '[data-odds-decimal]'))
+                        odds.append('' if odds_element is None else _odds_value(odds_element.attributes.get('data-odds-decimal')))
+
+            rows.append(_card_row(competition, date_time, home_team, away_team, odds))
+        except Exception as e:
+            print(f'Error processing a match card: {e}')
+            continue
+    return rows
+
+PARSER_BACKENDS = {
+    'selectolax': extract_cards_selectolax,
+    'lxml': extract_cards_lxml,
+    'bs4': extract_cards_bs4,
+}
+
+def _backend_installed(name):
+    if name == 'bs4':
+        return True
+    try:
+        __import__('selectolax.lexbor' if name == 'selectolax' else 'lxml.html')
+        return True
+    except ImportError:
+        return False
+
+def available_backends():
+    """Names of the installed backends, fastest first"""
+    return [name for name in BACKEND_PREFERENCE if _backend_installed(name)]
+
+def get_parser_backend(name='auto'):
+    """Return (name, extract function) for a backend, falling back to BeautifulSoup
+
+    Args:
+        name: 'auto' for the fastest installed backend, or one of PARSER_BACKENDS
+    """
+    if name == 'auto':
+        name = available_backends()[0]
+    elif name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}', choose from {', '.join(PARSER_BACKENDS)}")
+    elif not _backend_installed(name):
+        print(f"Parser backend '{name}' is not installed, falling back to BeautifulSoup")
+        name = 'bs4'
+    return name, PARSER_BACKENDS[name]
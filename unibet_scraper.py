@@ -1,150 +1,202 @@
 #!/usr/bin/env python
 import pandas as pd
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+import argparse
 import time
+import requests
+from requests.adapters import HTTPAdapter
 
-# Setup undetected Chrome with additional options
-options = uc.ChromeOptions()
-options.add_argument('--window-size=1920,1080')
-options.add_argument('--no-first-run')
-options.add_argument('--no-service-autorun')
-options.add_argument('--password-store=basic')
-dr = uc.Chrome(options=options)
+from browser_pool import BrowserPool
+from metrics import METRICS, export_child_metrics
+from unibet_parsers import UNIBET_COLUMNS, get_parser_backend
 
-try:
+UNIBET_URL = 'https://valuebase.io/api/bestbacked/toppicks?market=www.unibet.nl'
+
+# Browser-like headers for the plain HTTP fetch; requests decompresses gzip/deflate
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Accept-Language': 'nl-NL,nl;q=0.9,en;q=0.8',
+}
+
+_http_session = None
+
+def get_http_session():
+    """Return the shared HTTP session, which keeps connections alive between fetches"""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=2)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(HTTP_HEADERS)
+        _http_session = session
+    return _http_session
+
+def fetch_unibet_html(url=UNIBET_URL, timeout=15):
+    """Download the top picks page over plain HTTP, without a browser"""
+    with METRICS.timer('unibet.fetch_http'):
+        response = get_http_session().get(url, timeout=timeout)
+    METRICS.count('unibet.bytes_fetched', len(response.content))
+    response.raise_for_status()
+    # Without a charset header requests assumes ISO-8859-1, which mangles team names
+    if 'charset' not in response.headers.get('Content-Type', '').lower():
+        response.encoding = 'utf-8'
+    return response.text
+
+def has_odds(df):
+    """Check that at least one parsed match has all three odds filled in"""
+    if df.empty:
+        return False
+    odds = df[['home_odds', 'draw_odds', 'away_odds']]
+    return bool((odds.notna() & (odds != '')).all(axis=1).any())
+
+def fetch_unibet_odds(mode='auto', pool=None, url=UNIBET_URL, parser_backend='auto'):
+    """Get the Unibet odds over plain HTTP, using Chrome only when that fails
+    
+    Args:
+        mode: 'http' (no browser), 'chrome' (browser only) or 'auto' (HTTP first,
+            Chrome as fallback when the fetch fails or yields no odds)
+        pool: BrowserPool for the Chrome path (a temporary pool is used if None)
+        url: Page to load
+        parser_backend: HTML backend passed to parse_unibet_html
+        
+    Returns:
+        DataFrame in the same format as scrape_unibet_odds
+    """
+    if mode in ('http', 'auto'):
+        start = time.perf_counter()
+        try:
+            df = parse_unibet_html(fetch_unibet_html(url), parser_backend)
+            elapsed = time.perf_counter() - start
+            if has_odds(df):
+                print(f'Fetched {len(df)} matches over HTTP in {elapsed:.2f}s')
+                return df
+            print(f'HTTP fetch returned no odds after {elapsed:.2f}s')
+            if mode == 'http':
+                return df
+        except Exception as e:
+            print(f'HTTP fetch failed after {time.perf_counter() - start:.2f}s: {e}')
+            if mode == 'http':
+                raise
+        print('Falling back to Chrome...')
+    
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool()
+    start = time.perf_counter()
+    try:
+        with pool.lease() as driver:
+            df = scrape_unibet_odds(driver, url, parser_backend)
+    finally:
+        if own_pool:
+            print('Closing browser...')
+            pool.close()
+    print(f'Fetched {len(df)} matches with Chrome in {time.perf_counter() - start:.2f}s')
+    return df
+
+def scrape_unibet_odds(driver, url=UNIBET_URL, parser_backend='auto'):
+    """Scrape the Unibet top picks with an existing WebDriver
+    
+    Args:
+        driver: Selenium WebDriver to load the page with (e.g. leased from a BrowserPool)
+        url: Page to load
+        parser_backend: HTML backend passed to parse_unibet_html
+        
+    Returns:
+        DataFrame with one row per match: competition, date_time, teams and
+        home/draw/away decimal odds
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
     # Access Unibet URL
-    url = 'https://valuebase.io/api/bestbacked/toppicks?market=www.unibet.nl'
     print(f'Accessing URL: {url}')
-    dr.get(url)
+    start = time.perf_counter()
+    driver.get(url)
     print('Page loaded, waiting for content...')
 
-    wait = WebDriverWait(dr, 10)
+    wait = WebDriverWait(driver, 10)
     wait.until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+    round_trips = 2
     
     # Wait until at least one odds element is populated in the bets section
-    wait.until(lambda d: any(b.text.strip() for b in d.find_elements(By.CSS_SELECTOR, '.bets .bet')))
+    def odds_populated(d):
+        nonlocal round_trips
+        round_trips += 1
+        for bet in d.find_elements(By.CSS_SELECTOR, '.bets .bet'):
+            round_trips += 1
+            if bet.text.strip():
+                return True
+        return False
+    wait.until(odds_populated)
     
     # For debugging: print part of the page source
-    page_source = dr.page_source
+    page_source = driver.page_source
+    METRICS.observe('unibet.fetch_chrome', time.perf_counter() - start)
+    METRICS.count('unibet.webdriver_round_trips', round_trips + 1)
     print('\nPage source preview:')
     print(page_source[:1000])
 
-    # Use BeautifulSoup to parse the HTML
-    soup = BeautifulSoup(page_source, 'html.parser')
+    return parse_unibet_html(page_source, parser_backend)
 
-    # Find the container with match cards; based on provided html structure
-    matches_list = soup.find('div', id='matches-list')
-    if not matches_list:
+def parse_unibet_html(page_source, parser_backend='auto'):
+    """Extract the match cards from a valuebase/Unibet top picks page
+    
+    Args:
+        page_source: HTML of the page, from Chrome or a plain HTTP fetch
+        parser_backend: 'auto' (fastest installed), 'selectolax', 'lxml' or 'bs4'
+        
+    Returns:
+        DataFrame with one row per match: competition, date_time, teams and
+        home/draw/away decimal odds
+    """
+    backend, extract_cards = get_parser_backend(parser_backend)
+    with METRICS.timer('unibet.parse'):
+        data = extract_cards(page_source)
+    METRICS.count('unibet.bytes_parsed', len(page_source.encode('utf-8')))
+    if data is None:
         print('No matches list found.')
         data = []
     else:
-        cards = matches_list.find_all('a')
-        print(f'Found {len(cards)} match cards.')
-        data = []
-        
-        for card in cards:
-            try:
-                # Extract competition from first .match-details.small-text block
-                comp_container = card.find('div', class_='match-details')
-                competition = 'Unknown'
-                if comp_container:
-                    path_div = comp_container.find('div', class_='match-details-path')
-                    if path_div:
-                        span = path_div.find('span')
-                        if span and span.text.strip():
-                            comp_text = span.text.strip()
-                            competition = comp_text[:3] if len(comp_text) >= 3 else comp_text
-                
-                # Extract date and time from second .match-details.small-text block
-                date_time = 'Unknown'
-                details_blocks = card.find_all('div', class_='match-details')
-                if len(details_blocks) >= 2:
-                    clock_div = details_blocks[-1].find('div', class_='match-clock')
-                    if clock_div and clock_div.text.strip():
-                        date_time = clock_div.text.strip()
-                
-                # Extract team names from the live-match section
-                home_team = 'Unknown'
-                away_team = 'Unknown'
-                live_match = card.find('div', class_='live-match')
-                if live_match:
-                    participants = live_match.find('div', class_='match-participants')
-                    if participants:
-                        team_divs = participants.find_all('div')
-                        if len(team_divs) >= 2:
-                            home_team = team_divs[0].text.strip()
-                            away_team = team_divs[1].text.strip()
-                
-                # Extract odds from bet-button elements using data-odds-decimal attribute
-                bets_div = card.find('div', class_='bets')
-                if bets_div:
-                    bet_divs = bets_div.find_all('div', class_='bet', recursive=False)
-                    if len(bet_divs) >= 3:
-                        def extract_odds(bet_div):
-                            # Find any element within bet-div that has data-odds-decimal
-                            odds_element = bet_div.find(attrs={'data-odds-decimal': True})
-                            if odds_element:
-                                odds_str = odds_element['data-odds-decimal']
-                                try:
-                                    return float(odds_str) if odds_str else ''
-                                except (ValueError, AttributeError):
-                                    return odds_str
-                            return ''
-
-                        home_odds = extract_odds(bet_divs[0])
-                        draw_odds = extract_odds(bet_divs[1])
-                        away_odds = extract_odds(bet_divs[2])
-                    else:
-                        home_odds = draw_odds = away_odds = ''
-                else:
-                    home_odds = draw_odds = away_odds = ''
-                
-                data.append([
-                    competition,
-                    date_time,
-                    home_team,
-                    away_team,
-                    home_odds,
-                    draw_odds, 
-                    away_odds
-                ])
-                print(f"Added match: {home_team} vs {away_team} with odds H:{home_odds} D:{draw_odds} A:{away_odds}")
-            except Exception as e:
-                print(f'Error processing a match card: {e}')
-                continue
+        print(f'Found {len(data)} match cards (parsed with {backend}).')
+        for competition, date_time, home_team, away_team, home_odds, draw_odds, away_odds in data:
+            print(f"Added match: {home_team} vs {away_team} with odds H:{home_odds} D:{draw_odds} A:{away_odds}")
 
     # Create DataFrame
-    df = pd.DataFrame(data, columns=[
-        'competition',
-        'date_time',
-        'home_team',
-        'away_team',
-        'home_odds',
-        'draw_odds',
-        'away_odds'
-    ])
+    df = pd.DataFrame(data, columns=UNIBET_COLUMNS)
+    METRICS.count('unibet.rows', len(df))
     print('\nFinal DataFrame:')
     print(df)
 
-    # Save to CSV if data exists
+    return df
+
+def save_odds(df, output_file='unibet_predictions.csv'):
+    """Write scraped odds to CSV if any were collected"""
     if not df.empty:
-        output_file = 'unibet_predictions.csv'
         df.to_csv(output_file, index=False)
         print(f'Data saved to {output_file}')
     else:
         print('No data was collected!')
 
-except Exception as e:
-    print(f'An error occurred: {e}')
-    raise e
-
-finally:
-    print('Closing browser...')
+def main():
+    parser = argparse.ArgumentParser(description='Scrape Unibet odds')
+    parser.add_argument('--fetch_mode', choices=['auto', 'http', 'chrome'], default='auto',
+                        help='auto: plain HTTP with Chrome as fallback (default); http: no browser; chrome: browser only')
+    parser.add_argument('--url', type=str, default=UNIBET_URL, help='Page to scrape')
+    parser.add_argument('--parser_backend', choices=['auto', 'selectolax', 'lxml', 'bs4'], default='auto',
+                        help='HTML parser for the match cards (default: fastest installed)')
+    args = parser.parse_args()
+    
     try:
-        dr.quit()
+        df = fetch_unibet_odds(args.fetch_mode, url=args.url, parser_backend=args.parser_backend)
+        save_odds(df)
     except Exception as e:
-        print('Error closing browser:', e)
+        print(f'An error occurred: {e}')
+        raise e
+    finally:
+        export_child_metrics()
+
+if __name__ == "__main__":
+    main()